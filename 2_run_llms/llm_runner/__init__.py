@@ -0,0 +1,7 @@
+"""
+Provider-agnostic async runner for the API-hosted LLMs (GPT-4.1, DeepSeek).
+
+Run from the 2_run_llms directory:
+
+    python -m llm_runner --providers gpt41 deepseek --languages zh en
+"""
@@ -0,0 +1,306 @@
+"""
+Offline Batch-API mode: prepare request files, submit them, and ingest the results
+"""
+
+import os
+import json
+import asyncio
+from typing import List, Dict, Any, Iterable, Optional
+
+from .prompts import generate_prompt, label_schema
+from .providers import ProviderBackend, SAMPLING_PARAMS, get_backend, close_backends
+from .prefix_cache import prefix_fingerprint
+from .resume import WorkItem
+from .checkpoint import AttemptHistory, attempts_path, write_csv_atomic
+from .runner import (Job, dataset_keys, iter_pending, load_resume_state, make_result, make_voted_result,
+                     print_summary, DATASET_PATH, OUTPUT_DIR)
+
+BATCH_DIR = 'batches'
+BATCH_ENDPOINT = '/v1/chat/completions'
+# OpenAI limits per input file
+MAX_REQUESTS_PER_FILE = 50_000
+MAX_BYTES_PER_FILE = 200 * 1024 * 1024
+# Batch states after which a batch will not change any more
+FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def batch_job_dir(job: Job, output_dir: str = OUTPUT_DIR) -> str:
+    """llm_outputs/batches/gpt41_few_shot_en/"""
+    name = os.path.splitext(os.path.basename(job.output_filename(output_dir)))[0]
+    return os.path.join(output_dir, BATCH_DIR, name)
+
+
+def manifest_path(job: Job, output_dir: str = OUTPUT_DIR) -> str:
+    return os.path.join(batch_job_dir(job, output_dir), "manifest.json")
+
+
+def load_manifest(job: Job, output_dir: str = OUTPUT_DIR) -> Optional[Dict[str, Any]]:
+    path = manifest_path(job, output_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(job: Job, manifest: Dict[str, Any], output_dir: str = OUTPUT_DIR):
+    path = manifest_path(job, output_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_batch_request(backend: ProviderBackend, job: Job, item: WorkItem) -> Dict[str, Any]:
+    """One line of a batch input file; custom_id is the stable item key"""
+    messages = generate_prompt(item.text, job.mode, job.language, structured=job.structured)
+    body = {"model": backend.config.model, "messages": messages, **SAMPLING_PARAMS}
+    if job.samples > 1:
+        body["n"] = job.samples
+    # Batch bodies are sent as-is, so extra_body fields go in at the top level
+    body.update(backend.config.extra_body or {})
+    if job.structured:
+        structured = backend.structured_kwargs(label_schema(job.language))
+        body.update(structured.pop("extra_body", {}))
+        body.update(structured)
+    if backend.config.send_prompt_cache_key:
+        body["prompt_cache_key"] = prefix_fingerprint(messages)
+    return {"custom_id": item.key, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def write_batch_files(requests: Iterable[Dict[str, Any]], directory: str,
+                      max_requests: int = MAX_REQUESTS_PER_FILE, max_bytes: int = MAX_BYTES_PER_FILE) -> List[Dict[str, Any]]:
+    """Split requests (streamed) into part-NNN.jsonl files that respect the provider's per-file limits"""
+    os.makedirs(directory, exist_ok=True)
+    parts = []
+    current, current_bytes = [], 0
+
+    def flush():
+        path = os.path.join(directory, f"part-{len(parts):03d}.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(current)
+        parts.append({"path": path, "count": len(current), "bytes": current_bytes})
+
+    for request in requests:
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        size = len(line.encode('utf-8'))
+        if current and (len(current) >= max_requests or current_bytes + size > max_bytes):
+            flush()
+            current, current_bytes = [], 0
+        current.append(line)
+        current_bytes += size
+    if current:
+        flush()
+    return parts
+
+
+def in_flight(manifest: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parts of a manifest that were submitted but whose results have not been ingested yet"""
+    return [part for part in (manifest or {}).get("parts", []) if part.get("batch_id") and not part.get("ingested")]
+
+
+def prepare_job(job: Job, dataset_path: str = DATASET_PATH, output_dir: str = OUTPUT_DIR,
+                retry_failed: bool = True) -> Optional[Dict[str, Any]]:
+    """Write batch input files for every item that still needs a result.
+
+    A manifest with batches still in flight is kept: replacing it would
+    lose their batch ids and send their items again.
+    """
+    backend = get_backend(job.provider)
+    running = in_flight(load_manifest(job, output_dir))
+    if running:
+        print(f"[{job.label}] {len(running)} submitted batch(es) not ingested yet; "
+              f"run --batch ingest before preparing new ones")
+        return None
+    index, _, _ = load_resume_state(job, dataset_keys(dataset_path), output_dir)
+    if not index.select_pending(retry_failed=retry_failed):
+        print(f"[{job.label}] All texts already processed, nothing to batch")
+        index.close()
+        return None
+
+    directory = batch_job_dir(job, output_dir)
+    if load_manifest(job, output_dir):
+        print(f"[{job.label}] Replacing existing batch manifest in {directory}")
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        if name.startswith("part-") and name.endswith(".jsonl"):
+            os.remove(os.path.join(directory, name))
+
+    requests = (build_batch_request(backend, job, item) for item in iter_pending(dataset_path, index.selected))
+    parts = write_batch_files(requests, directory)
+    index.close()
+    manifest = {
+        "provider": job.provider,
+        "mode": job.mode,
+        "language": job.language,
+        "model": backend.config.model,
+        "parts": parts,
+    }
+    save_manifest(job, manifest, output_dir)
+    count = sum(part["count"] for part in parts)
+    print(f"[{job.label}] Wrote {count} requests in {len(parts)} batch file(s) to {directory}")
+    return manifest
+
+
+async def submit_job(job: Job, dataset_path: str = DATASET_PATH, output_dir: str = OUTPUT_DIR,
+                     retry_failed: bool = True):
+    """Upload and start a batch for every part file that has none yet.
+
+    Batch files are prepared first only when there is no manifest or every
+    part of it has been ingested; otherwise an interrupted submit resumes
+    with the parts that have no batch id.
+    """
+    backend = get_backend(job.provider)
+    manifest = load_manifest(job, output_dir)
+    if manifest is None or all(part.get("ingested") for part in manifest["parts"]):
+        manifest = prepare_job(job, dataset_path, output_dir, retry_failed)
+        if manifest is None:
+            return
+    elif all(part.get("batch_id") for part in manifest["parts"]):
+        print(f"[{job.label}] All {len(manifest['parts'])} batch(es) already submitted; "
+              f"run --batch ingest to collect their results")
+        return
+
+    for part in manifest["parts"]:
+        if part.get("batch_id"):
+            continue
+        with open(part["path"], 'rb') as f:
+            uploaded = await backend.client.files.create(file=f, purpose="batch")
+        batch = await backend.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"job": job.label},
+        )
+        part.update({"input_file_id": uploaded.id, "batch_id": batch.id, "status": batch.status})
+        # Save after every part so a failure halfway does not lose track of submitted batches
+        save_manifest(job, manifest, output_dir)
+        print(f"[{job.label}] Submitted {part['path']} as batch {batch.id} ({part['count']} requests)")
+
+
+async def _read_file(backend: ProviderBackend, file_id: Optional[str]) -> List[Dict[str, Any]]:
+    if not file_id:
+        return []
+    content = await backend.client.files.content(file_id)
+    return [json.loads(line) for line in content.text.splitlines() if line.strip()]
+
+
+def _outputs_from_line(line: Dict[str, Any]) -> List[str]:
+    """Completion text of every choice in one batch output line, raising if the request failed"""
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code", 200) != 200:
+        raise RuntimeError(json.dumps(line.get("error") or response.get("body"), ensure_ascii=False))
+    return [(choice["message"]["content"] or "").strip() for choice in response["body"]["choices"]]
+
+
+async def ingest_job(job: Job, dataset_path: str = DATASET_PATH, output_dir: str = OUTPUT_DIR) -> bool:
+    """Merge finished batch results into the output CSV; returns True once every batch is final.
+
+    Only the texts of the batch being ingested are read back from the
+    dataset, so memory grows with the batch file, not the dataset.
+    """
+    backend = get_backend(job.provider)
+    manifest = load_manifest(job, output_dir)
+    if manifest is None:
+        print(f"[{job.label}] No batch manifest found in {batch_job_dir(job, output_dir)}")
+        return True
+
+    index, journal, _ = load_resume_state(job, dataset_keys(dataset_path), output_dir)
+    history = AttemptHistory(attempts_path(job.output_filename(output_dir)))
+    ingested = 0
+    all_final = True
+    try:
+        for part in manifest["parts"]:
+            if not part.get("batch_id") or part.get("ingested"):
+                continue
+            batch = await backend.client.batches.retrieve(part["batch_id"])
+            part["status"] = batch.status
+            if batch.status not in FINAL_STATES:
+                all_final = False
+                counts = batch.request_counts
+                progress = f" ({counts.completed}/{counts.total})" if counts else ""
+                print(f"[{job.label}] Batch {batch.id} is {batch.status}{progress}")
+                continue
+
+            # Results go through the same parse_output path and journal as the online runner
+            lines = await _read_file(backend, batch.output_file_id) + await _read_file(backend, batch.error_file_id)
+            wanted = (line.get("custom_id") for line in lines)
+            items_by_key = {item.key: item for item in iter_pending(dataset_path, wanted)}
+            for line in lines:
+                item = items_by_key.get(line.get("custom_id"))
+                if item is None:
+                    continue
+                try:
+                    outputs = _outputs_from_line(line)
+                    if job.samples > 1:
+                        result = make_voted_result(item.text, outputs, job)
+                    else:
+                        result = make_result(item.text, outputs[0], job.language, job.structured)
+                except Exception as e:
+                    result = {"Original_Input_Text": item.text, "RL_Types": "ERROR", "Raw_Model_Output": str(e)}
+                record = {"key": item.key, "comment_id": item.comment_id, **result}
+                previous = index.get(item.key)
+                journal.append(record)
+                index.add(item.key, record)
+                if previous is not None:
+                    history.record(item.key, previous, result)
+                ingested += 1
+            part["ingested"] = True
+            print(f"[{job.label}] Ingested batch {batch.id} ({batch.status}, {len(lines)} results)")
+    finally:
+        journal.close()
+        history.close()
+        save_manifest(job, manifest, output_dir)
+
+    if ingested:
+        output_filename = job.output_filename(output_dir)
+        write_csv_atomic(index.iter_rows(), output_filename, columns=index.columns())
+        journal.remove()
+        print(f"[{job.label}] Results saved to {output_filename}")
+        print_summary(job, index.iter_rows())
+    index.close()
+    return all_final
+
+
+async def batch_main_async(action: str, jobs: List[Job], dataset_path: str = DATASET_PATH,
+                           output_dir: str = OUTPUT_DIR, retry_failed: bool = True,
+                           wait: bool = False, poll_interval: float = 60.0, base_url: Optional[str] = None,
+                           structured_output: Optional[str] = None):
+    """Run one batch action (prepare, submit, ingest) for every job.
+
+    The Batch API trades latency (results within 24h) for half the price and
+    a separate, much larger rate-limit pool, which suits the offline sweeps.
+    """
+    for provider in sorted({job.provider for job in jobs}):
+        backend = get_backend(provider, base_url=base_url, structured_output=structured_output)
+        if not backend.config.supports_batch and not base_url:
+            print(f"Error: {backend.config.display_name} has no Batch API; "
+                  f"use the online runner or --base-url for an OpenAI-compatible batch endpoint.")
+            return
+        if action != "prepare" and not backend.api_key:
+            print(f"Error: {backend.config.display_name} API key not set. "
+                  f"Please set the {backend.config.api_key_env} environment variable.")
+            return
+
+    for job in [job for job in jobs if job.scoring or job.pack_size > 1]:
+        print(f"Skipping {job.label}: label scoring and packing are not available in batch mode")
+    jobs = [job for job in jobs if not job.scoring and job.pack_size == 1]
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        if action == "prepare":
+            for job in jobs:
+                prepare_job(job, dataset_path, output_dir, retry_failed)
+        elif action == "submit":
+            for job in jobs:
+                await submit_job(job, dataset_path, output_dir, retry_failed)
+        elif action == "ingest":
+            while True:
+                finished = [await ingest_job(job, dataset_path, output_dir) for job in jobs]
+                if all(finished) or not wait:
+                    break
+                print(f"Waiting {poll_interval:.0f} seconds for running batches...")
+                await asyncio.sleep(poll_interval)
+        else:
+            raise ValueError(f"Unknown batch action '{action}'")
+    finally:
+        await close_backends()
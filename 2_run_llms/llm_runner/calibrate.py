@@ -0,0 +1,80 @@
+"""
+Fit per-label calibration of a scored run (--score) on the Golden annotations and re-threshold its CSV
+
+    python -m llm_runner.calibrate --providers gpt41 --score binary
+"""
+
+import os
+import json
+import argparse
+from typing import List, Dict, Optional, Set
+
+import pandas as pd
+
+from .prompts import PROMPT_PACKS, get_prompt_pack
+from .providers import PROVIDERS
+from .checkpoint import write_csv_atomic
+from .scoring import SCORING_STRATEGIES, Calibration, calibration_path
+from .pack_report import golden_labels, predicted_labels, label_f1
+from .runner import Job, DATASET_PATH, OUTPUT_DIR
+
+
+def golden_by_text(dataset_path: str, language: str) -> Dict[str, Set[str]]:
+    """Input text -> golden labels, for the rows that have some (the rows the evaluation notebooks score)"""
+    vocabulary = get_prompt_pack(language).label_vocabulary
+    dataset = pd.read_csv(dataset_path, usecols=['text', 'Golden'])
+    golden = {text: {vocabulary[n - 1] for n in golden_labels(value)}
+              for text, value in zip(dataset['text'], dataset['Golden'])}
+    return {text: labels for text, labels in golden.items() if labels}
+
+
+def calibrate_job(job: Job, dataset_path: str = DATASET_PATH, output_dir: str = OUTPUT_DIR) -> Optional[Calibration]:
+    """Fit and save the job's calibration, then rewrite its CSV with Calibrated_Scores and the new RL_Types"""
+    output_filename = job.output_filename(output_dir)
+    if not os.path.exists(output_filename):
+        print(f"\n{job.label}: no results ({output_filename})")
+        return None
+    df = pd.read_csv(output_filename, keep_default_na=False)
+    golden = golden_by_text(dataset_path, job.language)
+    fitting = [(json.loads(scores), golden[text]) for text, scores in zip(df['Original_Input_Text'], df['Label_Scores'])
+               if text in golden and scores not in ("", "{}")]
+    if not fitting:
+        print(f"\n{job.label}: no scored rows with Golden labels to fit on")
+        return None
+
+    vocabulary = list(get_prompt_pack(job.language).label_vocabulary)
+    calibration = Calibration.fit([scores for scores, _ in fitting], [gold for _, gold in fitting], vocabulary)
+    calibration.save(calibration_path(output_filename))
+    rows = [calibration.apply(row) for row in df.to_dict('records')]
+    write_csv_atomic(rows, output_filename)
+
+    # F1 over the annotated rows, as in the evaluation notebooks (optimistic: these are the fitting rows)
+    annotated = [i for i, text in enumerate(df['Original_Input_Text']) if text in golden]
+    gold = [{vocabulary.index(label) + 1 for label in golden[df['Original_Input_Text'][i]]} for i in annotated]
+    before = label_f1(gold, [predicted_labels(df['RL_Types'][i], job.language) for i in annotated])
+    after = label_f1(gold, [predicted_labels(rows[i]['RL_Types'], job.language) for i in annotated])
+    print(f"\n{job.label}: fitted on {len(fitting)} rows, saved to {calibration_path(output_filename)}")
+    print(f"  Thresholds: {calibration.describe()}")
+    print("  F1: " + ", ".join(f"{name} {before[name]:.3f} -> {after[name]:.3f}" for name in ("micro", "macro")))
+    return calibration
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="llm_runner.calibrate",
+                                     description="Calibrate the label scores of --score runs on the Golden labels.")
+    parser.add_argument("--providers", nargs="+", choices=sorted(PROVIDERS), default=["gpt41"])
+    parser.add_argument("--languages", nargs="+", choices=sorted(PROMPT_PACKS), default=["zh"])
+    parser.add_argument("--score", nargs="+", choices=SCORING_STRATEGIES, default=["binary"],
+                        help="Scoring strategies of the runs to calibrate")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset CSV with the Golden column")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
+
+    for provider in args.providers:
+        for language in args.languages:
+            for strategy in args.score:
+                calibrate_job(Job(provider, "no_cot", language, scoring=strategy), args.dataset, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
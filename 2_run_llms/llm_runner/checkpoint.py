@@ -0,0 +1,132 @@
+"""
+Crash-safe checkpointing: an append-only JSONL journal per output file, compacted to CSV at the end
+"""
+
+import os
+import json
+import time
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+import pandas as pd
+
+
+def journal_path(output_filename: str) -> str:
+    """llm_outputs/gpt41_zero_shot.csv -> llm_outputs/gpt41_zero_shot.journal.jsonl"""
+    root, _ = os.path.splitext(output_filename)
+    return f"{root}.journal.jsonl"
+
+
+class ResultJournal:
+    """Append-only journal of finished results.
+
+    Every record is written as one JSON line and fsynced before `append`
+    returns, so a crash, Ctrl-C or OOM kill loses at most the line that was
+    being written. A torn final line is ignored when the journal is loaded.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read back every complete record from a previous run"""
+        return list(self.iter_records())
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Complete records from a previous run, one at a time"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Ignoring torn journal line {line_number} in {self.path}")
+
+    def append(self, record: Dict[str, Any]):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def attempts_path(output_filename: str) -> str:
+    """llm_outputs/gpt41_zero_shot.csv -> llm_outputs/gpt41_zero_shot.attempts.jsonl"""
+    root, _ = os.path.splitext(output_filename)
+    return f"{root}.attempts.jsonl"
+
+
+class AttemptHistory:
+    """History of re-runs of failed rows, kept next to the output CSV.
+
+    The CSV only holds the latest result per row; every time a row that had
+    a stored result is run again, the result it replaces and the new one
+    are appended here with an attempt number.
+    """
+
+    def __init__(self, path: str):
+        self.journal = ResultJournal(path, fsync=False)
+        self.attempts = Counter(record.get("key") for record in self.journal.iter_records())
+
+    def count(self, key: str) -> int:
+        return self.attempts[key]
+
+    def record(self, key: str, previous: Dict[str, Any], result: Dict[str, Any]):
+        self.attempts[key] += 1
+        self.journal.append({
+            "key": key,
+            "attempt": self.attempts[key],
+            "timestamp": time.time(),
+            "previous_RL_Types": previous.get("RL_Types"),
+            "previous_Raw_Model_Output": previous.get("Raw_Model_Output"),
+            "RL_Types": result.get("RL_Types"),
+            "Raw_Model_Output": result.get("Raw_Model_Output"),
+        })
+
+    def close(self):
+        self.journal.close()
+
+
+def write_csv_atomic(rows: Iterable[Dict[str, Any]], output_filename: str, columns: Optional[List[str]] = None,
+                     chunk_rows: int = 10_000):
+    """Write the final CSV via a temp file and rename, so readers never see half a file.
+
+    With `columns` given, rows are consumed and written `chunk_rows` at a
+    time, so a streamed iterable is never held in memory as a whole.
+    """
+    # Per process, so runners sharing a WorkQueue can each write the merged CSV
+    tmp_filename = f"{output_filename}.{os.getpid()}.tmp"
+    if columns is None:
+        pd.DataFrame(list(rows)).to_csv(tmp_filename, index=False, encoding='utf-8-sig')
+    else:
+        # One handle for every chunk, so the utf-8-sig BOM is written once
+        with open(tmp_filename, 'w', encoding='utf-8-sig', newline='') as f:
+            chunk = []
+            header = True
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    pd.DataFrame(chunk, columns=columns).to_csv(f, index=False, header=header)
+                    chunk, header = [], False
+            if chunk or header:
+                pd.DataFrame(chunk, columns=columns).to_csv(f, index=False, header=header)
+    os.replace(tmp_filename, output_filename)
@@ -0,0 +1,131 @@
+"""
+Per-provider circuit breaker: stop dispatching during an outage, probe with one request, resume
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+
+from openai import APIConnectionError
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of waiting once the provider has been down for longer than the breaker's give-up time"""
+
+
+def is_outage_error(error: Exception) -> bool:
+    """Errors that say the provider is down (5xx, refused or dropped connections, timeouts), not this request"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status >= 500
+    return isinstance(error, (APIConnectionError, TimeoutError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+    """Outage detector shared by every request to one provider.
+
+    Closed: requests flow and the outcomes of the last `window` calls are
+    kept. Once at least `min_calls` have finished and `error_rate` of
+    those kept were outage errors, the breaker opens and no new
+    request is sent for `cooldown` seconds. It then half-opens and lets a
+    single probe through: success closes it, failure reopens it with the
+    cooldown doubled (up to `max_cooldown`). Other errors (429s, bad
+    requests) mean the provider is up and count as successes. After
+    `give_up` seconds open, waiting callers get CircuitOpen instead.
+    """
+
+    def __init__(self, name: str = "", error_rate: float = 0.5, min_calls: int = 10, window: int = 20,
+                 cooldown: float = 10.0, max_cooldown: float = 300.0, give_up: Optional[float] = 1800.0):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.give_up = give_up
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)  # Whether each recent call (while closed) reached the provider
+        self.opened_at = 0.0     # Start of the current open or half-open spell
+        self.retry_at = 0.0      # When the next probe may go out
+        self.probing = False
+        self.trips = 0
+        self.probes = 0
+        self.open_seconds = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def is_open(self) -> bool:
+        """True from the trip until a probe succeeds"""
+        return self.state != CLOSED
+
+    def poll(self) -> Optional[bool]:
+        """Without waiting: False to send normally, True if the caller is the probe, None while dispatch is paused"""
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN and time.monotonic() >= self.retry_at:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            self.probes += 1
+            return True
+        return None
+
+    async def admit(self) -> bool:
+        """Wait until a request may be sent; True if the caller is the probe and must report back with record()"""
+        async with self._condition:
+            while True:
+                admitted = self.poll()
+                if admitted is not None:
+                    return admitted
+                now = time.monotonic()
+                if self.give_up is not None and now - self.opened_at > self.give_up:
+                    raise CircuitOpen(f"Provider down for {now - self.opened_at:.0f}s ({self.describe()})")
+                # Woken by the probe's outcome, or when the cooldown ends
+                timeout = max(self.retry_at - now, 0.0) if self.state == OPEN else None
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def record(self, ok: Optional[bool], probe: bool = False):
+        """Count one finished call; `ok` is False only for outage errors, None for a probe that never got an answer"""
+        async with self._condition:
+            now = time.monotonic()
+            if probe:
+                self.probing = False
+                if ok is None:
+                    pass  # Cancelled or over budget: the next caller probes instead
+                elif ok:
+                    self._close(now)
+                else:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                    self.state = OPEN
+                    self.retry_at = now + self.cooldown
+                    print(f"[{self.name}] Circuit breaker probe failed, next probe in {self.cooldown:g}s")
+                self._condition.notify_all()
+                return
+            if self.state != CLOSED:
+                return  # Calls sent before the trip; only the probe decides when to close
+            self.outcomes.append(ok)
+            failures = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and failures >= self.error_rate * len(self.outcomes):
+                self.state = OPEN
+                self.trips += 1
+                self.opened_at = now
+                self.retry_at = now + self.cooldown
+                print(f"[{self.name}] Circuit breaker open: {failures} of the last {len(self.outcomes)} calls failed, "
+                      f"pausing dispatch for {self.cooldown:g}s")
+
+    def _close(self, now: float):
+        self.open_seconds += now - self.opened_at
+        print(f"[{self.name}] Circuit breaker closed after {now - self.opened_at:.0f}s, resuming dispatch")
+        self.state = CLOSED
+        self.cooldown = self.base_cooldown
+        self.outcomes.clear()
+
+    def describe(self) -> str:
+        return (f"{self.state}, {self.trips} trips, {self.probes} probes, "
+                f"{self.open_seconds:.0f}s open")
@@ -0,0 +1,204 @@
+"""
+Command line interface for the runner
+"""
+
+import argparse
+import asyncio
+from dataclasses import replace
+from typing import List, Dict, Optional
+
+from .prompts import MODES, PROMPT_PACKS
+from .providers import PROVIDERS, STRUCTURED_OUTPUT_KINDS
+from .scoring import SCORING_STRATEGIES
+from .runner import Job, main_async, DATASET_PATH, OUTPUT_DIR
+from .response_cache import CACHE_PATH, CACHE_MAX_BYTES
+from .batch_api import batch_main_async
+from .work_queue import QUEUE_PATH, LEASE_SECONDS
+from .transport import TransportConfig
+from .scheduling import SCHEDULES
+from .routing import ROUTED
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="llm_runner",
+        description="Run the RL classification prompts against one or more API providers.",
+    )
+    parser.add_argument("--providers", nargs="+", choices=sorted(PROVIDERS), default=["gpt41"],
+                        help="Provider backends to run (default: gpt41)")
+    parser.add_argument("--route", nargs="+", default=None, metavar="PROVIDER[=URL]",
+                        help="Instead of one run per provider, send each text to the cheapest of these providers "
+                             "that meets --route-slo; results go to routed_{method}.csv with a Served_By column. "
+                             "URL overrides the provider's endpoint (e.g. Qwen3-32B=http://gpu-box:8000/v1)")
+    parser.add_argument("--route-slo", type=float, default=None, metavar="SECONDS",
+                        help="Latency target per request: the router spills to pricier providers when the cheaper "
+                             "ones' recent p95 latency, queueing and rate-limit waits would exceed it")
+    parser.add_argument("--route-tier", type=int, default=None,
+                        help="Only route to providers of this quality tier or better (1 = best, see PROVIDERS)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES,
+                        help="Prompting modes to run (default: all)")
+    parser.add_argument("--languages", nargs="+", choices=sorted(PROMPT_PACKS), default=["zh"],
+                        help="Prompt languages to run (default: zh)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="Ceiling for each provider's adaptive concurrency window")
+    parser.add_argument("--rpm", type=int, default=None,
+                        help="Requests-per-minute quota (default: learned from x-ratelimit-* headers)")
+    parser.add_argument("--tpm", type=int, default=None,
+                        help="Tokens-per-minute quota (default: learned from x-ratelimit-* headers)")
+    parser.add_argument("--keep-failed", action="store_true",
+                        help="On resume, do not re-queue rows that ended in ERROR/PARSE_ERROR_NO_MARKER")
+    parser.add_argument("--repair", action="store_true",
+                        help="Only re-run rows of existing output CSVs that ended in ERROR/PARSE_ERROR_NO_MARKER")
+    parser.add_argument("--max-attempts", type=int, default=None,
+                        help="Give up on rows that have already been re-run this many times")
+    parser.add_argument("--no-followup", action="store_true",
+                        help="Do not ask for just the final labels when an answer is truncated or has no output marker")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or write the on-disk response cache")
+    parser.add_argument("--cache-path", default=CACHE_PATH, help="SQLite file for the response cache")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream completions and close each one as soon as the label line "
+                             "after the output marker is complete")
+    parser.add_argument("--structured", action="store_true",
+                        help="Run no_cot with schema-constrained JSON answers ({provider}_no_cot_structured.csv)")
+    parser.add_argument("--structured-output", choices=STRUCTURED_OUTPUT_KINDS, default=None,
+                        help="How to constrain the answer (default per provider; guided_json for vLLM servers)")
+    parser.add_argument("--score", choices=SCORING_STRATEGIES, default=None, nargs="?", const="binary",
+                        help="Run no_cot as logprob label scoring instead of generation: one yes/no per label "
+                             "(binary, the default) or one 0-7 answer token (choice, a single best label)")
+    parser.add_argument("--score-threshold", type=float, default=None,
+                        help="Raw score a label needs to be kept, instead of the per-label thresholds saved by "
+                             "llm_runner.calibrate (default without them: 0.3 for choice, 0.5 for binary)")
+    parser.add_argument("--samples", type=int, default=1,
+                        help="Self-consistency: sample this many answers per text (n=k in one request) and vote")
+    parser.add_argument("--vote-threshold", type=float, default=0.5,
+                        help="Share of samples a label needs to be kept in the voted RL_Types (default: 0.5)")
+    parser.add_argument("--schedule", choices=SCHEDULES, default="dataset",
+                        help="Send order of pending texts: dataset order, longest (estimated tokens of the text plus "
+                             "its earlier answers in llm_outputs) first, or longest first in length buckets")
+    parser.add_argument("--buckets", type=int, default=8,
+                        help="Number of length buckets for --schedule buckets (default: 8)")
+    parser.add_argument("--pack-size", type=int, default=1,
+                        help="Put this many numbered texts in each request ({provider}_{mode}_pack{k}.csv); "
+                             "texts without an answer line are re-run one by one")
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help="Stop starting new requests once this many tokens have been used in the run")
+    parser.add_argument("--max-cost", type=float, default=None,
+                        help="Stop starting new requests once the run has cost this many USD (at PROVIDERS prices)")
+    parser.add_argument("--batch", choices=["prepare", "submit", "ingest"], default=None,
+                        help="Use the offline Batch API instead of live requests: write request files, "
+                             "upload and start them, or merge finished results into the output CSVs")
+    parser.add_argument("--wait", action="store_true",
+                        help="With --batch ingest, keep polling until every batch has finished")
+    parser.add_argument("--poll-interval", type=float, default=60.0,
+                        help="Seconds between batch status checks with --wait")
+    parser.add_argument("--queue", nargs="?", const=QUEUE_PATH, default=None, metavar="PATH",
+                        help=f"Share the jobs with other runners through a SQLite work queue "
+                             f"(default file: {QUEUE_PATH}); start the same command in several processes or hosts")
+    parser.add_argument("--worker-id", default=None,
+                        help="Name of this runner in the work queue (default: hostname:pid)")
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS,
+                        help="Hand a worker's leased texts to others if it sends no heartbeat for this long")
+    parser.add_argument("--max-connections", type=int, default=None,
+                        help="HTTP connections per API key (default: the key's concurrency ceiling)")
+    parser.add_argument("--http2", action="store_true",
+                        help="Multiplex requests over HTTP/2 where the endpoint supports it (needs httpx[http2])")
+    parser.add_argument("--prewarm", type=int, default=0, metavar="N",
+                        help="Open N connections per API key before the first request")
+    parser.add_argument("--connect-timeout", type=float, default=TransportConfig.connect_timeout,
+                        help="Seconds to establish a connection")
+    parser.add_argument("--read-timeout", type=float, default=None,
+                        help="Longest silence while reading a response (default per provider: 600s, 1200s for DeepSeek)")
+    parser.add_argument("--request-timeout", type=float, default=None,
+                        help="Deadline for a whole request, streamed answers included; it is then retried")
+    parser.add_argument("--hedge", type=float, default=None, nargs="?", const=95.0, metavar="PERCENTILE",
+                        help="Send a duplicate of any call still running past this latency percentile of the "
+                             "provider's recent calls (default 95) and keep whichever answers first")
+    parser.add_argument("--hedge-budget", type=float, default=0.05,
+                        help="Largest share of calls that may be duplicated (default: 0.05)")
+    parser.add_argument("--no-breaker", action="store_true",
+                        help="Turn off the per-provider circuit breaker (every request then retries on its own)")
+    parser.add_argument("--breaker-error-rate", type=float, default=0.5,
+                        help="Share of outage errors (5xx, connection errors, timeouts) among the last 20 calls "
+                             "that opens the breaker (default: 0.5, after at least 10 calls)")
+    parser.add_argument("--breaker-cooldown", type=float, default=10.0,
+                        help="Seconds dispatch pauses before a probe request; doubles after each failed probe")
+    parser.add_argument("--breaker-give-up", type=float, default=1800.0,
+                        help="Seconds of outage after which waiting texts fail with ERROR (default: 1800)")
+    parser.add_argument("--failover-url", default=None,
+                        help="Secondary OpenAI-compatible endpoint that serves requests while the breaker is open")
+    parser.add_argument("--failover-model", default=None,
+                        help="Model name at the failover endpoint (default: the provider's model)")
+    parser.add_argument("--failover-key-env", default="FAILOVER_API_KEY",
+                        help="Environment variable with the failover endpoint's API key (default: FAILOVER_API_KEY)")
+    parser.add_argument("--base-url", default=None,
+                        help="Override the provider endpoint (e.g. a local OpenAI-compatible server)")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Input dataset CSV")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for the output CSVs")
+    return parser
+
+
+def parse_routes(parser: argparse.ArgumentParser, specs: Optional[List[str]]) -> Dict[str, Optional[str]]:
+    """["gpt41", "Qwen3-32B=http://host:8000/v1"] -> {"gpt41": None, "Qwen3-32B": "http://host:8000/v1"}"""
+    routes = {}
+    for spec in specs or []:
+        name, _, url = spec.partition("=")
+        if name not in PROVIDERS:
+            parser.error(f"--route: unknown provider '{name}', expected one of {sorted(PROVIDERS)}")
+        routes[name] = url or None
+    return routes
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function to run the async analysis"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    routes = parse_routes(parser, args.route)
+    if routes and args.batch:
+        parser.error("--route does not apply to --batch runs")
+    jobs = [
+        Job(provider=provider, mode=mode, language=language, structured=args.structured and mode == "no_cot",
+            samples=args.samples, vote_threshold=args.vote_threshold,
+            scoring=args.score if mode == "no_cot" else None, score_threshold=args.score_threshold,
+            pack_size=args.pack_size)
+        for provider in ([ROUTED] if routes else args.providers)
+        for language in args.languages
+        for mode in args.modes
+    ]
+    # Packing is for plain free-text answers; structured, scored and voted jobs keep one text per request
+    jobs = [job if not (job.structured or job.scoring or job.samples > 1) else replace(job, pack_size=1)
+            for job in jobs]
+    if args.pack_size > 1 and (args.structured or args.score or args.samples > 1):
+        print("Warning: --pack-size does not apply to --structured, --score or --samples runs")
+    if (args.structured or args.score) and "no_cot" not in args.modes:
+        print("Warning: --structured and --score only apply to the no_cot mode")
+    transport = TransportConfig(max_connections=args.max_connections, http2=args.http2,
+                                connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                                request_timeout=args.request_timeout, prewarm=args.prewarm)
+    if args.batch:
+        asyncio.run(batch_main_async(args.batch, jobs, dataset_path=args.dataset, output_dir=args.output_dir,
+                                     retry_failed=not args.keep_failed, wait=args.wait,
+                                     poll_interval=args.poll_interval, base_url=args.base_url,
+                                     structured_output=args.structured_output))
+        return
+    asyncio.run(main_async(jobs, dataset_path=args.dataset, output_dir=args.output_dir,
+                           max_concurrent=args.max_concurrent, rpm=args.rpm, tpm=args.tpm,
+                           retry_failed=not args.keep_failed,
+                           cache_path=None if args.no_cache else args.cache_path,
+                           cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                           base_url=args.base_url, max_tokens=args.max_tokens, max_cost=args.max_cost,
+                           stream=args.stream, structured_output=args.structured_output,
+                           repair=args.repair, max_attempts=args.max_attempts, followup=not args.no_followup,
+                           queue_path=args.queue, worker_id=args.worker_id, lease_seconds=args.lease_seconds,
+                           transport=transport, hedge_quantile=args.hedge, hedge_budget=args.hedge_budget,
+                           order=args.schedule, buckets=args.buckets, breaker=not args.no_breaker,
+                           breaker_error_rate=args.breaker_error_rate, breaker_cooldown=args.breaker_cooldown,
+                           breaker_give_up=args.breaker_give_up, failover_url=args.failover_url,
+                           failover_model=args.failover_model, failover_key_env=args.failover_key_env,
+                           routes=routes, route_slo=args.route_slo, route_tier=args.route_tier))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Hedged requests: a duplicate of a call that runs past the observed tail latency, first answer wins
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Optional, Callable, Awaitable, Tuple, TypeVar
+
+from .telemetry import percentile
+
+T = TypeVar("T")
+
+
+class Hedger:
+    """Per-provider hedging policy and counters.
+
+    Once `min_samples` calls have finished, a call still running after the
+    `quantile` latency of the last `window` calls gets a duplicate; the
+    first one to succeed is used and the other is cancelled. At most
+    `budget` (a share of all calls) are duplicated, which bounds the extra
+    spend to about that share of the run's tokens. A primary that fails
+    ends the race with its error: its caller still holds the primary's
+    slot, which a duplicate waiting for a slot of its own may need.
+    """
+
+    def __init__(self, quantile: float = 95, budget: float = 0.05, min_samples: int = 20, window: int = 500):
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.won = 0
+        self.over_budget = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds after which a call is hedged, or None while there are too few samples"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return percentile(list(self.latencies), self.quantile)
+
+    def within_budget(self) -> bool:
+        return self.hedged + 1 <= self.budget * self.calls
+
+    async def run(self, primary: Awaitable[T], backup: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Await `primary`, racing it against `backup()` if it gets slow; returns (result, whether the backup won).
+
+        If the primary fails, its error is raised and the duplicate is cancelled.
+        """
+        self.calls += 1
+        start = time.monotonic()
+        first = asyncio.ensure_future(primary)
+        second = None
+        try:
+            delay = self.delay()
+            if delay is not None:
+                await asyncio.wait({first}, timeout=delay)
+            if delay is None or first.done():
+                result = await first
+                self.latencies.append(time.monotonic() - start)
+                return result, False
+            if not self.within_budget():
+                self.over_budget += 1
+                result = await first
+                self.latencies.append(time.monotonic() - start)
+                return result, False
+
+            self.hedged += 1
+            second = asyncio.ensure_future(backup())
+            await asyncio.wait({first, second}, return_when=asyncio.FIRST_COMPLETED)
+            if not first.done() and not second.cancelled() and second.exception() is None:
+                self.latencies.append(time.monotonic() - start)
+                self.won += 1
+                return second.result(), True
+            # The primary answered or failed first, or the duplicate failed
+            result = await first
+            self.latencies.append(time.monotonic() - start)
+            return result, False
+        finally:
+            for task in (first, second):
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Mark retrieved, so a failed loser is not logged as unhandled
+
+    def describe(self) -> str:
+        delay = self.delay()
+        threshold = f"{delay:.2f}s" if delay is not None else "warming up"
+        win_rate = f"{self.won / self.hedged:.0%}" if self.hedged else "-"
+        return (f"{self.hedged}/{self.calls} calls hedged after p{self.quantile:g} ({threshold}), "
+                f"duplicate won {self.won} ({win_rate}), {self.over_budget} not hedged over the "
+                f"{self.budget:.0%} budget")
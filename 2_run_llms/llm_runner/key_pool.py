@@ -0,0 +1,162 @@
+"""
+Pool of API keys per provider, each with its own client, rate limiter and health state
+"""
+
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple, AsyncIterator
+
+from openai import AsyncOpenAI
+
+from .rate_limit import RateLimiter
+from .transport import TransportConfig, make_http_client, prewarm
+
+# Error codes after which a key is taken out of the pool for the rest of the run
+REVOKED_STATUS = (401, 403)
+EXHAUSTED_CODE = "insufficient_quota"
+
+
+def keys_from_env(api_key_env: str) -> List[Tuple[str, Optional[str]]]:
+    """(api key, organization) pairs from e.g. OPENAI_API_KEYS="sk-a,sk-b:org-x", plus OPENAI_API_KEY.
+
+    An entry may name the organization its quota belongs to after a colon.
+    """
+    entries = [entry.strip() for entry in os.environ.get(f"{api_key_env}S", "").split(",")]
+    single = os.environ.get(api_key_env)
+    if single:
+        entries.insert(0, single.strip())
+    keys = []
+    for entry in entries:
+        if not entry:
+            continue
+        key, _, organization = entry.partition(":")
+        if key not in [k for k, _ in keys]:
+            keys.append((key, organization or None))
+    return keys
+
+
+class PooledKey:
+    """One API key (and organization): its client, its own RPM/TPM/concurrency limiter, and whether it is usable"""
+
+    def __init__(self, api_key: str, organization: Optional[str], base_url: Optional[str], limiter: RateLimiter,
+                 transport: Optional[TransportConfig] = None):
+        self.api_key = api_key
+        self.organization = organization
+        self.base_url = base_url
+        self.limiter = limiter
+        self.transport = transport or TransportConfig()
+        self.requests = 0
+        # Requests sent to this key that are waiting for or holding one of its slots
+        self.assigned = 0
+        # Set once the key is revoked or out of quota; it gets no more requests
+        self.drained: Optional[str] = None
+        self._client = None
+
+    @property
+    def name(self) -> str:
+        suffix = f"@{self.organization}" if self.organization else ""
+        return f"...{self.api_key[-4:]}{suffix}"
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            # SDK-level retries are disabled so every 429 reaches this key's limiter
+            self._client = AsyncOpenAI(api_key=self.api_key, organization=self.organization,
+                                       base_url=self.base_url, max_retries=0, timeout=self.transport.timeout(),
+                                       http_client=make_http_client(self.transport, self.limiter.max_concurrency))
+        return self._client
+
+    def headroom(self, tokens: int) -> Tuple[float, float]:
+        """Sort key, lower is better: seconds until a request could start, then requests per slot of its window"""
+        return self.limiter.wait_time(tokens), self.assigned / max(self.limiter.limit, 1)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator["PooledKey"]:
+        """Hold one of this key's concurrency slots (and its RPM/TPM budget) around a request"""
+        self.assigned += 1
+        try:
+            async with self.limiter.slot(tokens):
+                self.requests += 1
+                yield self
+        finally:
+            self.assigned -= 1
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class KeyPool:
+    """Spreads one provider's requests over several keys, sending each to the key with the most headroom.
+
+    Every key keeps its own quota: a 429 pauses and shrinks only that key's
+    limiter, so the others keep the traffic moving, and a key that comes
+    back revoked (401/403) or out of quota is drained from the pool. With
+    one key this behaves exactly like a single RateLimiter.
+    """
+
+    def __init__(self, keys: List[Tuple[str, Optional[str]]], base_url: Optional[str] = None,
+                 rpm: Optional[int] = None, tpm: Optional[int] = None,
+                 initial_concurrency: int = 5, max_concurrency: int = 64,
+                 transport: Optional[TransportConfig] = None):
+        self.transport = transport or TransportConfig()
+        self.keys = [
+            PooledKey(api_key, organization, base_url,
+                      RateLimiter(rpm=rpm, tpm=tpm, initial_concurrency=initial_concurrency,
+                                  max_concurrency=max_concurrency), self.transport)
+            for api_key, organization in keys
+        ]
+
+    @property
+    def max_concurrency(self) -> int:
+        return sum(key.limiter.max_concurrency for key in self.active) or 1
+
+    @property
+    def active(self) -> List[PooledKey]:
+        return [key for key in self.keys if key.drained is None]
+
+    def pick(self, tokens: int = 0) -> PooledKey:
+        """The usable key with the most headroom for a request of `tokens`"""
+        active = self.active
+        if not active:
+            reasons = "; ".join(f"{key.name}: {key.drained}" for key in self.keys)
+            raise RuntimeError(f"No usable API key left ({reasons or 'none configured'})")
+        return min(active, key=lambda key: key.headroom(tokens))
+
+    async def prewarm(self) -> int:
+        """Open `transport.prewarm` connections on every key (one is enough with HTTP/2); returns how many opened"""
+        if not self.transport.prewarm:
+            return 0
+        connections = 1 if self.transport.http2 else self.transport.prewarm
+        opened = await asyncio.gather(*(prewarm(key.client, connections) for key in self.active))
+        return sum(opened)
+
+    def drain(self, key: PooledKey, reason: str):
+        if key.drained is None:
+            key.drained = reason
+            print(f"Removing API key {key.name} from the pool: {reason} ({len(self.active)} keys left)")
+
+    def describe(self) -> str:
+        if len(self.keys) == 1:
+            return self.keys[0].limiter.describe()
+        parts = []
+        for key in self.keys:
+            state = f"drained: {key.drained}" if key.drained else key.limiter.describe()
+            parts.append(f"{key.name} {key.requests} requests, {state}")
+        return f"{len(self.active)}/{len(self.keys)} keys [" + "; ".join(parts) + "]"
+
+    async def close(self):
+        for key in self.keys:
+            await key.close()
+
+
+def drain_reason(error: Exception) -> Optional[str]:
+    """Why an error means the key itself is unusable (revoked, no access, out of quota), or None"""
+    status = getattr(error, "status_code", None)
+    if status in REVOKED_STATUS:
+        return f"HTTP {status}"
+    if getattr(error, "code", None) == EXHAUSTED_CODE or EXHAUSTED_CODE in str(error):
+        return "insufficient quota"
+    return None
@@ -0,0 +1,670 @@
+"""
+Local OpenAI-compatible stand-in server for offline load tests and deterministic replay
+
+    python -m llm_runner.mock_server --port 8765 --replay llm_outputs/gpt41_*.csv --rate-429 0.05
+    python -m llm_runner --base-url http://127.0.0.1:8765/v1 ...
+
+Answers come from recorded Raw_Model_Output (matched by input text), or are
+synthesized as a well-formed four-step answer from the dataset's Golden
+labels. Latency, 429s, 5xx errors and truncation are injected at
+configurable rates; every random choice is derived from --seed, the input
+text and how often that text has been requested, so a run can be
+reproduced exactly regardless of request order. /v1/files and
+/v1/batches stand in for the Batch API, for --batch runs.
+"""
+
+import os
+import re
+import sys
+import json
+import glob
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque, defaultdict
+from dataclasses import dataclass
+from email import policy as email_policy
+from email.parser import BytesParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from .prompts import PROMPT_PACKS, PromptPack
+from .prefix_cache import prefix_fingerprint
+from .rate_limit import estimate_tokens
+
+# Granularity of provider prefix caching (OpenAI caches prompt prefixes in 128-token steps)
+CACHE_BLOCK_TOKENS = 128
+
+
+@dataclass
+class MockConfig:
+    """Latency and fault injection settings"""
+    latency_ms: float = 800.0       # Median time to the full (or first streamed) answer
+    latency_sigma: float = 0.5      # Lognormal spread; 0 gives a fixed latency
+    chunk_delay_ms: float = 2.0     # Between streamed chunks
+    chunk_chars: int = 8            # Characters per streamed chunk
+    rate_429: float = 0.0           # Share of requests rejected with a 429 on top of the rpm/tpm limits
+    retry_after_ms: int = 500       # Wait suggested in injected 429s
+    rate_5xx: float = 0.0           # Share of requests failing with a 500/503
+    rate_truncate: float = 0.0      # Share of answers cut off with finish_reason "length"
+    rate_hang: float = 0.0          # Share of requests that never get an answer (a hung socket)
+    hang_seconds: float = 300.0     # How long a hung request holds the connection before it is dropped
+    handshake_ms: float = 0.0       # Added to the first request of every new connection, like a TCP+TLS handshake
+    ms_per_token: float = 0.0       # Decode time per completion token, added to the latency of non-streamed answers
+    outage_after: Optional[float] = None  # Seconds after start when every request starts failing with a 503
+    outage_seconds: float = 0.0     # How long that outage lasts
+    max_parallel: Optional[int] = None  # Answers generated at once, like a GPU server's batch; the rest queue
+    batch_seconds: float = 0.0      # How long a Batch API job stays in_progress before its results are ready
+    logprob_noise: float = 0.0      # Gaussian noise (in nats) on the synthetic logprobs of scoring answers
+    rpm: Optional[int] = None       # Enforced requests/tokens per window, reported in x-ratelimit-* headers
+    tpm: Optional[int] = None
+    quota_window: float = 60.0      # Length of the sliding rpm/tpm windows; the headers still give per-minute limits
+    seed: int = 0
+    revoked_keys: Tuple[str, ...] = ()  # API keys answered with a 401
+
+
+class AnswerBook:
+    """(prompt language, input text) -> recorded model output, and input text -> Golden labels"""
+
+    def __init__(self):
+        self.outputs: Dict[Tuple[str, str], str] = {}
+        self.golden: Dict[str, str] = {}
+
+    def load_outputs(self, pattern: str):
+        """Recorded Raw_Model_Output from output CSVs (glob pattern); earlier files win for the same text.
+
+        As in the evaluation notebooks, files whose name ends in "en" are
+        English-prompt runs.
+        """
+        for path in sorted(glob.glob(pattern)):
+            df = pd.read_csv(path)
+            if not {"Original_Input_Text", "Raw_Model_Output"} <= set(df.columns):
+                continue
+            language = "en" if os.path.splitext(os.path.basename(path))[0].endswith("en") else "zh"
+            for text, output in zip(df["Original_Input_Text"], df["Raw_Model_Output"]):
+                if isinstance(output, str):
+                    self.outputs.setdefault((language, str(text)), output)
+            print(f"Replaying {len(df)} answers from {path} ({language})")
+
+    def load_dataset(self, path: str):
+        df = pd.read_csv(path)
+        if "Golden" in df.columns:
+            self.golden.update({str(text): str(golden) for text, golden in zip(df["text"], df["Golden"])})
+
+    def labels(self, text: str, pack: PromptPack) -> List[str]:
+        """Golden labels of a text in the pack's vocabulary; [] if it has none or is unknown"""
+        golden = self.golden.get(text, "-")
+        digits = sorted({int(d) for d in golden if d.isdigit() and 1 <= int(d) <= len(pack.label_vocabulary)})
+        return [pack.label_vocabulary[d - 1] for d in digits]
+
+
+def detect_pack(messages: List[Dict[str, str]]) -> PromptPack:
+    """Prompt pack whose system prompt the request starts with (zh if none matches)"""
+    system = messages[0].get("content") or "" if messages else ""
+    for pack in PROMPT_PACKS.values():
+        if system.startswith(pack.system_prompt):
+            return pack
+    return PROMPT_PACKS["zh"]
+
+
+def output_line_prefix(pack: PromptPack) -> str:
+    """Lead-in of the few-shot examples' final answer line, e.g. '输出：' or 'Output: '"""
+    last_line = pack.few_shot_examples[-1]["content"].splitlines()[-1]
+    return re.match(r".*?[:：]\s*", last_line).group(0)
+
+
+def answer_labels(labels: List[str], pack: PromptPack) -> str:
+    """Labels as the models write them in an answer (e.g. "Recognition Logic 5"), the empty label if there are none"""
+    if not labels:
+        return pack.empty_labels[0]
+    return ", ".join(pack.answer_label.format(n=pack.label_vocabulary.index(label) + 1) for label in labels)
+
+
+def synthesize_answer(labels: List[str], pack: PromptPack) -> str:
+    """A well-formed four-step answer ending in the given labels.
+
+    The reasoning steps are borrowed from the last few-shot example; only
+    the final output line matters to the parser.
+    """
+    steps = pack.few_shot_examples[-1]["content"].splitlines()[:-1]
+    return "\n".join(steps + [output_line_prefix(pack) + answer_labels(labels, pack)])
+
+
+class MockLLM:
+    """Builds chat-completion responses and decides which requests fail"""
+
+    def __init__(self, config: MockConfig, book: AnswerBook):
+        self.config = config
+        self.book = book
+        self.lock = threading.Lock()
+        self.request_counts = defaultdict(int)
+        self.seen_prefixes = set()
+        # Quota windows per API key, as every key (organization) has its own limits
+        self.request_times = defaultdict(deque)
+        self.token_times = defaultdict(deque)
+        self.stats = defaultdict(int)
+        self.started = time.monotonic()
+        self.slots = threading.Semaphore(config.max_parallel) if config.max_parallel else None
+        # Batch API stand-in: uploaded files and batches by id
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.file_contents: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.batch_inputs: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self.batch_lock = threading.Lock()
+
+    def generate(self, seconds: float):
+        """Wait out the generation time, in one of the `max_parallel` slots if the server has a limit"""
+        if self.slots is None:
+            time.sleep(seconds)
+            return
+        with self.slots:
+            time.sleep(seconds)
+
+    def in_outage(self) -> bool:
+        if self.config.outage_after is None:
+            return False
+        elapsed = time.monotonic() - self.started - self.config.outage_after
+        return 0 <= elapsed < self.config.outage_seconds
+
+    def rng(self, messages: List[Dict[str, str]]) -> random.Random:
+        """Per-request randomness: seed + request content + how often this exact request was made"""
+        digest = hashlib.sha256(json.dumps(messages, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+        with self.lock:
+            self.request_counts[digest] += 1
+            attempt = self.request_counts[digest]
+        return random.Random(f"{self.config.seed}:{digest}:{attempt}")
+
+    def latency(self, rng: random.Random) -> float:
+        median = self.config.latency_ms / 1000
+        if self.config.latency_sigma <= 0:
+            return median
+        return median * math.exp(rng.gauss(0, self.config.latency_sigma))
+
+    def check_quota(self, tokens: int, api_key: str = "") -> Tuple[Optional[float], Dict[str, str]]:
+        """Sliding rpm/tpm windows; returns (retry after seconds if over quota, x-ratelimit headers).
+
+        Each API key has its own windows, like separate organizations. A
+        window shorter than a minute (`quota_window`) is reported as the
+        same rate per minute, so tests can hit a quota in seconds.
+        """
+        now = time.monotonic()
+        window_seconds = self.config.quota_window
+        per_minute = 60 / window_seconds
+        with self.lock:
+            request_times, token_times = self.request_times[api_key], self.token_times[api_key]
+            for window in (request_times, token_times):
+                while window and now - window[0][0] >= window_seconds:
+                    window.popleft()
+            used_tokens = sum(amount for _, amount in token_times)
+            retry_after = None
+            if self.config.rpm is not None and len(request_times) >= self.config.rpm:
+                retry_after = window_seconds - (now - request_times[0][0])
+            elif self.config.tpm is not None and used_tokens + tokens > self.config.tpm and token_times:
+                retry_after = window_seconds - (now - token_times[0][0])
+            if retry_after is None:
+                request_times.append((now, 1))
+                token_times.append((now, tokens))
+                used_tokens += tokens
+            headers = {}
+            if self.config.rpm is not None:
+                headers.update({
+                    "x-ratelimit-limit-requests": str(round(self.config.rpm * per_minute)),
+                    "x-ratelimit-remaining-requests": str(max(self.config.rpm - len(request_times), 0)),
+                    "x-ratelimit-reset-requests": f"{int((window_seconds - (now - request_times[0][0])) * 1000)}ms"
+                    if request_times else "0ms",
+                })
+            if self.config.tpm is not None:
+                headers.update({
+                    "x-ratelimit-limit-tokens": str(round(self.config.tpm * per_minute)),
+                    "x-ratelimit-remaining-tokens": str(max(self.config.tpm - used_tokens, 0)),
+                    "x-ratelimit-reset-tokens": f"{int((window_seconds - (now - token_times[0][0])) * 1000)}ms"
+                    if token_times else "0ms",
+                })
+        return retry_after, headers
+
+    def answer(self, body: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, float]]]:
+        """Answer text for a request, plus first-token top logprobs for one-token scoring questions"""
+        messages = body["messages"]
+        pack = detect_pack(messages)
+        last = messages[-1].get("content") or ""
+        # Follow-up and scoring turns come after the original prompt, whose text is the earlier user turn
+        user_turns = [m.get("content") or "" for m in messages if m.get("role") == "user"]
+        text = user_turns[-2] if len(user_turns) > 1 and last in self._extra_turns(pack) else last
+        labels = self.book.labels(text, pack)
+
+        if last == pack.final_labels_prompt:
+            return output_line_prefix(pack) + answer_labels(labels, pack), None
+        if last == pack.score_choice_prompt:
+            best = str(pack.label_vocabulary.index(labels[0]) + 1) if labels else "0"
+            return best, self._logprobs(best, [str(i) for i in range(len(pack.label_vocabulary) + 1)])
+        for label in pack.label_vocabulary:
+            if last == pack.score_binary_prompt.format(label=label):
+                yes, no = pack.score_yes_no
+                token = yes if label in labels else no
+                return token, self._logprobs(token, [yes, no])
+        if pack.packed_instruction in (messages[0].get("content") or ""):
+            return self._packed_answer(last, pack), None
+        if body.get("response_format") or body.get("guided_json"):
+            return json.dumps({"labels": labels}, ensure_ascii=False), None
+        if (pack.language, text) in self.book.outputs:
+            return self.book.outputs[(pack.language, text)], None
+        return synthesize_answer(labels, pack), None
+
+    @staticmethod
+    def _extra_turns(pack: PromptPack) -> set:
+        binary = {pack.score_binary_prompt.format(label=label) for label in pack.label_vocabulary}
+        return {pack.final_labels_prompt, pack.score_choice_prompt} | binary
+
+    @staticmethod
+    def _logprobs(token: str, alternatives: List[str]) -> Dict[str, float]:
+        """Most of the mass on `token`, the rest spread over the other alternatives"""
+        rest = 0.1 / max(len(alternatives) - 1, 1)
+        return {alt: math.log(0.9 if alt == token else rest) for alt in alternatives}
+
+    def _packed_answer(self, user: str, pack: PromptPack) -> str:
+        header = re.escape(pack.packed_text_header).replace(r"\{n\}", r"(\d+)")
+        parts = re.split(rf"^{header}\n", user, flags=re.MULTILINE)
+        texts = [part.rstrip("\n") for part in parts[2::2]]
+        marker = pack.packed_results_marker.replace("[:：]", "：" if pack.language == "zh" else ":")
+        lines = [f"[{n}] {answer_labels(self.book.labels(text, pack), pack)}"
+                 for n, text in enumerate(texts, start=1)]
+        return "(mock)\n\n" + marker + "\n" + "\n".join(lines)
+
+    def reply(self, body: Dict[str, Any], rng: random.Random) -> Tuple[str, str, Optional[Dict[str, float]],
+                                                                        Dict[str, Any]]:
+        """Content, finish reason, first-token top logprobs and usage of a successful answer to `body`"""
+        content, top_logprobs = self.answer(body)
+        if top_logprobs is not None and self.config.logprob_noise:
+            # A less certain model: the answer is whichever alternative comes out on top
+            noise = self.config.logprob_noise
+            noisy = {token: logprob + rng.gauss(0, noise) for token, logprob in top_logprobs.items()}
+            total = math.log(sum(math.exp(logprob) for logprob in noisy.values()))
+            top_logprobs = {token: logprob - total for token, logprob in noisy.items()}
+            content = max(top_logprobs, key=top_logprobs.get)
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens")
+        if top_logprobs is None and rng.random() < self.config.rate_truncate:
+            content = content[:max(1, int(len(content) * rng.uniform(0.3, 0.9)))]
+            finish_reason = "length"
+            self.stats["truncated"] += 1
+        elif max_tokens and estimate_tokens([{"content": content}]) - 4 > max_tokens:
+            # Roughly honour max_tokens, as the follow-up turn relies on it
+            content = content[:max(1, max_tokens)]
+            finish_reason = "length"
+        usage = self.usage(body.get("messages") or [], content, int(body.get("n") or 1))
+        return content, finish_reason, top_logprobs, usage
+
+    def completion(self, body: Dict[str, Any], content: str, finish_reason: str,
+                   top_logprobs: Optional[Dict[str, float]], usage: Dict[str, Any]) -> Dict[str, Any]:
+        """A chat.completion object with `n` identical choices"""
+        choices = []
+        for index in range(int(body.get("n") or 1)):
+            choice = {"index": index, "message": {"role": "assistant", "content": content},
+                      "finish_reason": finish_reason, "logprobs": None}
+            if top_logprobs is not None and body.get("logprobs"):
+                alternatives = sorted(top_logprobs.items(), key=lambda item: -item[1])
+                alternatives = alternatives[:int(body.get("top_logprobs") or 1)]
+                choice["logprobs"] = {"content": [{
+                    "token": content, "logprob": top_logprobs[content], "bytes": None,
+                    "top_logprobs": [{"token": token, "logprob": logprob, "bytes": None}
+                                     for token, logprob in alternatives],
+                }]}
+            choices.append(choice)
+        return {"id": f"chatcmpl-mock-{self.stats['requests']}", "object": "chat.completion",
+                "created": int(time.time()), "model": body.get("model"), "choices": choices, "usage": usage}
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        """Store an uploaded (or generated) file and return its file object"""
+        with self.lock:
+            file_id = f"file-mock{len(self.files) + 1}"
+            self.files[file_id] = {"id": file_id, "object": "file", "bytes": len(content),
+                                   "created_at": int(time.time()), "filename": filename, "purpose": purpose,
+                                   "status": "processed"}
+            self.file_contents[file_id] = content
+        return self.files[file_id]
+
+    def create_batch(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Start a batch over an uploaded JSONL file; None if the file is unknown"""
+        content = self.file_contents.get(body.get("input_file_id"))
+        if content is None:
+            return None
+        lines = [json.loads(line) for line in content.decode('utf-8').splitlines() if line.strip()]
+        with self.batch_lock:
+            batch_id = f"batch_mock{len(self.batches) + 1}"
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"), "errors": None,
+                "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window"),
+                "status": "in_progress", "output_file_id": None, "error_file_id": None,
+                "created_at": int(time.time()), "completed_at": None, "metadata": body.get("metadata"),
+                "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            }
+            self.batch_inputs[batch_id] = (time.monotonic(), lines)
+            self.stats["batches"] += 1
+        return self.batches[batch_id]
+
+    def batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """The batch object; its requests are answered once it is `batch_seconds` old.
+
+        Lines fail with a 500 in the error file at `rate_5xx`; other fault
+        injection and latency only apply to online requests.
+        """
+        with self.batch_lock:
+            batch = self.batches.get(batch_id)
+            if batch is None or batch["status"] != "in_progress":
+                return batch
+            created, lines = self.batch_inputs[batch_id]
+            if time.monotonic() - created < self.config.batch_seconds:
+                return batch
+            outputs, errors = [], []
+            for number, line in enumerate(lines, start=1):
+                body = line["body"]
+                rng = self.rng(body.get("messages") or [])
+                self.stats["batch_requests"] += 1
+                if rng.random() < self.config.rate_5xx:
+                    errors.append({"id": f"{batch_id}_req{number}", "custom_id": line["custom_id"], "error": None,
+                                   "response": {"status_code": 500, "request_id": f"{batch_id}_req{number}",
+                                                "body": {"error": {"message": "The server had an error while "
+                                                                              "processing your request.",
+                                                                   "type": "server_error"}}}})
+                    continue
+                completion = self.completion(body, *self.reply(body, rng))
+                outputs.append({"id": f"{batch_id}_req{number}", "custom_id": line["custom_id"], "error": None,
+                                "response": {"status_code": 200, "request_id": f"{batch_id}_req{number}",
+                                             "body": completion}})
+
+            def jsonl(records: List[Dict[str, Any]]) -> Optional[str]:
+                if not records:
+                    return None
+                data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode('utf-8')
+                return self.add_file(data, f"{batch_id}_output.jsonl", "batch_output")["id"]
+
+            batch.update(status="completed", output_file_id=jsonl(outputs), error_file_id=jsonl(errors),
+                         completed_at=int(time.time()),
+                         request_counts={"total": len(lines), "completed": len(outputs), "failed": len(errors)})
+            return batch
+
+    def usage(self, messages: List[Dict[str, str]], completion: str, choices: int = 1) -> Dict[str, Any]:
+        """Estimated usage; the static prefix counts as cached once it has been seen"""
+        prompt_tokens = estimate_tokens(messages)
+        prefix_tokens = estimate_tokens(messages[:-1])
+        fingerprint = prefix_fingerprint(messages)
+        with self.lock:
+            cached = prefix_tokens // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS if fingerprint in self.seen_prefixes else 0
+            self.seen_prefixes.add(fingerprint)
+        completion_tokens = estimate_tokens([{"content": completion}]) * choices
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+
+def parse_multipart(content_type: str, data: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """Form field name -> (file name, content) of a multipart/form-data body, as sent by files.create"""
+    message = BytesParser(policy=email_policy.HTTP).parsebytes(
+        f"content-type: {content_type}\r\n\r\n".encode('utf-8') + data)
+    if not message.is_multipart():
+        return {}
+    return {part.get_param("name", header="content-disposition"): (part.get_filename(), part.get_payload(decode=True))
+            for part in message.iter_parts()}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    llm: MockLLM = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # New TCP connections, to see how well clients reuse them
+        self.llm.stats["connections"] += 1
+        if self.llm.config.handshake_ms:
+            time.sleep(self.llm.config.handshake_ms / 1000)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request (timeout or interrupted run)
+            self.llm.stats["client_closed"] += 1
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        file_content = re.search(r"/files/([^/]+)/content$", path)
+        batch = re.search(r"/batches/([^/]+)$", path)
+        if path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        elif path.endswith("/stats"):
+            self._send_json(200, dict(self.llm.stats))
+        elif file_content and file_content.group(1) in self.llm.file_contents:
+            data = self.llm.file_contents[file_content.group(1)]
+            self.send_response(200)
+            self.send_header("content-type", "application/octet-stream")
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif batch and self.llm.batch(batch.group(1)) is not None:
+            self._send_json(200, self.llm.batch(batch.group(1)))
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers.get("content-length", 0)))
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/files"):
+            fields = parse_multipart(self.headers.get("content-type", ""), data)
+            filename, content = fields.get("file", (None, b""))
+            purpose = fields.get("purpose", (None, b"batch"))[1].decode('utf-8')
+            self._send_json(200, self.llm.add_file(content, filename or "upload.jsonl", purpose))
+            return
+        body = json.loads(data or b"{}")
+        if path.endswith("/batches"):
+            batch = self.llm.create_batch(body)
+            if batch is None:
+                self._send_json(400, {"error": {"message": f"No such File object: {body.get('input_file_id')}",
+                                                "type": "invalid_request_error"}})
+            else:
+                self._send_json(200, batch)
+            return
+        if not path.endswith("/chat/completions"):
+            self._not_found()
+            return
+        llm, config = self.llm, self.llm.config
+        messages = body.get("messages") or []
+        rng = llm.rng(messages)
+        llm.stats["requests"] += 1
+
+        api_key = self.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if api_key in config.revoked_keys:
+            llm.stats["401"] += 1
+            self._send_json(401, {"error": {"message": "Incorrect API key provided.", "type": "invalid_request_error",
+                                            "code": "invalid_api_key"}})
+            return
+        llm.stats[f"key ...{api_key[-4:]}"] += 1
+        if llm.in_outage():
+            llm.stats["outage"] += 1
+            self._send_json(503, {"error": {"message": "The engine is currently overloaded, please try again later.",
+                                            "type": "server_error"}})
+            return
+        retry_after, headers = llm.check_quota(estimate_tokens(messages) + int(body.get("max_tokens") or 0), api_key)
+        if retry_after is None and rng.random() < config.rate_429:
+            retry_after = config.retry_after_ms / 1000
+        if retry_after is not None:
+            llm.stats["429"] += 1
+            ms = max(int(retry_after * 1000), 1)
+            message = (f"Rate limit reached for {body.get('model')} on requests per min. "
+                       f"Please try again in {ms}ms.")
+            self._send_json(429, {"error": {"message": message, "type": "requests", "code": "rate_limit_exceeded"}},
+                            {**headers, "retry-after-ms": str(ms)})
+            return
+        if rng.random() < config.rate_hang:
+            llm.stats["hung"] += 1
+            time.sleep(config.hang_seconds)
+            self.close_connection = True
+            return
+        if rng.random() < config.rate_5xx:
+            llm.stats["5xx"] += 1
+            time.sleep(self.llm.latency(rng) / 4)
+            status = rng.choice([500, 503])
+            self._send_json(status, {"error": {"message": "The server had an error while processing your request.",
+                                               "type": "server_error"}}, headers)
+            return
+
+        content, finish_reason, top_logprobs, usage = llm.reply(body, rng)
+        latency = llm.latency(rng) + usage["completion_tokens"] * config.ms_per_token / 1000
+        llm.stats["ok"] += 1
+
+        if body.get("stream"):
+            self._stream(body, content, finish_reason, usage, latency, headers)
+            return
+        llm.generate(latency)
+        self._send_json(200, llm.completion(body, content, finish_reason, top_logprobs, usage), headers)
+
+    def _stream(self, body: Dict[str, Any], content: str, finish_reason: str, usage: Dict[str, Any],
+                latency: float, headers: Dict[str, str]):
+        """Server-sent events: content chunks, a finish chunk, then the usage chunk if asked for"""
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": f"chatcmpl-mock-{self.llm.stats['requests']}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model")}
+
+        def send(payload: Dict[str, Any]):
+            self.wfile.write(f"data: {json.dumps({**base, **payload}, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            self.llm.generate(latency)
+            step = max(self.llm.config.chunk_chars, 1)
+            for start in range(0, len(content), step):
+                send({"choices": [{"index": 0, "delta": {"content": content[start:start + step]},
+                                   "finish_reason": None}]})
+                time.sleep(self.llm.config.chunk_delay_ms / 1000)
+            send({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                send({"choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early (--stream stops at the label line)
+            self.llm.stats["stream_closed_early"] += 1
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    # socketserver's default backlog of 5 drops bursts of new connections, which real APIs do not
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class MockServer:
+    """Runs the mock on a background thread, e.g. inside a benchmark script"""
+
+    def __init__(self, config: Optional[MockConfig] = None, book: Optional[AnswerBook] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (MockHandler,), {"llm": MockLLM(config or MockConfig(), book or AnswerBook())})
+        self.llm = handler.llm
+        self.httpd = MockHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="llm_runner.mock_server",
+                                     description="Local OpenAI-compatible stand-in for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--replay", nargs="*", default=[],
+                        help="Output CSVs (glob patterns) whose Raw_Model_Output is replayed by input text")
+    parser.add_argument("--dataset", default="../0_data_collection/dataset.csv",
+                        help="Dataset with Golden labels, for synthesized answers, JSON, packed and logprob requests")
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms)
+    parser.add_argument("--latency-sigma", type=float, default=MockConfig.latency_sigma)
+    parser.add_argument("--chunk-delay-ms", type=float, default=MockConfig.chunk_delay_ms)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after-ms", type=int, default=MockConfig.retry_after_ms)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-truncate", type=float, default=0.0)
+    parser.add_argument("--rate-hang", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=MockConfig.hang_seconds)
+    parser.add_argument("--handshake-ms", type=float, default=0.0)
+    parser.add_argument("--max-parallel", type=int, default=None,
+                        help="Answers generated at once; further requests queue, like on a saturated GPU server")
+    parser.add_argument("--outage-after", type=float, default=None,
+                        help="Seconds after start when every request starts failing with a 503")
+    parser.add_argument("--outage-seconds", type=float, default=0.0, help="Length of that outage")
+    parser.add_argument("--ms-per-token", type=float, default=0.0,
+                        help="Decode time per completion token, so long answers take longer")
+    parser.add_argument("--batch-seconds", type=float, default=0.0,
+                        help="How long a /v1/batches job stays in_progress before its results can be fetched")
+    parser.add_argument("--logprob-noise", type=float, default=0.0,
+                        help="Gaussian noise (nats) on the logprobs of scoring answers, for calibration tests")
+    parser.add_argument("--rpm", type=int, default=None)
+    parser.add_argument("--tpm", type=int, default=None)
+    parser.add_argument("--quota-window", type=float, default=MockConfig.quota_window,
+                        help="Seconds over which --rpm/--tpm are counted")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--revoked-keys", nargs="*", default=[], help="API keys to reject with a 401")
+    args = parser.parse_args(argv)
+
+    book = AnswerBook()
+    book.load_dataset(args.dataset)
+    for pattern in args.replay:
+        book.load_outputs(pattern)
+    config = MockConfig(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                        chunk_delay_ms=args.chunk_delay_ms, rate_429=args.rate_429,
+                        retry_after_ms=args.retry_after_ms, rate_5xx=args.rate_5xx,
+                        rate_truncate=args.rate_truncate, rate_hang=args.rate_hang,
+                        hang_seconds=args.hang_seconds, handshake_ms=args.handshake_ms,
+                        ms_per_token=args.ms_per_token, outage_after=args.outage_after,
+                        outage_seconds=args.outage_seconds, max_parallel=args.max_parallel,
+                        batch_seconds=args.batch_seconds, logprob_noise=args.logprob_noise, rpm=args.rpm,
+                        tpm=args.tpm, quota_window=args.quota_window, seed=args.seed,
+                        revoked_keys=tuple(args.revoked_keys))
+    server = MockServer(config, book, args.host, args.port)
+    print(f"Mock server on {server.base_url} ({len(book.outputs)} recorded answers, {len(book.golden)} golden labels)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Stats: {json.dumps(dict(server.llm.stats))}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Packed vs. one-text-per-request runs: token savings and per-label F1 against the Golden annotations
+
+    python -m llm_runner.pack_report --providers gpt41 --modes zero_shot few_shot --pack-size 4
+"""
+
+import os
+import json
+import argparse
+from typing import List, Dict, Any, Optional, Set, Iterator
+
+import pandas as pd
+
+from .prompts import MODES, PROMPT_PACKS, get_prompt_pack, find_labels
+from .providers import PROVIDERS
+from .telemetry import telemetry_path, summarize
+from .runner import Job, DATASET_PATH, OUTPUT_DIR
+
+
+def golden_labels(value) -> Set[int]:
+    """Golden column as RL numbers, e.g. "147" -> {1, 4, 7}; "-" means none"""
+    if pd.isna(value) or str(value).strip() == "-":
+        return set()
+    return set(map(int, str(int(float(value)))))
+
+
+def predicted_labels(value, language: str) -> Set[int]:
+    """RL numbers named in an RL_Types value"""
+    if pd.isna(value):
+        return set()
+    vocabulary = get_prompt_pack(language).label_vocabulary
+    return {vocabulary.index(label) + 1 for label in find_labels(value, language)}
+
+
+def label_f1(gold: List[Set[int]], predicted: List[Set[int]]) -> Dict[str, float]:
+    """Per-label, micro and macro F1 over the rows that have golden labels (as in the evaluation notebooks)"""
+    pairs = [(g, p) for g, p in zip(gold, predicted) if g]
+    scores = {}
+    totals = [0, 0, 0]
+    for label in range(1, 8):
+        tp = sum(1 for g, p in pairs if label in g and label in p)
+        fp = sum(1 for g, p in pairs if label not in g and label in p)
+        fn = sum(1 for g, p in pairs if label in g and label not in p)
+        totals = [totals[0] + tp, totals[1] + fp, totals[2] + fn]
+        scores[f"RL{label}"] = 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    tp, fp, fn = totals
+    scores["micro"] = 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    scores["macro"] = sum(scores[f"RL{label}"] for label in range(1, 8)) / 7
+    return scores
+
+
+def iter_telemetry(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def job_stats(job: Job, golden: List[Set[int]], output_dir: str = OUTPUT_DIR) -> Optional[Dict[str, Any]]:
+    """Tokens and cost per text from the job's telemetry, and F1 of its output CSV; None if it has not been run"""
+    output_filename = job.output_filename(output_dir)
+    if not os.path.exists(output_filename):
+        return None
+    df = pd.read_csv(output_filename)
+    # Telemetry accumulates over every run, including re-runs of failed rows, so this is the full cost per text
+    totals = summarize(iter_telemetry(telemetry_path(output_filename)))
+    rows = len(df)
+    stats = {
+        "rows": rows,
+        "tokens_per_text": (totals["prompt_tokens"] + totals["completion_tokens"]) / rows if rows else 0.0,
+        "prompt_tokens_per_text": totals["prompt_tokens"] / rows if rows else 0.0,
+        "cost_per_text": totals["cost"] / rows if rows else 0.0,
+        "f1": label_f1(golden, [predicted_labels(value, job.language) for value in df["RL_Types"]]),
+    }
+    if "Pack_Position" in df.columns:
+        stats["fallback_rate"] = df["Pack_Position"].isna().mean()
+    return stats
+
+
+def print_comparison(baseline: Job, packed: Job, golden: List[Set[int]], output_dir: str = OUTPUT_DIR):
+    single = job_stats(baseline, golden, output_dir)
+    multi = job_stats(packed, golden, output_dir)
+    print(f"\n{packed.label} vs {baseline.label}")
+    if single is None or multi is None:
+        missing = baseline if single is None else packed
+        print(f"  No results for {missing.label} ({missing.output_filename(output_dir)})")
+        return
+    if not single["tokens_per_text"]:
+        print(f"  No telemetry for {baseline.label}; re-run it with the runner to measure its tokens")
+    saving = 1 - multi["tokens_per_text"] / single["tokens_per_text"] if single["tokens_per_text"] else 0.0
+    print(f"  Tokens per text: {single['tokens_per_text']:.0f} -> {multi['tokens_per_text']:.0f} "
+          f"({saving:.1%} saved; prompt {single['prompt_tokens_per_text']:.0f} -> "
+          f"{multi['prompt_tokens_per_text']:.0f})")
+    print(f"  Cost per text: ${single['cost_per_text']:.5f} -> ${multi['cost_per_text']:.5f}")
+    print(f"  Fell back to single requests: {multi.get('fallback_rate', 0.0):.1%} of texts")
+    print("  F1: " + ", ".join(f"{name} {single['f1'][name]:.3f} -> {multi['f1'][name]:.3f} "
+                              f"({multi['f1'][name] - single['f1'][name]:+.3f})" for name in single["f1"]))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="llm_runner.pack_report",
+                                     description="Compare packed runs with their one-text-per-request runs.")
+    parser.add_argument("--providers", nargs="+", choices=sorted(PROVIDERS), default=["gpt41"])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--languages", nargs="+", choices=sorted(PROMPT_PACKS), default=["zh"])
+    parser.add_argument("--pack-size", type=int, required=True, help="Pack size of the runs to compare")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Dataset CSV with the Golden column")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
+
+    golden = [golden_labels(value) for value in pd.read_csv(args.dataset)["Golden"]]
+    for provider in args.providers:
+        for language in args.languages:
+            for mode in args.modes:
+                print_comparison(Job(provider, mode, language), Job(provider, mode, language, pack_size=args.pack_size),
+                                 golden, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
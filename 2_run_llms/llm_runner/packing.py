@@ -0,0 +1,53 @@
+"""
+Multi-item requests: several numbered texts per prompt, so the long system prompt is paid once per pack
+"""
+
+import re
+from typing import List, Dict, Optional
+
+from .prompts import get_prompt_pack, find_labels
+
+# One answer line of the results section, e.g. "[3] 认同逻辑1, 认同逻辑4" or "[3] Recognition Logic 1"
+RESULT_LINE = re.compile(r"^\s*\[(\d+)\]\s*(.*?)\s*$", re.MULTILINE)
+
+
+def generate_packed_prompt(texts: List[str], mode: str = "zero_shot", language: str = "zh") -> List[Dict[str, str]]:
+    """Prompt asking for the labels of every text in `texts` at once.
+
+    The packing instruction goes into the system prompt, so all packed
+    requests of a job share one static prefix; only the numbered texts in
+    the user turn change.
+    """
+    pack = get_prompt_pack(language)
+    messages = [{"role": "system", "content": f"{pack.system_prompt}\n\n{pack.packed_instruction}"}]
+    if mode == "few_shot":
+        messages.extend(pack.few_shot_examples)
+    numbered = [f"{pack.packed_text_header.format(n=n)}\n{text}" for n, text in enumerate(texts, start=1)]
+    messages.append({"role": "user", "content": "\n\n".join(numbered)})
+    return messages
+
+
+def parse_packed_output(output_text: str, count: int, language: str = "zh") -> List[Optional[str]]:
+    """RL_Types for each of the `count` packed texts, None where the answer has no usable line.
+
+    Only the part after the last results marker is read (the whole answer
+    if there is none). The first line for each number wins; a line must
+    name vocabulary labels or say that none applies, anything else counts
+    as missing so the item can be re-run on its own.
+    """
+    pack = get_prompt_pack(language)
+    markers = list(re.finditer(pack.packed_results_marker, output_text))
+    section = output_text[markers[-1].end():] if markers else output_text
+
+    labels: List[Optional[str]] = [None] * count
+    for match in RESULT_LINE.finditer(section):
+        n = int(match.group(1))
+        if not 1 <= n <= count or labels[n - 1] is not None:
+            continue
+        answer = match.group(2).strip("`*").strip()
+        found = find_labels(answer, language)
+        if found:
+            labels[n - 1] = ", ".join(found)
+        elif not answer or answer in pack.empty_labels:
+            labels[n - 1] = "N/A"
+    return labels
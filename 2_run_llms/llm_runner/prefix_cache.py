@@ -0,0 +1,71 @@
+"""
+Provider-side prompt-prefix caching: prefix checks and cache-hit reporting
+"""
+
+import json
+import hashlib
+from typing import List, Dict, Any, Optional
+
+
+def prefix_fingerprint(messages: List[Dict[str, str]]) -> str:
+    """Hash of everything before the final user turn, i.e. the part providers can cache"""
+    canonical = json.dumps(messages[:-1], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def cached_prompt_tokens(usage: Optional[Dict[str, Any]]) -> int:
+    """Prompt tokens served from the provider's prefix cache.
+
+    OpenAI reports usage.prompt_tokens_details.cached_tokens, DeepSeek
+    reports usage.prompt_cache_hit_tokens; vLLM follows OpenAI when
+    --enable-prefix-caching and --enable-prompt-tokens-details are set.
+    """
+    if not usage:
+        return 0
+    details = usage.get("prompt_tokens_details") or {}
+    if details.get("cached_tokens"):
+        return int(details["cached_tokens"])
+    return int(usage.get("prompt_cache_hit_tokens") or 0)
+
+
+class PrefixCacheReport:
+    """Per-job tally of prompt tokens, prefix-cache hits and the money they saved"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.fingerprint = None
+        self.prefix_mismatches = 0
+
+    def check_prefix(self, messages: List[Dict[str, str]]):
+        """Every request in a job must share a byte-identical static prefix, or caching silently stops working"""
+        fingerprint = prefix_fingerprint(messages)
+        if self.fingerprint is None:
+            self.fingerprint = fingerprint
+        elif fingerprint != self.fingerprint:
+            self.prefix_mismatches += 1
+            if self.prefix_mismatches == 1:
+                print(f"[{self.label}] Warning: static prompt prefix changed between requests; "
+                      f"provider prefix caching will miss")
+
+    def record(self, usage: Optional[Dict[str, Any]]):
+        if not usage:
+            return
+        self.requests += 1
+        self.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+        self.cached_tokens += cached_prompt_tokens(usage)
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def saved_cost(self, input_price: float, cached_input_price: float) -> float:
+        """USD saved versus paying the full input price (prices are per 1M tokens)"""
+        return self.cached_tokens * (input_price - cached_input_price) / 1_000_000
+
+    def summary(self, input_price: float, cached_input_price: float) -> str:
+        return (f"prefix cache {self.cached_tokens}/{self.prompt_tokens} prompt tokens "
+                f"({self.hit_ratio:.1%}) over {self.requests} API calls, "
+                f"saved ${self.saved_cost(input_price, cached_input_price):.4f}")
@@ -0,0 +1,243 @@
+"""
+Language/prompt packs shared by every provider backend
+"""
+
+import re
+import json
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from . import prompts_en, prompts_zh
+
+MODES = ["zero_shot", "few_shot", "no_cot"]
+
+
+@dataclass(frozen=True)
+class PromptPack:
+    """System prompt, few-shot examples and output markers for one prompt language"""
+    language: str
+    system_prompt: str
+    few_shot_examples: List[Dict[str, str]]
+    primary_output_marker: str
+    secondary_output_marker: str
+    simple_output_marker: str
+    empty_labels: tuple
+    label_vocabulary: tuple
+    answer_label: str
+    answer_label_pattern: str
+    structured_output_instruction: str
+    final_labels_prompt: str
+    score_choice_prompt: str
+    score_binary_prompt: str
+    score_yes_no: tuple
+    packed_instruction: str
+    packed_text_header: str
+    packed_results_marker: str
+    # Appended to output file names, e.g. gpt41_few_shot_en.csv
+    output_suffix: str
+
+
+PROMPT_PACKS = {
+    "zh": PromptPack(
+        language="zh",
+        system_prompt=prompts_zh.SYSTEM_PROMPT,
+        few_shot_examples=prompts_zh.FEW_SHOT_EXAMPLES,
+        primary_output_marker=prompts_zh.PRIMARY_OUTPUT_MARKER,
+        secondary_output_marker=prompts_zh.SECONDARY_OUTPUT_MARKER,
+        simple_output_marker=prompts_zh.SIMPLE_OUTPUT_MARKER,
+        empty_labels=prompts_zh.EMPTY_LABELS,
+        label_vocabulary=prompts_zh.LABEL_VOCABULARY,
+        answer_label=prompts_zh.ANSWER_LABEL,
+        answer_label_pattern=prompts_zh.ANSWER_LABEL_PATTERN,
+        structured_output_instruction=prompts_zh.STRUCTURED_OUTPUT_INSTRUCTION,
+        final_labels_prompt=prompts_zh.FINAL_LABELS_PROMPT,
+        score_choice_prompt=prompts_zh.SCORE_CHOICE_PROMPT,
+        score_binary_prompt=prompts_zh.SCORE_BINARY_PROMPT,
+        score_yes_no=prompts_zh.SCORE_YES_NO,
+        packed_instruction=prompts_zh.PACKED_INSTRUCTION,
+        packed_text_header=prompts_zh.PACKED_TEXT_HEADER,
+        packed_results_marker=prompts_zh.PACKED_RESULTS_MARKER,
+        output_suffix="",
+    ),
+    "en": PromptPack(
+        language="en",
+        system_prompt=prompts_en.SYSTEM_PROMPT,
+        few_shot_examples=prompts_en.FEW_SHOT_EXAMPLES,
+        primary_output_marker=prompts_en.PRIMARY_OUTPUT_MARKER,
+        secondary_output_marker=prompts_en.SECONDARY_OUTPUT_MARKER,
+        simple_output_marker=prompts_en.SIMPLE_OUTPUT_MARKER,
+        empty_labels=prompts_en.EMPTY_LABELS,
+        label_vocabulary=prompts_en.LABEL_VOCABULARY,
+        answer_label=prompts_en.ANSWER_LABEL,
+        answer_label_pattern=prompts_en.ANSWER_LABEL_PATTERN,
+        structured_output_instruction=prompts_en.STRUCTURED_OUTPUT_INSTRUCTION,
+        final_labels_prompt=prompts_en.FINAL_LABELS_PROMPT,
+        score_choice_prompt=prompts_en.SCORE_CHOICE_PROMPT,
+        score_binary_prompt=prompts_en.SCORE_BINARY_PROMPT,
+        score_yes_no=prompts_en.SCORE_YES_NO,
+        packed_instruction=prompts_en.PACKED_INSTRUCTION,
+        packed_text_header=prompts_en.PACKED_TEXT_HEADER,
+        packed_results_marker=prompts_en.PACKED_RESULTS_MARKER,
+        output_suffix="_en",
+    ),
+}
+
+
+def get_prompt_pack(language: str) -> PromptPack:
+    """Look up the prompt pack for a language code (zh, en)"""
+    if language not in PROMPT_PACKS:
+        raise ValueError(f"Unknown language '{language}', expected one of {sorted(PROMPT_PACKS)}")
+    return PROMPT_PACKS[language]
+
+
+def generate_prompt(input_text: str, mode: str = "zero_shot", language: str = "zh",
+                    structured: bool = False) -> List[Dict[str, str]]:
+    """Generate prompt based on the mode (zero_shot, few_shot, no_cot)"""
+    pack = get_prompt_pack(language)
+
+    system_prompt = pack.system_prompt
+    if structured:
+        # Kept in the system prompt so the static prefix stays identical across requests
+        system_prompt = f"{system_prompt}\n\n{pack.structured_output_instruction}"
+    messages = [{"role": "system", "content": system_prompt}]
+
+    if mode == "few_shot":
+        # Add few-shot examples
+        messages.extend(pack.few_shot_examples)
+
+    # Add the current input
+    messages.append({"role": "user", "content": input_text})
+
+    return messages
+
+
+def parse_output(output_text: str, language: str = "zh") -> str:
+    """Parse the model output to extract the RL types"""
+    pack = get_prompt_pack(language)
+
+    primary_output_marker_pattern = re.compile(pack.primary_output_marker, re.DOTALL)
+    secondary_output_marker_pattern = re.compile(pack.secondary_output_marker, re.DOTALL)
+
+    extracted_label_part = None
+
+    # Try to find the primary output marker first (bolded)
+    match_primary = primary_output_marker_pattern.search(output_text)
+    if match_primary:
+        extracted_label_part = match_primary.group(1).strip()
+    else:
+        # If primary marker is not found, try the secondary marker (step-based)
+        match_secondary = secondary_output_marker_pattern.search(output_text)
+        if match_secondary:
+            extracted_label_part = match_secondary.group(1).strip()
+        else:
+            # If secondary marker is not found, try the simple plain "输出[:：]" / "Output[:：]" marker
+            parts = re.split(pack.simple_output_marker, output_text)
+            if len(parts) > 1:  # Marker was found
+                extracted_label_part = parts[-1].strip()
+
+    if extracted_label_part is not None:
+        label = ""
+        # Attempt to clean the extracted part to get the pure label
+        # Case 1: Markdown code block like ```\nLABEL\n```
+        if extracted_label_part.startswith("```\n") and extracted_label_part.endswith("\n```"):
+            label = extracted_label_part[len("```\n") : -len("\n```")].strip()
+        # Case 2: Backticks like `LABEL`
+        elif extracted_label_part.startswith("`") and extracted_label_part.endswith("`"):
+            label = extracted_label_part[1:-1].strip()
+        # Case 3: No special formatting, just the text
+        else:
+            label = extracted_label_part.strip()
+
+        # Check if the label is empty after stripping wrappers
+        if not label or label in pack.empty_labels:
+            return "N/A"
+        else:
+            return label
+    else:
+        return "PARSE_ERROR_NO_MARKER"
+
+
+def find_labels(text: str, language: str = "zh") -> List[str]:
+    """Vocabulary labels named in a parsed answer, in RL order.
+
+    English answers say "Recognition Logic 5" while the vocabulary (and
+    structured output) uses "RL5"; both are matched by number, as the
+    evaluation notebook's clean_RL_output does.
+    """
+    pack = get_prompt_pack(language)
+    numbers = {int(n) for n in re.findall(pack.answer_label_pattern, str(text))}
+    return [label for i, label in enumerate(pack.label_vocabulary, start=1) if i in numbers]
+
+
+def generate_followup(messages: List[Dict[str, str]], output_text: str, language: str = "zh") -> List[Dict[str, str]]:
+    """Extend a conversation whose answer had no usable label with a turn asking only for the labels.
+
+    The original messages stay first, so the provider's prefix cache still
+    covers them.
+    """
+    pack = get_prompt_pack(language)
+    return messages + [
+        {"role": "assistant", "content": output_text},
+        {"role": "user", "content": pack.final_labels_prompt},
+    ]
+
+
+def label_schema(language: str = "zh") -> Dict:
+    """JSON schema restricting the answer to a list of RL labels for the language"""
+    pack = get_prompt_pack(language)
+    return {
+        "type": "object",
+        "properties": {
+            "labels": {
+                "type": "array",
+                "items": {"type": "string", "enum": list(pack.label_vocabulary)},
+            },
+        },
+        "required": ["labels"],
+        "additionalProperties": False,
+    }
+
+
+def parse_structured_output(output_text: str, language: str = "zh") -> str:
+    """Parse a {"labels": [...]} answer into the same RL_Types format as parse_output.
+
+    Labels are de-duplicated and put in RL order, "N/A" for an empty list.
+    Anything that is not valid JSON over the vocabulary falls back to
+    parse_output.
+    """
+    pack = get_prompt_pack(language)
+    try:
+        labels = json.loads(output_text)["labels"]
+        if not isinstance(labels, list) or not all(label in pack.label_vocabulary for label in labels):
+            raise ValueError(f"labels outside the vocabulary: {labels}")
+    except (ValueError, TypeError, KeyError):
+        return parse_output(output_text, language)
+    if not labels:
+        return "N/A"
+    return ", ".join(label for label in pack.label_vocabulary if label in labels)
+
+
+def find_label_end(output_text: str, language: str = "zh") -> Optional[int]:
+    """Offset just past the label line after the primary/secondary output marker, or None if it is not complete yet.
+
+    Used to stop a streamed completion early: parse_output on
+    output_text[:end] yields the label. The plain "输出:" / "Output:"
+    marker is not used here because it can also appear inside the
+    reasoning before the final answer.
+    """
+    pack = get_prompt_pack(language)
+    for marker in (pack.primary_output_marker, pack.secondary_output_marker):
+        match = re.search(marker, output_text, re.DOTALL)
+        if not match:
+            continue
+        start = match.start(1)
+        rest = output_text[start:]
+        if rest.startswith("```"):
+            # Label wrapped in a code block: wait for the closing fence
+            close = rest.find("\n```", 3)
+            return start + close + len("\n```") if close != -1 else None
+        newline = rest.find("\n")
+        if newline == -1:
+            return None
+        return start + newline
+    return None
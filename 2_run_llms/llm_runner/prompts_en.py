@@ -0,0 +1,161 @@
+"""
+English prompt pack: system prompt, few-shot examples and output markers
+"""
+
+SYSTEM_PROMPT = """## Multi-Label Analysis of "Local" Identity Definition Standards in Social Network Texts
+
+### 1. Task Objective
+
+Analyze the given social media text segment to identify the prominent standards that the **author themself** explicitly expresses agreement with, or **implicitly agrees with** through the subtext, for defining a **"local person" (or its synonyms)**. Based on the Recognition Logic (RL) framework in this manual, output all corresponding RL category labels. A text segment may correspond to **one or more** RL categories.
+
+**Core Limitation:** This task **only focuses** on how the author defines "local person" identity. If the text merely discusses wealth, social status, quality of life, property advantages/disadvantages, job quality, etc., **without explicitly or strongly implying** that these are standards used to judge whether someone is a "local person," then **do not annotate**.
+
+### 2. Core Principles
+*   **Focus on the Author's Core Argument:** Your judgment **must** be based on the core viewpoint, claim, or evaluation regarding the definition of "local person" identity as presented by the **speaker (i.e., the text author)**. Understanding **what the author intends to say** is the primary task.
+*   **Analyze the Functional Role of Recognition Logic:** The identified recognition logic elements are not just isolated features; understand the **functional role** they play in the author's construction of their core argument.
+*   **Actively Infer Context and Implicit Logic:** Actively perform contextual reasoning to understand the basis of legitimacy for "local person" identity or the evaluation criteria endorsed by the author behind their discourse.
+*   **Exclude Resisted Standards and Irrelevant Discussions:** For standards that the author explicitly expresses resistance to, denies, or merely describes as being used against them by others, **do not annotate**. For discussions not directly related to defining "local person" identity, **do not annotate**.
+
+### 3. Recognition Logic Framework
+
+**Uniform Sentence Template:**
+The author believes that people (or the author themself) should/often/can use the logic or standards represented by [Recognition Logic Type] to define who is/is not a 'local person', or to evaluate the quality/scope of a 'local' area.
+
+**Recognition Logic Type Definitions and Features:**
+
+#### Recognition Logic 1 (RL1): Vernacular Spatial Authority
+*   **Definition:** Shared, habitual, or historically sedimented local perceptions of intra-city spatial categories that the author endorses or describes. These perceptions are not based on official administrative boundaries but reflect collective emotional maps, used as cultural shorthand for assigning evaluative or symbolic labels.
+*   **Core Identifying Features:**
+    *   The author explicitly proposes or assumes a logic for classifying **which areas "count" or "do not count" as core local areas, or which areas have identity or cognitive differences** (e.g., "Outside the Third Ring Road is not considered Chengdu").
+    *   The author implies the status of a specific area within the "local" identity system by describing its **symbolic meaning, historical labels, or common societal views (collective emotional map)**.
+    *   The author discusses **the social recognition changes or current consensus on concepts like "urban area scope," "city boundaries," etc.**
+
+#### Recognition Logic 2 (RL2): Administrative Legitimacy
+*   **Definition:** Appeals to official jurisdiction, legal status, or administrative designation. Speakers in this category justify inclusion or exclusion based on hukou registration (a household registration system), district incorporation, or municipal redistricting.
+*   **Core Identifying Features:** Keywords include "administrative division," "incorporated into," "belongs to," "where is the hukou from," "ID card prefix," etc., used as a basis for judging whether a person/place is administratively/legally "local."
+
+#### Recognition Logic 3 (RL3): Family Rootedness (Family Historical Roots / Individual Growth History)
+*   **Definition:** The author endorses or cites the evaluation of local legitimacy based on the generational depth of family settlement. Claims in this category emphasize lineage, ancestry, or long-term familial ties to the area.
+*   **Core Identifying Features:**
+    *   Emphasizes terms like "**born and raised locally**," "**generations**," "**ancestors**," "**parents' generation**," "**within three generations**," "**came since childhood/kindergarten**," etc., to prove someone is a "genuine local" or has formed the basis of a "local person's" identity.
+    *   Describes identity differences due to migration history (or lack thereof).
+
+#### Recognition Logic 4 (RL4): Linguistic-Cultural Recognition
+*   **Definition:** Relies on dialect, accent, or cultural linguistic habits as a boundary marker. Regional speech features are treated as proxies for insider status, and deviations often provoke mockery or mistrust. May also include identification with specific local cultural habits (e.g., customs, lifestyle).
+*   **Core Identifying Features:** Mentions "speaking the local dialect," "accent," "cannot understand/stand certain accents," "don't you understand our local rules," etc., as criteria for distinguishing insiders from outsiders, or judging if someone is "one of us" or possesses "local attributes."
+
+#### Recognition Logic 5 (RL5): Functional Livability (Convenience of Living Functions and Environmental Quality Perception)
+*   **Definition:** The author endorses or cites the evaluation of urban areas in terms of their material infrastructure (e.g., transit, housing, education, or access to services), often to assert spatial superiority or desirability.
+*   **Core Identifying Features:**
+    *   Mentions "subway," "amenities," "convenience," "education," "good greening," "few people," "streetscape," "comfortable," etc., and **directly associates these with an evaluation of whether an area is "good," "livable," or "worth living in."**
+    *   The author considers an area an ideal "local" living space due to its RL5 characteristics, or believes an area does not meet the standard of a "good local" area due to a lack of RL5 characteristics.
+
+#### Recognition Logic 6 (RL6): Social Embeddedness (Depth of Social Roots and Symbolism of Economic Status)
+*   **Definition:** The author endorses or cites judging whether someone is a local based on their integration into local social circles and possession of local fixed assets. This includes community resources (like dividends, familiarity with the community) and material or symbolic resources, such as (inherited) property.
+*   **Core Identifying Features:**
+    *   Mentions "connections (renmai)," "dividends," "old relationships," "community influence," "friends nearby," "has several properties in the city center," "impact of high/low housing prices on identity," "spending one or two million to buy a house," etc., and **explicitly or implicitly links these to the "stability, authenticity, hierarchy of local identity, or evaluation criteria for a region."**
+
+#### Recognition Logic 7 (RL7): Occupational Typification
+*   **Definition:** The author endorses or cites framing identity by associating certain districts with dominant professional groups, such as civil servants, migrant workers, or business owners, thereby invoking implicit hierarchies of class and worth.
+*   **Core Identifying Features:** Mentions specific occupations or types of people (e.g., "farmers," "those who farm," "migrant workers"), and **strongly associates them with the "local attributes," resident composition, or social stratification of a specific area**, thereby defining identity or evaluating the area.
+
+### 4. Annotation Procedure
+1.  **Step 1: Identify named entities mentioned in the text**
+    *   Read through the text and record the entities mentioned.
+2.  **Step 2: Match arguments to each named entity**
+    *   Read the text carefully and match the corresponding viewpoint statements to each mentioned entity.
+3.  **Step 3: Analyze the underlying recognition logic behind each viewpoint statement**
+    *   For each entity, analyze which recognition logic(s) the speaker's expressed viewpoint (if any) is based on. It can be multiple recognition logics.
+4.  **Step 4: Output the results**
+    *   Output all matched **one or more** recognition logic category labels [Recognition Logic N], separated by ``, `` (a comma followed by a space).
+
+### 5. Important Notes
+*   Constantly remind yourself that the annotation target is **standards that the author themself does not explicitly oppose and uses to define "local person" identity or evaluate a "local" area, and understand their function in the author's core argument.**
+*   Do not rely solely on keyword matching; deeply understand the logic, intent, and core viewpoint behind the author's discourse. **Follow the steps from Step 1 to Step 4 in 4. Annotation Procedure; do not skip steps.**
+*   If the author is merely describing a phenomenon, expressing personal preference, or evaluating social status/wealth, without revealing that they use these standards to define "who is a local person" or evaluate "the quality/scope/distinction of a local area," then **do not annotate.**
+*   Output the result after the `Output: ` marker. **Stop immediately** after outputting the result; do not output any further content."""
+
+FEW_SHOT_EXAMPLES = [
+    {
+        "role": "user",
+        "content": "I'm from the suburbs, and when people ask where I'm from, I always say the suburb name, never the city. Growing up, everyone knew that anything beyond the third ring road doesn't really count as the city proper."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- Suburbs (location)\n- City (third ring road, city proper, geographical distinction)\n\nStep 2: Match arguments for each named entity\n- Suburbs: Author and people around them say they're from the suburb when asked, not the city.\n- City (third ring road/city proper): The collective understanding from childhood is that 'anything beyond the third ring road doesn't really count as the city proper.'\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- The distinction between suburbs and city expresses a social customary regional cognition—suburbs, though administratively part of the city, are not culturally recognized as 'local' to the city; while 'beyond the third ring road doesn't count as city proper' is a widely recognized spatial definition method within the city's local society, using the 'third ring road' as the core geographical symbol to divide 'local/non-local.'\n- Here 'everyone knew that anything beyond the third ring road doesn't really count as the city proper' directly reflects collective spatial cognitive consensus, not official administrative division but cultural-emotional zoning.\n- No mention of other standards like family foundation, administrative affiliation, etc.\n\nStep 4: Output results\nOutput: Recognition Logic 1"
+    },
+    {
+        "role": "user",
+        "content": "I only care about administrative boundaries. If you're within the city limits, you're a city person, whether you're from the outer districts or the suburbs. Years ago people thought the distance was too far, but now with subways and cars, it only takes a few minutes to get anywhere."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- City limits\n- Outer districts\n- Suburbs\n\nStep 2: Match arguments for each named entity\n- City limits: Author only cares about administrative boundaries, those within city limits are city people.\n- Outer districts, suburbs: As long as administratively part of the city, people from these areas also count as city people. Author mentions 'years ago people thought distance was too far... now subways and cars take only minutes' as supplement to spatial distance cognition changes, but core standard is administrative boundaries.\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- Author explicitly states 'only care about administrative boundaries,' using official administrative affiliation as the sole recognition standard.\n- Also mentions 'transportation convenience' causing social cognition changes, but this part explains past vs. present physical distance concepts, psychological distance shortening, without indicating author uses transportation convenience as standard for defining 'local people'—this remains observation of spatial concept changes, core not for defining 'local people' identity.\n- No reflection of recognition of other logics like family foundation, dialect culture, social foundation, occupational types, etc.\n\nStep 4: Output results\nOutput: Recognition Logic 2"
+    },
+    {
+        "role": "user",
+        "content": "In our city, if your family has been here for three generations, you're considered a true local. Two generations makes you a new local, first generation settlers are immigrants, and if three generations don't speak the local dialect, you're an outsider even if your family has been here that long."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- Three generations of locals\n- Two generations of new locals\n- First generation settlers (immigrants)\n- Three generations without local dialect\n\nStep 2: Match arguments for each named entity\n- Three generations: Considered 'true locals,' emphasizing family settlement duration.\n- Two generations: Considered 'new locals,' family settlement time slightly shorter than 'true locals.'\n- First generation settlers: Called 'immigrants,' representing first generation of migration.\n- Three generations without local dialect: Even if family has been here three generations, without speaking local dialect, classified as 'outsiders.'\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- Using family's local historical length ('several generations') as main basis for evaluating 'local people' hierarchy, typical family historical foundation recognition logic.\n- 'Three generations without local dialect' further uses language/cultural integration as recognition standard, emphasizing dialect as identity symbol and definition marker.\n- No clear mention of administrative affiliation, regional cognition, social relationships, occupation, etc.\n\nStep 4: Output results\nOutput: Recognition Logic 3, Recognition Logic 4"
+    },
+    {
+        "role": "user",
+        "content": "I'm a native here and honestly, I can't stand some of these accents. It's just really grating to my ears."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- Native (author's self-identification)\n\nStep 2: Match arguments for each named entity\n- Author identifies as 'native,' expressing recognition of 'native' identity.\n- Also mentions 'can't stand some accents,' expressing discomfort with certain non-local accents.\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- 'Native' reflects family or individual local foundation, but doesn't detail generational family depth, so direct family historical foundation recognition logic representation is not obvious.\n- Main focus on 'can't stand some accents,' using accent, language as actual experience for distinguishing 'local/non-local people,' expressing language/cultural recognition as implicit standard for measuring localness.\n\nStep 4: Output results\nOutput: Recognition Logic 4"
+    },
+    {
+        "role": "user",
+        "content": "That's why I love this neighborhood. It's the transition from old city to new development, the streets aren't as run-down as the old city, it's only 15 minutes to downtown, everything is convenient, it's just so comfortable to live here."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- This neighborhood (area name)\n- Old city\n- New development\n- Downtown\n\nStep 2: Match arguments for each named entity\n- This neighborhood is liked by author, reasons include newer streets, close to downtown, convenient facilities, good living experience.\n- Compared to old city, this neighborhood has better streets, more complete facilities.\n- Downtown—geographical advantage (transportation convenience).\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- Author's liking for this neighborhood is based on life convenience, supporting facilities, and living environment comfort for evaluation.\n\nStep 4: Output results\nOutput: Recognition Logic 5"
+    },
+    {
+        "role": "user",
+        "content": "Not many families can afford to spend a couple hundred thousand on a house in a good environment within the second ring. My parents have worked in the city for so long, mostly within the first and second rings, friends are nearby too, buying in the suburbs just isn't realistic, renovating a house within the first and second rings is the best option."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- Houses within first and second rings (location, area)\n- Suburbs\n- City (overall urban scope)\n\nStep 2: Match arguments for each named entity\n- Houses within first and second rings: Good environment, high price (couple hundred thousand), closely related to author's parents' work, friend network, considered best choice.\n- Suburbs: Comparatively 'buying in suburbs just isn't realistic,' not meeting ideals.\n- Author's parents long-term work within first and second rings, friends nearby, social relationship foundation also within first and second rings.\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- Emphasizing 'worked long,' 'friends nearby,' having sufficient economic ability to buy houses in urban areas, etc., showing social relationships, economic capability, display of social foundation and economic status.\n- Also mentions first and second rings 'good environment,' expressing functional evaluation of life convenience, superior living environment.\n- No direct involvement of family history, administrative affiliation, language culture, occupational types, etc.\n\nStep 4: Output results\nOutput: Recognition Logic 5, Recognition Logic 6"
+    },
+    {
+        "role": "user",
+        "content": "Those areas are rural, lots of farmers working the land, the older generation doesn't consider them real city people."
+    },
+    {
+        "role": "assistant",
+        "content": "Step 1: Identify named entities mentioned in the text\n- Those areas (area names)\n- Farmers (agricultural workers)\n- Older generation (judges)\n\nStep 2: Match arguments for each named entity\n- Those areas described as 'rural,' residents mostly 'farmers working the land.'\n- 'Older generation doesn't consider them real city people,' meaning according to certain standards, identity definition logic, these areas' people not considered true 'local city people.'\n\nStep 3: Analyze the recognition logic hidden behind each viewpoint expression\n- Author mentions 'farmers working the land,' using occupational categories to strongly correlate with regional identity for demarcation, 'older generation' uses main occupational types to divide 'whether someone is a city person.'\n- Also reflects social collective customary cognition of regional space (rural/urban), but sentence focus leans toward combination of occupational types and collective concepts.\n- No direct use of administrative affiliation, family foundation, language culture, etc., for definition.\n\nStep 4: Output results\nOutput: Recognition Logic 7, Recognition Logic 1"
+    }
+]
+
+# Primary regex for "**Output[:：]**"
+PRIMARY_OUTPUT_MARKER = r"\*\*Output[:：]\*\*\s*(.*)"
+# Secondary regex for "Step 4: Output results"
+SECONDARY_OUTPUT_MARKER = r"Step 4: Output results\s*(.*)"
+# Regex for splitting by "Output:" or "Output："
+SIMPLE_OUTPUT_MARKER = r"Output[:：]"
+# Labels that mean "no RL applies"
+EMPTY_LABELS = ("None", "(None)")
+# Label set for structured (JSON) output
+LABEL_VOCABULARY = tuple(f"RL{i}" for i in range(1, 8))
+# How free-text answers name a label, and a regex for it whose group is the RL number
+ANSWER_LABEL = "Recognition Logic {n}"
+ANSWER_LABEL_PATTERN = r"(?:Recognition Logic|RL)\s*(\d+)"
+# Appended to the system prompt in structured output mode
+STRUCTURED_OUTPUT_INSTRUCTION = "## Structured output\n\nDo not write out the analysis steps. Output only a JSON object {\"labels\": [...]} listing every matching Recognition Logic label (RL1 to RL7), or an empty list if none applies."
+# Follow-up turn asking for just the labels when an answer was truncated or has no output marker
+FINAL_LABELS_PROMPT = "Do not repeat the analysis. Output only the final result: after `Output:` list every matching Recognition Logic label, separated by `, `, then stop immediately."
+# Label scoring mode: one-token answers whose logprobs are read as label scores
+SCORE_CHOICE_PROMPT = "Do not write an analysis. Answer with a single digit: the number of the Recognition Logic (1-7) that best fits the text above, or 0 if none applies."
+SCORE_BINARY_PROMPT = "Do not write an analysis. Does the text above express {label}? Answer only Yes or No."
+SCORE_YES_NO = ("Yes", "No")
+
+PACKED_INSTRUCTION = "## Multiple texts\n\nThe user message may contain several numbered texts (`Text 1:`, `Text 2:`, ...). Analyse each text independently as described above. Then finish with a line `Results:` followed by exactly one line per text in the form `[n] labels`, listing every matching Recognition Logic label for text n separated by `, `, or `None` if no label applies."
+PACKED_TEXT_HEADER = "Text {n}:"
+PACKED_RESULTS_MARKER = r"Results[:：]"
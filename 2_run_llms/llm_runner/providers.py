@@ -0,0 +1,574 @@
+"""
+Provider backends for OpenAI-compatible chat-completion APIs
+"""
+
+import time
+import asyncio
+from dataclasses import dataclass, replace
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from openai import AsyncOpenAI
+
+from .rate_limit import estimate_tokens, retry_after_seconds
+from .key_pool import KeyPool, PooledKey, keys_from_env, drain_reason
+from .transport import TransportConfig
+from .hedging import Hedger
+from .circuit_breaker import CircuitBreaker, is_outage_error
+from .response_cache import ResponseCache, make_cache_key
+from .prefix_cache import prefix_fingerprint, cached_prompt_tokens
+from .telemetry import Budget, BudgetExceeded
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    """Static settings for one OpenAI-compatible provider"""
+    name: str                       # Used as the output file prefix, e.g. gpt41_zero_shot.csv
+    display_name: str
+    model: str
+    api_key_env: str
+    base_url: Optional[str] = None  # None means the default OpenAI endpoint
+    max_concurrent: int = 5         # Starting concurrency; the limiter adapts it from here
+    max_concurrency: int = 64       # Ceiling for the adaptive concurrency window
+    rpm: Optional[int] = None       # Requests/tokens per minute; learned from x-ratelimit-* headers if unset
+    tpm: Optional[int] = None
+    # USD per 1M tokens, used for cost and prefix-cache savings reports; edit to match your account
+    input_price: float = 0.0
+    cached_input_price: float = 0.0
+    output_price: float = 0.0
+    # Send OpenAI's prompt_cache_key so requests sharing a prefix are routed to the same cache
+    send_prompt_cache_key: bool = False
+    # How to request schema-constrained output: "json_schema" (OpenAI response_format),
+    # "json_object" (JSON mode, schema given in the prompt) or "guided_json" (vLLM guided decoding)
+    structured_output: str = "json_schema"
+    # Token limit for the short "output only the final labels" follow-up to a truncated answer;
+    # reasoning models need room to think again before answering
+    followup_max_tokens: int = 256
+    # Accepts n > 1 (several samples from one prefill); otherwise samples are separate requests
+    supports_n: bool = True
+    # Returns logprobs/top_logprobs (needed for the label scoring mode)
+    supports_logprobs: bool = True
+    # Offers the asynchronous Batch API (/v1/files + /v1/batches) at half the price
+    supports_batch: bool = False
+    # Longest silence while reading a response; non-streamed answers arrive all at once at the end
+    read_timeout: float = 600.0
+    # 1 = best F1 in 3_evaluation_results, 2 = a few points lower; --route-tier keeps the router to a tier or better
+    quality_tier: int = 1
+    # Extra request fields, e.g. chat template options of a vLLM server
+    extra_body: Optional[Dict[str, Any]] = None
+
+
+PROVIDERS = {
+    "gpt41": ProviderConfig(
+        name="gpt41",
+        display_name="GPT-4.1",
+        model="gpt-4.1",
+        api_key_env="OPENAI_API_KEY",
+        max_concurrent=5,
+        input_price=2.00,
+        cached_input_price=0.50,
+        output_price=8.00,
+        send_prompt_cache_key=True,
+        supports_batch=True,
+    ),
+    "deepseek": ProviderConfig(
+        name="deepseek",
+        display_name="DeepSeek",
+        model="deepseek-reasoner",  # DeepSeek's main model
+        api_key_env="DEEPSEEK_API_KEY",
+        base_url="https://api.deepseek.com/v1",  # DeepSeek uses OpenAI-compatible API format
+        max_concurrent=10,
+        structured_output="json_object",  # DeepSeek has JSON mode but no json_schema
+        followup_max_tokens=4096,  # deepseek-reasoner counts its reasoning against max_tokens
+        read_timeout=1200.0,  # Long reasoning before the first byte of a non-streamed answer
+        supports_n=False,
+        supports_logprobs=False,  # deepseek-reasoner does not return logprobs
+        # DeepSeek caches shared prefixes automatically (context caching on disk)
+        input_price=0.55,
+        cached_input_price=0.14,
+        output_price=2.19,
+    ),
+    # Self-hosted models of the notebooks, served by `vllm serve <model> --enable-prefix-caching`;
+    # point them at the server with --base-url or --route NAME=URL. Set the prices to your GPU cost
+    # per 1M tokens so the router can weigh them against the APIs. Any key works (e.g. VLLM_API_KEY=EMPTY).
+    "Qwen3-32B": ProviderConfig(
+        name="Qwen3-32B",
+        display_name="Qwen3-32B",
+        model="Qwen/Qwen3-32B",
+        api_key_env="VLLM_API_KEY",
+        base_url="http://localhost:8000/v1",
+        max_concurrent=16,
+        structured_output="guided_json",
+        extra_body={"chat_template_kwargs": {"enable_thinking": False}},
+    ),
+    "Qwen3-235B-A22B": ProviderConfig(
+        name="Qwen3-235B-A22B",
+        display_name="Qwen3-235B-A22B",
+        model="Qwen/Qwen3-235B-A22B",
+        api_key_env="VLLM_API_KEY",
+        base_url="http://localhost:8000/v1",
+        max_concurrent=16,
+        structured_output="guided_json",
+        extra_body={"chat_template_kwargs": {"enable_thinking": False}},
+        quality_tier=2,
+    ),
+    "gemma-3-27b-it": ProviderConfig(
+        name="gemma-3-27b-it",
+        display_name="Gemma 3 27B",
+        model="google/gemma-3-27b-it",
+        api_key_env="VLLM_API_KEY",
+        base_url="http://localhost:8000/v1",
+        max_concurrent=16,
+        structured_output="guided_json",
+        quality_tier=2,
+    ),
+}
+
+STRUCTURED_OUTPUT_KINDS = ["json_schema", "json_object", "guided_json"]
+
+# Sampling parameters shared by all providers
+SAMPLING_PARAMS = {
+    "temperature": 0.7,
+    "max_tokens": 8192,
+    "top_p": 0.8,
+    "frequency_penalty": 0,
+    "presence_penalty": 0,
+}
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    error_str = str(error)
+    return "429" in error_str and "rate_limit" in error_str
+
+
+def _error_headers(error: Exception):
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None)
+
+
+class ProviderBackend:
+    """One shared pool of API keys (each with its client and rate limiter) per provider.
+
+    Every job that targets the same provider goes through the same backend,
+    so several (mode, language) jobs in one process share warm connection
+    pools and the same RPM/TPM/concurrency budgets. Keys come from
+    `api_key`, or from the provider's key variable plus its plural form
+    (e.g. OPENAI_API_KEY and OPENAI_API_KEYS).
+    """
+
+    def __init__(self, config: ProviderConfig, api_key: Optional[str] = None, max_concurrent: Optional[int] = None,
+                 rpm: Optional[int] = None, tpm: Optional[int] = None, cache: Optional[ResponseCache] = None,
+                 budget: Optional[Budget] = None, stream: bool = False, structured_output: Optional[str] = None,
+                 transport: Optional[TransportConfig] = None, hedger: Optional[Hedger] = None,
+                 breaker: Optional[CircuitBreaker] = None, failover: Optional["ProviderBackend"] = None):
+        self.config = config
+        # Duplicates calls that run past the tail latency; None turns hedging off
+        self.hedger = hedger
+        # Pauses dispatch while the provider is down; None sends (and retries) regardless
+        self.breaker = breaker
+        # Serves requests while the breaker is open; results then name the endpoint that answered
+        self.failover = failover
+        self.structured_output = structured_output or config.structured_output
+        self.cache = cache
+        self.budget = budget
+        self.stream = stream
+        ceiling = max_concurrent or config.max_concurrency
+        transport = transport or TransportConfig()
+        self.transport = replace(transport, read_timeout=transport.read_timeout or config.read_timeout)
+        # --rpm/--tpm/--max-concurrent apply to each key, since every key has its own quota
+        self.keys = KeyPool(
+            [(api_key, None)] if api_key else keys_from_env(config.api_key_env),
+            base_url=config.base_url,
+            rpm=rpm or config.rpm,
+            tpm=tpm or config.tpm,
+            initial_concurrency=min(config.max_concurrent, ceiling),
+            max_concurrency=ceiling,
+            transport=self.transport,
+        )
+        self.api_key = self.keys.keys[0].api_key if self.keys.keys else None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Client of the first usable key (the Batch API runs on a single key)"""
+        return self.keys.pick().client
+
+    @property
+    def endpoint(self) -> str:
+        """model@host, e.g. gpt-4.1@api.openai.com"""
+        host = urlparse(self.config.base_url).netloc if self.config.base_url else "api.openai.com"
+        return f"{self.config.model}@{host}"
+
+    async def complete(self, messages: List[Dict[str, str]], max_retries: int = 5, refresh: bool = False,
+                       stats: Optional[Dict[str, Any]] = None,
+                       stop_at: Optional[Callable[[str], Optional[int]]] = None,
+                       schema: Optional[Dict[str, Any]] = None,
+                       max_tokens: Optional[int] = None, prefix_key: Optional[str] = None,
+                       n: int = 1, top_logprobs: Optional[int] = None) -> Dict[str, Any]:
+        """Return the completion record ({content, finish_reason, usage}), from the response cache when possible.
+
+        `refresh=True` skips the cache lookup (used when re-running an item
+        whose cached answer could not be parsed) and overwrites the entry.
+        `stats`, if given, is filled with attempts, queue and backoff seconds
+        even when the request fails. With streaming enabled, `stop_at(text)`
+        is called as content arrives and the stream is closed as soon as it
+        returns an offset; the content is cut there. `schema` constrains the
+        answer to a JSON schema (see structured_kwargs). `max_tokens`
+        overrides the shared sampling parameter and `prefix_key` the
+        prompt_cache_key; both are used by short follow-ups to an earlier
+        request, which should land on that request's cached prefix. With
+        `n > 1` the record also has "choices", one {content, finish_reason}
+        per sample; n > 1 is never streamed. `top_logprobs=k` adds
+        "top_logprobs", the k most likely first tokens as {token: logprob}.
+        """
+        if not self.stream or n > 1:
+            stop_at = None
+        options = dict(schema=schema, max_tokens=max_tokens, prefix_key=prefix_key, top_logprobs=top_logprobs)
+        if n > 1 and not self.config.supports_n:
+            fetch = lambda: self._request_separately(messages, max_retries, stats, n=n, **options)
+        else:
+            fetch = lambda: self._request(messages, max_retries, stats, stop_at=stop_at, n=n, **options)
+        if self.cache is None:
+            return self._tag(await fetch())
+        params = dict(SAMPLING_PARAMS)
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if n > 1:
+            params["n"] = n
+        if stop_at is not None:
+            params["early_stop"] = True
+        if schema is not None:
+            params["structured_output"] = {"kind": self.structured_output, "schema": schema}
+        if top_logprobs is not None:
+            params["top_logprobs"] = top_logprobs
+        key = make_cache_key(self.config.base_url, self.config.model, messages, params)
+        return self._tag(await self.cache.get_or_fetch(key, fetch, refresh=refresh))
+
+    def _tag(self, completion: Dict[str, Any]) -> Dict[str, Any]:
+        """With a failover endpoint configured, every completion says which endpoint served it"""
+        if self.failover is not None and not completion.get("served_by"):
+            completion = {**completion, "served_by": self.endpoint}
+        return completion
+
+    async def _request_separately(self, messages: List[Dict[str, str]], max_retries: int,
+                                  stats: Optional[Dict[str, Any]], n: int, **options) -> Dict[str, Any]:
+        """n samples as n concurrent requests, for providers that ignore or reject the n parameter"""
+        sample_stats = [{} for _ in range(n)]
+        try:
+            completions = await asyncio.gather(*(
+                self._request(messages, max_retries, sample_stats[i], **options) for i in range(n)
+            ))
+        finally:
+            if stats is not None:
+                for key in ("attempts", "queue_seconds", "backoff_seconds"):
+                    stats[key] = sum(stat.get(key, 0) for stat in sample_stats)
+        merged = {
+            "content": completions[0]["content"],
+            "finish_reason": completions[0]["finish_reason"],
+            "usage": merge_usage([c["usage"] for c in completions]),
+            "choices": [{"content": c["content"], "finish_reason": c["finish_reason"]} for c in completions],
+        }
+        failed_over = [c for c in completions if c.get("failover")]
+        if failed_over:
+            merged.update(served_by=failed_over[0]["served_by"], failover=True)
+        return merged
+
+    def structured_kwargs(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Request fields that constrain the answer to `schema`, in the form this provider understands"""
+        if self.structured_output == "json_schema":
+            return {"response_format": {"type": "json_schema",
+                                        "json_schema": {"name": "rl_labels", "strict": True, "schema": schema}}}
+        if self.structured_output == "json_object":
+            return {"response_format": {"type": "json_object"}}
+        if self.structured_output == "guided_json":
+            return {"extra_body": {"guided_json": schema}}
+        raise ValueError(f"Unknown structured output kind '{self.structured_output}', "
+                         f"expected one of {STRUCTURED_OUTPUT_KINDS}")
+
+    async def _read_stream(self, stream, prompt_tokens: int,
+                           stop_at: Optional[Callable[[str], Optional[int]]]) -> Dict[str, Any]:
+        """Accumulate a streamed completion, closing the stream early once `stop_at` finds the end"""
+        parts = []
+        finish_reason = None
+        usage = None
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage.model_dump()
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                parts.append(choice.delta.content)
+                end = stop_at("".join(parts)) if stop_at is not None else None
+                if end is not None:
+                    # Closing the response stops generation, so the remaining tokens are never produced
+                    await stream.close()
+                    content = "".join(parts)[:end]
+                    completion_tokens = max(estimate_tokens([{"content": content}]) - 4, 0)
+                    return {
+                        "content": content.strip(),
+                        "finish_reason": "early_stop",
+                        # The final usage chunk never arrives, so these are estimates
+                        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                  "total_tokens": prompt_tokens + completion_tokens, "estimated": True},
+                    }
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        return {"content": "".join(parts).strip(), "finish_reason": finish_reason, "usage": usage}
+
+    async def _send(self, key: PooledKey, messages: List[Dict[str, str]], sampling: Dict[str, Any], extra: Dict[str, Any],
+                    prompt_tokens: int, stop_at: Optional[Callable[[str], Optional[int]]], stream: bool):
+        """One API call, with a streamed answer read to the end, within the transport's request deadline"""
+        async def call():
+            raw = await key.client.chat.completions.with_raw_response.create(
+                model=self.config.model,
+                messages=messages,
+                **sampling,
+                **extra
+            )
+            # A stream is read while holding the slot, since the request is still running
+            return raw, await self._read_stream(raw.parse(), prompt_tokens, stop_at) if stream else None
+
+        try:
+            return await asyncio.wait_for(call(), self.transport.request_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No complete response within {self.transport.request_timeout:.0f}s") from None
+
+    async def _send_on(self, key: PooledKey, reserved: int,
+                       *send_args) -> Tuple[Any, Optional[Dict[str, Any]], PooledKey, int]:
+        """`_send`, returning the key and its TPM reservation with the answer, so a hedged race's winner is known"""
+        raw, completion = await self._send(key, *send_args)
+        return raw, completion, key, reserved
+
+    async def _send_duplicate(self, stats: Dict[str, Any], messages: List[Dict[str, str]], sampling: Dict[str, Any],
+                              extra: Dict[str, Any], prompt_tokens: int,
+                              stop_at: Optional[Callable[[str], Optional[int]]],
+                              stream: bool) -> Tuple[Any, Optional[Dict[str, Any]], PooledKey, int]:
+        """The hedge of a slow call: the same request in a slot of its own, on the key with the most headroom"""
+        key = self.keys.pick(prompt_tokens)
+        reserved = key.limiter.reserve_tokens(prompt_tokens)
+        async with key.slot(reserved):
+            stats["hedged"] = True
+            if self.budget is not None:
+                self.budget.check()
+            return await self._send_on(key, reserved, messages, sampling, extra, prompt_tokens, stop_at, stream)
+
+    async def _request(self, messages: List[Dict[str, str]], max_retries: int = 5,
+                       stats: Optional[Dict[str, Any]] = None,
+                       stop_at: Optional[Callable[[str], Optional[int]]] = None,
+                       schema: Optional[Dict[str, Any]] = None,
+                       max_tokens: Optional[int] = None, prefix_key: Optional[str] = None,
+                       n: int = 1, top_logprobs: Optional[int] = None) -> Dict[str, Any]:
+        """Call the chat-completions API with the pooled key that has the most headroom, through its rate limiter"""
+        prompt_tokens = estimate_tokens(messages)
+        sampling = SAMPLING_PARAMS if max_tokens is None else {**SAMPLING_PARAMS, "max_tokens": max_tokens}
+        extra = self.structured_kwargs(schema) if schema is not None else {}
+        if self.config.extra_body:
+            extra["extra_body"] = {**extra.get("extra_body", {}), **self.config.extra_body}
+        if self.config.send_prompt_cache_key:
+            extra["extra_body"] = {**extra.get("extra_body", {}),
+                                   "prompt_cache_key": prefix_key or prefix_fingerprint(messages)}
+        # Multiple samples and logprob scoring are read as a whole response, not streamed
+        stream = self.stream and n == 1 and top_logprobs is None
+        if n > 1:
+            extra["n"] = n
+        if top_logprobs is not None:
+            extra["logprobs"] = True
+            extra["top_logprobs"] = top_logprobs
+        if stream:
+            extra["stream"] = True
+            extra["stream_options"] = {"include_usage": True}
+        if stats is None:
+            stats = {}
+        stats.update(attempts=0, queue_seconds=0.0, backoff_seconds=0.0)
+
+        attempt = 0
+        while attempt < max_retries:
+            probe = False
+            if self.breaker is not None:
+                probe = self.breaker.poll()
+                if probe is None and self.failover is not None:
+                    return await self._fail_over(messages, max_retries, stats, stop_at=stop_at, schema=schema,
+                                                 max_tokens=max_tokens, prefix_key=prefix_key, n=n,
+                                                 top_logprobs=top_logprobs)
+                if probe is None:
+                    # The provider is down: wait for the probe instead of spending this request's retries
+                    waited_since = time.monotonic()
+                    probe = await self.breaker.admit()
+                    stats["backoff_seconds"] += time.monotonic() - waited_since
+            key = self.keys.pick(prompt_tokens)
+            reserved = key.limiter.reserve_tokens(prompt_tokens)
+            try:
+                waited_since = time.monotonic()
+                async with key.slot(reserved):
+                    # Waiting for a slot after a failure is backoff (e.g. a shared 429 pause), not queueing
+                    waited = time.monotonic() - waited_since
+                    stats["backoff_seconds" if attempt else "queue_seconds"] += waited
+                    if self.budget is not None:
+                        self.budget.check()
+                    stats["attempts"] += 1
+                    send_args = (messages, sampling, extra, prompt_tokens, stop_at if stream else None, stream)
+                    if self.hedger is None:
+                        raw, completion = await self._send(key, *send_args)
+                    else:
+                        # The answer is reconciled on the key that sent it, against that key's reservation. The
+                        # cancelled call keeps its reservation, as the provider may bill the tokens it used
+                        (raw, completion, key, reserved), won = await self.hedger.run(
+                            self._send_on(key, reserved, *send_args), lambda: self._send_duplicate(stats, *send_args))
+                        stats["hedge_won"] = stats.get("hedge_won", False) or won
+                if not stream:
+                    response = raw.parse()
+                    choice = response.choices[0]
+                    completion = {
+                        "content": (choice.message.content or "").strip(),
+                        "finish_reason": choice.finish_reason,
+                        "usage": response.usage.model_dump() if response.usage else None,
+                    }
+                    if n > 1:
+                        completion["choices"] = [
+                            {"content": (c.message.content or "").strip(), "finish_reason": c.finish_reason}
+                            for c in response.choices
+                        ]
+                    if top_logprobs is not None:
+                        first = choice.logprobs.content[0] if choice.logprobs and choice.logprobs.content else None
+                        completion["top_logprobs"] = (
+                            {alt.token: alt.logprob for alt in first.top_logprobs} if first else {}
+                        )
+                usage = completion["usage"]
+                key.limiter.on_success(
+                    raw.headers,
+                    reserved_tokens=reserved,
+                    used_tokens=usage.get("total_tokens") if usage else None,
+                    completion_tokens=usage.get("completion_tokens") if usage else None,
+                )
+                if self.breaker is not None:
+                    await self.breaker.record(True, probe)
+                    probe = False
+                return completion
+
+            except BudgetExceeded:
+                raise
+
+            except Exception as e:
+                error_str = str(e)
+                print(f"[{self.config.name}] Attempt {attempt + 1} failed: {error_str[:100]}...")
+
+                outage = is_outage_error(e)
+                if self.breaker is not None:
+                    await self.breaker.record(not outage, probe)
+                    probe = False
+                    if outage and self.breaker.is_open:
+                        # Not this request's fault: retry once the breaker lets requests through again
+                        continue
+
+                reason = drain_reason(e)
+                if reason is not None:
+                    # The key is unusable, not the request: drop the key and retry on another one
+                    self.keys.drain(key, reason)
+                    if not self.keys.active:
+                        raise
+                elif _is_rate_limit_error(e):
+                    # The limiter pauses every caller of this key, so the retry goes to
+                    # another key or queues up behind the shared pause instead of sleeping here
+                    wait_time = retry_after_seconds(_error_headers(e), error_str)
+                    if wait_time is None:
+                        wait_time = min(2 ** attempt, 60)  # Exponential backoff, capped at 60 seconds
+                    key.limiter.on_rate_limited(wait_time, _error_headers(e))
+                    print(f"Rate limit hit, pausing {self.config.name} key {key.name} for {wait_time:.2f} seconds "
+                          f"({key.limiter.describe()})")
+                else:
+                    # For other errors, use shorter exponential backoff
+                    if attempt < max_retries - 1:
+                        wait_time = min(2 ** attempt, 10)  # Cap at 10 seconds
+                        print(f"Error occurred, waiting {wait_time} seconds...")
+                        stats["backoff_seconds"] += wait_time
+                        await asyncio.sleep(wait_time)
+                    else:
+                        raise e
+
+            finally:
+                if probe:
+                    # Cancelled or over budget before an answer: hand the probe to the next caller
+                    await self.breaker.record(None, probe=True)
+            attempt += 1
+
+        raise RuntimeError(f"{self.config.display_name} API still rate limited after {max_retries} attempts")
+
+    async def _fail_over(self, messages: List[Dict[str, str]], max_retries: int, stats: Dict[str, Any],
+                         **options) -> Dict[str, Any]:
+        """Send a request to the failover endpoint while this provider's breaker is open"""
+        failover_stats = {}
+        try:
+            completion = await self.failover._request(messages, max_retries, failover_stats, **options)
+        finally:
+            for key in ("attempts", "queue_seconds", "backoff_seconds"):
+                stats[key] += failover_stats.get(key, 0)
+        # "failover" keeps the answer out of the response cache, whose key names this provider's model
+        return {**completion, "served_by": self.failover.endpoint, "failover": True}
+
+    async def close(self):
+        await self.keys.close()
+        if self.failover is not None:
+            await self.failover.close()
+
+
+def merge_usage(usages: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Sum the usage blocks of several requests that together answer one item"""
+    usages = [usage for usage in usages if usage]
+    if not usages:
+        return None
+    merged = {key: sum(usage.get(key) or 0 for usage in usages)
+              for key in ("prompt_tokens", "completion_tokens", "total_tokens")}
+    merged["prompt_cache_hit_tokens"] = sum(cached_prompt_tokens(usage) for usage in usages)
+    if any(usage.get("estimated") for usage in usages):
+        merged["estimated"] = True
+    return merged
+
+
+_backends: Dict[str, ProviderBackend] = {}
+
+
+def get_backend(name: str, max_concurrent: Optional[int] = None, rpm: Optional[int] = None,
+                tpm: Optional[int] = None, cache: Optional[ResponseCache] = None,
+                base_url: Optional[str] = None, budget: Optional[Budget] = None,
+                stream: bool = False, structured_output: Optional[str] = None,
+                transport: Optional[TransportConfig] = None, hedger: Optional[Hedger] = None,
+                breaker: Optional[CircuitBreaker] = None, failover_url: Optional[str] = None,
+                failover_model: Optional[str] = None,
+                failover_key_env: str = "FAILOVER_API_KEY") -> ProviderBackend:
+    """Return the shared backend for a provider, creating it on first use.
+
+    `base_url` points the provider at another OpenAI-compatible endpoint
+    (a proxy or local stand-in) without editing PROVIDERS. `failover_url`
+    adds a secondary OpenAI-compatible endpoint (same model unless
+    `failover_model` is given, key from `failover_key_env`) that serves
+    requests while the breaker is open.
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider '{name}', expected one of {sorted(PROVIDERS)}")
+    if name not in _backends:
+        config = PROVIDERS[name]
+        if base_url:
+            config = replace(config, base_url=base_url)
+        failover = None
+        if failover_url:
+            # Unknown quota and no prompt_cache_key: a proxy or local server may reject unexpected fields
+            failover_config = replace(config, name=f"{config.name}_failover",
+                                      display_name=f"{config.display_name} (failover)", base_url=failover_url,
+                                      model=failover_model or config.model, api_key_env=failover_key_env,
+                                      rpm=None, tpm=None, send_prompt_cache_key=False)
+            failover = ProviderBackend(failover_config, max_concurrent=max_concurrent, budget=budget, stream=stream,
+                                       structured_output=structured_output, transport=transport)
+        _backends[name] = ProviderBackend(config, max_concurrent=max_concurrent, rpm=rpm, tpm=tpm,
+                                          cache=cache, budget=budget, stream=stream,
+                                          structured_output=structured_output, transport=transport, hedger=hedger,
+                                          breaker=breaker, failover=failover)
+    return _backends[name]
+
+
+async def close_backends():
+    """Close every shared client at the end of a run"""
+    for backend in _backends.values():
+        await backend.close()
+    _backends.clear()
@@ -0,0 +1,237 @@
+"""
+Rate-limit-aware concurrency control: RPM/TPM token buckets plus AIMD concurrency
+"""
+
+import re
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Mapping
+
+# CJK characters are roughly one token each, everything else roughly four characters per token
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+_DURATION_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_RETRY_IN_PATTERN = re.compile(r"(?:Please )?try again in (\d+(?:\.\d+)?)\s*(ms|s)", re.IGNORECASE)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Cheap prompt-token estimate used to reserve TPM budget before a request"""
+    total = 0
+    for message in messages:
+        content = message.get("content") or ""
+        cjk = len(_CJK_PATTERN.findall(content))
+        total += cjk + (len(content) - cjk) // 4 + 4  # +4 per-message overhead
+    return total
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an x-ratelimit-reset-* value such as '20ms', '1s' or '6m0s' into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]], message: str = "") -> Optional[float]:
+    """Work out how long a 429 asks us to wait, from headers first and the error text second"""
+    if headers:
+        if headers.get("retry-after-ms"):
+            try:
+                return float(headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+        if headers.get("retry-after"):
+            try:
+                return float(headers["retry-after"])
+            except ValueError:
+                pass
+    match = _RETRY_IN_PATTERN.search(message)
+    if match:
+        amount = float(match.group(1))
+        return amount / 1000 if match.group(2) == "ms" else amount
+    return None
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized to a per-minute quota"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be taken now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        # May go negative when reconciling an under-estimate; the debt is repaid by refill
+        self._refill()
+        self.tokens -= amount
+
+    def set_limit(self, per_minute: float):
+        self._refill()
+        if per_minute > 0 and per_minute != self.capacity:
+            self.capacity = float(per_minute)
+            self.rate = per_minute / 60.0
+            self.tokens = min(self.tokens, self.capacity)
+
+    def sync_remaining(self, remaining: float):
+        """Trust the server if it reports less headroom than we think we have"""
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    """Shared limiter for one provider.
+
+    Requests pass three gates before they are sent: a global pause set by
+    429 responses, the RPM/TPM token buckets (seeded from the CLI and then
+    kept in sync with the x-ratelimit-* response headers), and an AIMD
+    concurrency window that grows by one slot per window of successful calls
+    and halves on a 429.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 initial_concurrency: int = 5, min_concurrency: int = 1, max_concurrency: int = 64,
+                 decrease_factor: float = 0.5, expected_completion_tokens: int = 1000):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, min_concurrency)
+        self.concurrency = float(min(max(initial_concurrency, min_concurrency), self.max_concurrency))
+        self.decrease_factor = decrease_factor
+        self.expected_completion_tokens = expected_completion_tokens
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.rate_limited_count = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self.concurrency)
+
+    def reserve_tokens(self, prompt_tokens: int) -> int:
+        """TPM reservation for a request: estimated prompt plus the running completion average"""
+        return prompt_tokens + int(self.expected_completion_tokens)
+
+    def wait_time(self, tokens: int = 0) -> float:
+        """Seconds until a request of `tokens` passes the pause and the RPM/TPM buckets"""
+        wait = self.paused_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.delay_for(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.delay_for(tokens))
+        return max(wait, 0.0)
+
+    async def acquire(self, tokens: int = 0):
+        async with self._condition:
+            while True:
+                wait = self.wait_time(tokens)
+                if wait <= 0 and self.in_flight < self.limit:
+                    break
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._condition.wait()
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(tokens)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0):
+        """Hold one concurrency slot (and the RPM/TPM budget for it) around a request"""
+        await self.acquire(tokens)
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None,
+                   reserved_tokens: int = 0, used_tokens: Optional[int] = None,
+                   completion_tokens: Optional[int] = None):
+        """Additive increase, plus bucket reconciliation from usage and headers"""
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+        if completion_tokens is not None:
+            # Exponential moving average of completion length for future reservations
+            self.expected_completion_tokens = 0.9 * self.expected_completion_tokens + 0.1 * completion_tokens
+        if self.tokens is not None and used_tokens is not None:
+            self.tokens.consume(used_tokens - reserved_tokens)
+        if headers:
+            self.update_from_headers(headers)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None, headers: Optional[Mapping[str, str]] = None):
+        """Multiplicative decrease and a shared pause, so one 429 burst does not become a retry storm"""
+        now = time.monotonic()
+        self.rate_limited_count += 1
+        pause = retry_after if retry_after is not None else 1.0
+        # Only back off once per burst: 429s that arrive together count as one congestion signal
+        if now - self._last_decrease > max(pause, 1.0):
+            self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease_factor)
+            self._last_decrease = now
+        self.paused_until = max(self.paused_until, now + pause)
+        if headers:
+            self.update_from_headers(headers)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Adopt the quota the server reports in the x-ratelimit-* headers"""
+        for kind in ("requests", "tokens"):
+            limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+            remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+            bucket = getattr(self, kind)
+            if limit:
+                if bucket is None:
+                    bucket = TokenBucket(limit)
+                    setattr(self, kind, bucket)
+                else:
+                    bucket.set_limit(limit)
+            if bucket is not None and remaining is not None:
+                bucket.sync_remaining(remaining)
+                if remaining <= 0:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self.paused_until = max(self.paused_until, time.monotonic() + reset)
+
+    def describe(self) -> str:
+        rpm = f"{self.requests.capacity:.0f}" if self.requests else "?"
+        tpm = f"{self.tokens.capacity:.0f}" if self.tokens else "?"
+        return f"concurrency {self.limit}/{self.max_concurrency}, rpm {rpm}, tpm {tpm}, 429s {self.rate_limited_count}"
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
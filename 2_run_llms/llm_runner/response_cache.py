@@ -0,0 +1,159 @@
+"""
+Content-addressed on-disk cache of chat completions
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+CACHE_PATH = '.llm_cache/responses.sqlite'
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Cache hits whose access time is written in one batch
+TOUCH_BATCH = 256
+
+
+def make_cache_key(base_url: Optional[str], model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """Hash of everything that determines a completion: endpoint, model, full message list and sampling parameters"""
+    payload = {
+        "base_url": base_url,
+        "model": model,
+        "messages": messages,
+        "params": {k: params.get(k) for k in sorted(params)},
+    }
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache with single-flight dedupe of identical in-flight requests.
+
+    Values are small JSON records (completion text, finish_reason, usage).
+    When the stored total exceeds `max_bytes` the least recently used
+    entries are evicted. Reads do not write: the access time of a hit is
+    kept in memory and stored with the next put, every TOUCH_BATCH hits,
+    or on close, so a re-run served from the cache costs no commit per text.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # key -> last access time not yet written
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self._write_touches()
+            self._db.commit()
+        return json.loads(row[0])
+
+    def _write_touches(self):
+        if self._touched:
+            self._db.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def put(self, key: str, value: Dict[str, Any]):
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode('utf-8'))
+        old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, encoded, size, time.time()),
+        )
+        self.total_bytes += size - (old[0] if old else 0)
+        self._touched.pop(key, None)
+        # Eviction must see the hits since the last write, or it would drop entries that were just read
+        self._write_touches()
+        self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                           refresh: bool = False) -> Dict[str, Any]:
+        """Return the cached value, or run `fetch` once even if several callers ask at the same time.
+
+        Values that did not come from this caller's own API call are marked
+        with "cache_hit": True. If the caller whose call was being shared is
+        cancelled, the others fetch again themselves (the first one to wake
+        up does, and the rest share its call).
+        """
+        if not refresh:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return {**cached, "cache_hit": True}
+        while key in self._in_flight:
+            leader = self._in_flight[key]
+            try:
+                value = await asyncio.shield(leader)
+            except asyncio.CancelledError:
+                if not leader.cancelled():
+                    raise  # This caller was cancelled, not the one it was waiting for
+                continue
+            self.coalesced += 1
+            return {**value, "cache_hit": True}
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so lone requests do not log "never retrieved"
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            # A failover endpoint's answer comes from another model than the key names
+            if not value.get("failover"):
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def describe(self) -> str:
+        return (f"{self.hits} hits, {self.misses} misses, {self.coalesced} coalesced, "
+                f"{self.total_bytes / 1024 / 1024:.1f} MB on disk")
+
+    def close(self):
+        self._write_touches()
+        self._db.commit()
+        self._db.close()
@@ -0,0 +1,184 @@
+"""
+Hash-indexed resume: which dataset items already have a usable result
+"""
+
+import json
+import sqlite3
+import hashlib
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+# RL_Types values that mean "no usable answer yet"; such rows are re-queued on resume
+FAILED_LABELS = {"ERROR", "PARSE_ERROR_NO_MARKER"}
+
+# Bookkeeping fields kept in the journal but not written to the output CSV
+INTERNAL_FIELDS = ("key", "comment_id", "index")
+
+
+def text_hash(text: str) -> str:
+    """Stable content hash of an input text"""
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """One dataset row to classify"""
+    index: int
+    comment_id: str
+    text: str
+
+    @property
+    def key(self) -> str:
+        # comment_id pins the row, the hash notices if its text was edited since the last run
+        return f"{self.comment_id}:{text_hash(self.text)}"
+
+
+def is_failed(record: Dict[str, Any]) -> bool:
+    return record.get("RL_Types") in FAILED_LABELS
+
+
+class KeyView:
+    """Read-only set of index keys, answered by a query of the index's store.
+
+    Passed where a container of keys is expected (iter_pending, the
+    refresh set, WorkQueue.leased_items), so no second copy of the keys
+    is built.
+    """
+
+    def __init__(self, store: sqlite3.Connection, contains: str, count: str):
+        self._store = store
+        self._contains = contains
+        self._count = count
+
+    def __contains__(self, key: str) -> bool:
+        return self._store.execute(self._contains, (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._store.execute(self._count).fetchone()[0]
+
+
+class ResumeIndex:
+    """O(1) lookup of finished results by item key.
+
+    Results come from two places: the compacted CSV of an earlier run (which
+    has no keys, so rows are matched to items by text hash, duplicates in
+    dataset order) and the journal of an interrupted run (which has keys).
+    Later results overwrite earlier ones, so a journal entry supersedes the
+    CSV row it repaired.
+
+    The item keys (in dataset order), the stored results and which items
+    are selected to run all live in one temporary SQLite file; texts stay
+    in the dataset file. Nothing that grows with the dataset is kept in
+    memory, and the keys exist once, on disk, until the index is closed.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.dropped = 0
+        self._columns: Dict[str, None] = {}
+        # An empty name is a private on-disk database, deleted when it is closed. Views of it are also read
+        # from the thread that enqueues pending items into a WorkQueue, never while the index is written
+        self._store = sqlite3.connect("", check_same_thread=False)
+        self._store.executescript("""
+            CREATE TABLE items (position INTEGER PRIMARY KEY, key TEXT NOT NULL, hash TEXT NOT NULL,
+                                matched INTEGER NOT NULL DEFAULT 0, selected INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE results (key TEXT PRIMARY KEY, record TEXT NOT NULL, failed INTEGER NOT NULL);
+        """)
+        # The key ends with the text hash, which the CSV rows are matched by
+        self._store.executemany("INSERT INTO items (key, hash) VALUES (?, ?)",
+                                ((key, key.rsplit(":", 1)[-1]) for key in keys))
+        self._store.executescript("""
+            CREATE INDEX items_key ON items (key);
+            CREATE INDEX items_hash ON items (hash, matched, position);
+        """)
+        self._size = self._store.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        self.stored = KeyView(self._store, "SELECT 1 FROM results WHERE key = ?", "SELECT COUNT(*) FROM results")
+        self.selected = KeyView(self._store, "SELECT 1 FROM items WHERE key = ? AND selected LIMIT 1",
+                                "SELECT COUNT(*) FROM items WHERE selected")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        return self._store.execute("SELECT 1 FROM items WHERE key = ? LIMIT 1", (key,)).fetchone() is not None
+
+    def add(self, key: str, record: Dict[str, Any]):
+        self._store.execute("INSERT OR REPLACE INTO results (key, record, failed) VALUES (?, ?, ?)",
+                            (key, json.dumps(record, ensure_ascii=False, default=str), is_failed(record)))
+        self._columns.update((k, None) for k in record if k not in INTERNAL_FIELDS)
+
+    def load_csv_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Attach rows of an existing output CSV to dataset items; returns how many rows were read"""
+        count = 0
+        for count, row in enumerate(rows, start=1):
+            # The first item with this text not matched yet, in dataset order
+            match = self._store.execute(
+                "SELECT position, key FROM items WHERE hash = ? AND NOT matched ORDER BY position LIMIT 1",
+                (text_hash(row.get("Original_Input_Text")),)).fetchone()
+            if match is None:
+                # Text no longer in the dataset (or more copies than the dataset has)
+                self.dropped += 1
+                continue
+            position, key = match
+            self._store.execute("UPDATE items SET matched = 1 WHERE position = ?", (position,))
+            self.add(key, row)
+        return count
+
+    def load_journal(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Attach journal records (which carry their key); returns how many were read"""
+        count = 0
+        for count, record in enumerate(records, start=1):
+            key = record.get("key")
+            if key is None or key not in self:
+                # Unkeyed, or for a row since removed from the dataset (or whose text was edited)
+                self.dropped += 1
+                continue
+            self.add(key, record)
+        return count
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._store.execute("SELECT record FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def is_done(self, key: str) -> bool:
+        row = self._store.execute("SELECT failed FROM results WHERE key = ?", (key,)).fetchone()
+        return row is not None and not row[0]
+
+    def select_pending(self, retry_failed: bool = True) -> int:
+        """Select keys with no result yet, plus (by default) keys whose last result failed; returns how many"""
+        done = "SELECT key FROM results" + (" WHERE NOT failed" if retry_failed else "")
+        return self._select(f"key NOT IN ({done})")
+
+    def select_failed(self) -> int:
+        """Select keys whose stored result is ERROR/PARSE_ERROR_NO_MARKER; returns how many"""
+        return self._select("key IN (SELECT key FROM results WHERE failed)")
+
+    def _select(self, condition: str) -> int:
+        self._store.execute(f"UPDATE items SET selected = ({condition})")
+        return len(self.selected)
+
+    def deselect(self, key: str) -> int:
+        """Leave `key` out of the selection; returns how many items it removed"""
+        return self._store.execute("UPDATE items SET selected = 0 WHERE key = ? AND selected", (key,)).rowcount
+
+    def iter_selected(self) -> Iterator[str]:
+        """Selected keys in dataset order"""
+        for (key,) in self._store.execute("SELECT key FROM items WHERE selected ORDER BY position"):
+            yield key
+
+    def failed_count(self) -> int:
+        return self._store.execute("SELECT COUNT(*) FROM results WHERE failed").fetchone()[0]
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Output rows in dataset order, without bookkeeping fields, one at a time"""
+        for (record,) in self._store.execute("SELECT record FROM items JOIN results USING (key) ORDER BY position"):
+            yield {k: v for k, v in json.loads(record).items() if k not in INTERNAL_FIELDS}
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return list(self.iter_rows())
+
+    def columns(self) -> List[str]:
+        """Every output column over all results, in order of first appearance"""
+        return list(self._columns)
+
+    def close(self):
+        self._store.close()
@@ -0,0 +1,239 @@
+"""
+Cost- and latency-aware routing of texts across several provider backends
+"""
+
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Tuple, AsyncIterator
+
+from .prompts import generate_prompt
+from .providers import ProviderBackend, ProviderConfig
+from .rate_limit import estimate_tokens
+from .scheduling import text_tokens
+from .telemetry import percentile
+
+# Job.provider of a routed run; its results go to routed_{method}[_en].csv
+ROUTED = "routed"
+
+
+class Route:
+    """One candidate backend and what the router has seen of it"""
+
+    def __init__(self, backend: ProviderBackend, window: float):
+        self.backend = backend
+        self.window = window
+        self.latencies = deque()  # (finished at, requests in flight when sent, seconds) of recent answered dispatches
+        self.failures = deque()   # When recent dispatches that got no answer finished
+        self.in_flight: List[float] = []  # Start times of unfinished dispatches
+        self.dispatched = 0
+        self.failed = 0
+        self.estimated_cost = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.backend.config.name
+
+    @property
+    def outstanding(self) -> int:
+        return len(self.in_flight)
+
+    def oldest_age(self) -> float:
+        """Seconds the oldest unfinished dispatch has been running, which shows queueing on the server at once"""
+        return time.monotonic() - min(self.in_flight) if self.in_flight else 0.0
+
+    def recent(self) -> List[Tuple[int, float]]:
+        """(load, latency) of the last `window` seconds; older ones no longer describe the backend"""
+        cutoff = time.monotonic() - self.window
+        while self.latencies and self.latencies[0][0] < cutoff:
+            self.latencies.popleft()
+        return [(load, latency) for _, load, latency in self.latencies]
+
+    def recent_failures(self) -> int:
+        cutoff = time.monotonic() - self.window
+        while self.failures and self.failures[0] < cutoff:
+            self.failures.popleft()
+        return len(self.failures)
+
+
+class Dispatch:
+    """One request sent through the router: the backend to send it with, and whether it got an answer"""
+
+    def __init__(self, backend: ProviderBackend):
+        self.backend = backend
+        self.ok = True
+
+
+class RoutedPool:
+    """The candidates' key pools seen as one, for the runner's worker count and progress lines"""
+
+    def __init__(self, routes: List[Route]):
+        self.routes = routes
+
+    @property
+    def max_concurrency(self) -> int:
+        return sum(route.backend.keys.max_concurrency for route in self.routes)
+
+    def describe(self) -> str:
+        return "; ".join(f"{route.name}: {route.backend.keys.describe()}" for route in self.routes)
+
+
+class Router:
+    """Sends each request to the cheapest candidate expected to answer within the latency SLO.
+
+    Cost is estimated from the PROVIDERS prices: the static prompt prefix
+    at the cached input price, the text at the input price, and the
+    backend's running average completion length at the output price.
+    Expected latency is the `quantile` latency of the backend's recent
+    dispatches (queueing included) that were sent with about as many
+    requests in flight as a new one would be, so the router learns how
+    much load each backend takes within the SLO, whether its limit is a
+    rate limit or a GPU server's batch size. The wait its rate limiters
+    report is added, and it is never less than the age of the oldest
+    unfinished request, which rises as soon as a server starts queueing.
+    Only answered dispatches are latency samples: a failed one says
+    nothing about how fast the backend answers. A backend with fewer than
+    `min_samples` recent samples is assumed to meet the SLO for up to
+    `min_samples` requests at a time, its recent failures included, so the
+    router learns its latency without flooding it first and stops sending
+    to one that only fails. When no candidate meets the SLO the fastest (or least
+    loaded) one is used. Backends with an open circuit breaker and no
+    failover are skipped.
+
+    It stands in for a ProviderBackend in run_job: requests are sent
+    through the chosen backend itself, so rate limits, caching, hedging
+    and telemetry prices stay per backend.
+    """
+
+    def __init__(self, backends: List[ProviderBackend], slo: Optional[float] = None, max_tier: Optional[int] = None,
+                 quantile: float = 95, min_samples: int = 5, window: float = 120.0):
+        eligible = [backend for backend in backends if max_tier is None or backend.config.quality_tier <= max_tier]
+        if not eligible:
+            raise ValueError(f"No route candidate has quality tier {max_tier} or better")
+        self.routes = [Route(backend, window) for backend in eligible]
+        self.slo = slo
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.over_slo = 0
+        self._prefix_tokens: Dict[Tuple, int] = {}
+        names = ", ".join(route.name for route in self.routes)
+        self.config = ProviderConfig(name=ROUTED, display_name=f"Router ({names})", model=ROUTED, api_key_env="")
+        self.keys = RoutedPool(self.routes)
+        # Kept by the candidate backends; run_job reports them per backend in describe()
+        self.cache = None
+        self.hedger = None
+        self.breaker = None
+        self.budget = None
+
+    def prompt_tokens(self, job, texts: List[str]) -> Tuple[int, int]:
+        """Estimated (static prefix, text) prompt tokens of one request of `job` carrying `texts`"""
+        prefix_key = (job.mode, job.language, job.structured)
+        if prefix_key not in self._prefix_tokens:
+            self._prefix_tokens[prefix_key] = estimate_tokens(
+                generate_prompt("", job.mode, job.language, structured=job.structured))
+        return self._prefix_tokens[prefix_key], sum(text_tokens(text) for text in texts)
+
+    def estimate_cost(self, route: Route, job, texts: List[str]) -> float:
+        """USD for one request of `texts` on this backend, at its PROVIDERS prices"""
+        config = route.backend.config
+        prefix, body = self.prompt_tokens(job, texts)
+        keys = route.backend.keys.active or route.backend.keys.keys
+        completion = sum(key.limiter.expected_completion_tokens for key in keys) / len(keys)
+        # Separate sample requests each pay for the prompt; n samples share one prefill
+        prompts = job.samples if job.samples > 1 and not config.supports_n else 1
+        return (prompts * (prefix * config.cached_input_price + body * config.input_price)
+                + job.samples * completion * config.output_price) / 1_000_000
+
+    def expected_latency(self, route: Route, tokens: int) -> float:
+        samples = route.recent()
+        if len(samples) < self.min_samples:
+            learning = route.outstanding + route.recent_failures() < self.min_samples
+            return route.oldest_age() if learning else float("inf")
+        # The samples sent at the nearest load, preferring heavier loads on ties; beyond the heaviest
+        # load seen so far this is the heaviest one, so load grows a step at a time while within the SLO
+        load = route.outstanding + 1
+        nearest = sorted(samples, key=lambda sample: (abs(sample[0] - load), -sample[0]))[:2 * self.min_samples]
+        latency = percentile([latency for _, latency in nearest], self.quantile)
+        waits = [key.limiter.wait_time(tokens) for key in route.backend.keys.active]
+        return max(latency + (min(waits) if waits else 0.0), route.oldest_age())
+
+    def usable(self, route: Route, job) -> bool:
+        backend = route.backend
+        if not backend.keys.active:
+            return False
+        if job.scoring and not backend.config.supports_logprobs:
+            return False
+        return backend.breaker is None or not backend.breaker.is_open or backend.failover is not None
+
+    def choose(self, job, texts: List[str]) -> Route:
+        """The cheapest usable route expected within the SLO, else the fastest"""
+        routes = [route for route in self.routes if self.usable(route, job)]
+        if not routes:
+            raise RuntimeError(f"No usable backend to route {job.label} to")
+        prefix, body = self.prompt_tokens(job, texts)
+        options = [(self.estimate_cost(route, job, texts), self.expected_latency(route, prefix + body), route)
+                   for route in routes]
+        within = [option for option in options if self.slo is None or option[1] <= self.slo]
+        if within:
+            cost, _, route = min(within, key=lambda option: (option[0], option[1]))
+        else:
+            self.over_slo += 1
+            # Ties (backends still being learned) go to the least loaded one
+            cost, _, route = min(options, key=lambda option: (option[1], option[2].outstanding, option[0]))
+        route.estimated_cost += cost
+        return route
+
+    @asynccontextmanager
+    async def dispatch(self, job, texts: List[str]) -> AsyncIterator[Dispatch]:
+        """Choose the backend for one request of `texts` and time it.
+
+        The caller sends the request through the yielded Dispatch's backend
+        and clears its `ok` if there was no answer. A request abandoned with
+        an exception (cancelled, over budget) counts neither way.
+        """
+        route = self.choose(job, texts)
+        route.dispatched += 1
+        start = time.monotonic()
+        route.in_flight.append(start)
+        load = route.outstanding
+        sent = Dispatch(route.backend)
+        try:
+            yield sent
+        finally:
+            route.in_flight.remove(start)
+        now = time.monotonic()
+        if sent.ok:
+            route.latencies.append((now, load, now - start))
+        else:
+            route.failed += 1
+            route.failures.append(now)
+
+    def describe(self) -> str:
+        parts = []
+        for route in self.routes:
+            latencies = [latency for _, latency in route.recent()]
+            latency = f", p50 {percentile(latencies, 50):.2f}s" if latencies else ""
+            failed = f", {route.failed} failed" if route.failed else ""
+            parts.append(f"{route.name} {route.dispatched} requests{failed} (~${route.estimated_cost:.4f}{latency})")
+        slo = f"SLO {self.slo:g}s, {self.over_slo} over" if self.slo is not None else "no SLO"
+        return f"{slo}; " + ", ".join(parts)
+
+
+_router: Optional[Router] = None
+
+
+def get_router(backends: Optional[List[ProviderBackend]] = None, slo: Optional[float] = None,
+               max_tier: Optional[int] = None) -> Router:
+    """Return the shared router of routed jobs, creating it over `backends` on first use"""
+    global _router
+    if _router is None:
+        if not backends:
+            raise ValueError("Routed jobs need route candidates (--route)")
+        _router = Router(backends, slo=slo, max_tier=max_tier)
+    return _router
+
+
+def close_router():
+    """Forget the shared router at the end of a run; its backends are closed with the others by close_backends()"""
+    global _router
+    _router = None
@@ -0,0 +1,803 @@
+"""
+Async pipeline: generate_prompt -> provider backend -> parse_output -> llm_outputs/*.csv
+"""
+
+import os
+import time
+import signal
+import asyncio
+import inspect
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (List, Dict, Any, Optional, Callable, Container, Tuple, Union, Iterable, Iterator,
+                    AsyncIterable, AsyncIterator)
+
+import pandas as pd
+
+from .prompts import (generate_prompt, generate_followup, parse_output, parse_structured_output, get_prompt_pack,
+                      find_label_end, label_schema)
+from .providers import ProviderBackend, get_backend, close_backends
+from .checkpoint import ResultJournal, AttemptHistory, journal_path, attempts_path, write_csv_atomic
+from .resume import ResumeIndex, WorkItem, FAILED_LABELS
+from .response_cache import ResponseCache, CACHE_PATH, CACHE_MAX_BYTES
+from .voting import vote, format_fractions
+from .scoring import Calibration, calibration_path, score_text
+from .packing import generate_packed_prompt, parse_packed_output
+from .work_queue import WorkQueue, LEASE_SECONDS
+from .transport import TransportConfig, http2_available
+from .hedging import Hedger
+from .circuit_breaker import CircuitBreaker
+from .routing import Router, Dispatch, ROUTED, get_router, close_router
+from .scheduling import schedule
+from .prefix_cache import PrefixCacheReport, cached_prompt_tokens, prefix_fingerprint
+from .telemetry import (Budget, BudgetExceeded, TelemetryLog, telemetry_path, request_cost,
+                        format_summary, print_run_summary)
+
+DATASET_PATH = '../0_data_collection/dataset.csv'
+OUTPUT_DIR = 'llm_outputs'
+# Rows read from the dataset at a time
+DATASET_CHUNK_ROWS = 10_000
+# Work items queued ahead of the workers, per worker
+QUEUE_DEPTH_PER_WORKER = 2
+
+
+@dataclass(frozen=True)
+class Job:
+    """One (provider, mode, language) sweep over the dataset"""
+    provider: str
+    mode: str
+    language: str = "zh"
+    # Schema-constrained JSON answers instead of free text (no_cot only)
+    structured: bool = False
+    # Self-consistency: answers sampled per text, and the vote share a label needs to be kept
+    samples: int = 1
+    vote_threshold: float = 0.5
+    # Label scoring from logprobs instead of generation (no_cot only): "choice" or "binary"
+    scoring: Optional[str] = None
+    score_threshold: Optional[float] = None
+    # Texts per request; missing answers fall back to one request per text
+    pack_size: int = 1
+
+    @property
+    def variant(self) -> str:
+        """File name part for non-default runs, e.g. _structured, _scored, _sc5 or _pack4"""
+        variant = "_structured" if self.structured else ""
+        if self.scoring:
+            variant += "_scored" if self.scoring == "choice" else f"_scored_{self.scoring}"
+        if self.samples > 1:
+            variant += f"_sc{self.samples}"
+            if self.vote_threshold != 0.5:
+                variant += f"_t{round(self.vote_threshold * 100)}"
+        if self.pack_size > 1:
+            variant += f"_pack{self.pack_size}"
+        return variant
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}/{self.mode}{self.variant.replace('_', '+')}/{self.language}"
+
+    def output_filename(self, output_dir: str = OUTPUT_DIR) -> str:
+        # Variants get their own file, e.g. gpt41_no_cot_structured.csv, and column in the evaluation
+        suffix = get_prompt_pack(self.language).output_suffix
+        return os.path.join(output_dir, f"{self.provider}_{self.mode}{self.variant}{suffix}.csv")
+
+
+def iter_dataset(path: str = DATASET_PATH, chunksize: int = DATASET_CHUNK_ROWS) -> Iterator[WorkItem]:
+    """Stream the dataset (CSV, or JSONL with .jsonl/.json) as WorkItems, `chunksize` rows at a time.
+
+    Only the comment_id and text columns are kept, so memory per chunk does
+    not depend on how many other columns the dump has.
+    """
+    if path.endswith(('.jsonl', '.json')):
+        chunks = pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize, usecols=lambda column: column in ('comment_id', 'text'))
+    index = 0
+    for chunk in chunks:
+        if 'comment_id' in chunk.columns:
+            comment_ids = chunk['comment_id'].astype(str).tolist()
+        else:
+            comment_ids = [str(i) for i in range(index, index + len(chunk))]
+        for comment_id, text in zip(comment_ids, chunk['text'].tolist()):
+            yield WorkItem(index=index, comment_id=comment_id, text=text)
+            index += 1
+
+
+def dataset_keys(path: str = DATASET_PATH) -> Iterator[str]:
+    """Item keys of the dataset in order, streamed; texts are not kept"""
+    return (item.key for item in iter_dataset(path))
+
+
+def iter_pending(path: str, keys: Union[Container[str], Iterable[str]]) -> Iterator[WorkItem]:
+    """Stream the dataset again, yielding only the items whose key is in `keys`.
+
+    `keys` is a container such as a view of a ResumeIndex, used as is, or
+    any iterable of keys, which is turned into a set first.
+    """
+    if not isinstance(keys, Container):
+        keys = set(keys)
+    return (item for item in iter_dataset(path) if item.key in keys)
+
+
+async def process_single_text(backend: ProviderBackend, job: Job, text: str, index: int, total: int,
+                              refresh: bool = False, report: Optional[PrefixCacheReport] = None,
+                              telemetry: Optional[TelemetryLog] = None, key: Optional[str] = None,
+                              followup: bool = True) -> Dict[str, Any]:
+    """Process a single text asynchronously"""
+    stats = {}
+    completion = None
+    error = None
+    start_time = time.monotonic()
+    try:
+        if job.scoring:
+            result, completion = await score_text(backend, text, job.language, job.scoring, job.score_threshold,
+                                                  refresh=refresh, stats=stats)
+            tag_served_by(result, completion)
+            print(f"  [{job.label}] Processed {index + 1}/{total}: {result['RL_Types']}")
+            return result
+
+        messages = generate_prompt(text, job.mode, job.language, structured=job.structured)
+        if report is not None:
+            report.check_prefix(messages)
+        completion = await backend.complete(messages, refresh=refresh, stats=stats,
+                                            stop_at=lambda output: find_label_end(output, job.language),
+                                            schema=label_schema(job.language) if job.structured else None,
+                                            n=job.samples)
+        usage = completion.get("usage") or {}
+        if report is not None and not completion.get("cache_hit") and not usage.get("estimated"):
+            report.record(usage)
+        if job.samples > 1:
+            result = make_voted_result(text, [choice["content"] for choice in completion["choices"]], job)
+        else:
+            result = make_result(text, completion["content"], job.language, job.structured)
+        if followup and not job.structured and job.samples == 1 and result["RL_Types"] == "PARSE_ERROR_NO_MARKER":
+            result = await request_followup(backend, job, messages, completion, result, refresh, telemetry, key)
+        tag_served_by(result, completion)
+
+        print(f"  [{job.label}] Processed {index + 1}/{total}: {result['RL_Types']}")
+
+        return result
+
+    except BudgetExceeded:
+        raise
+
+    except Exception as e:
+        error = e
+        print(f"[{job.label}] Error processing text {index + 1}: {e}")
+        return {
+            "Original_Input_Text": text,
+            "RL_Types": "ERROR",
+            "Raw_Model_Output": str(e)
+        }
+
+    finally:
+        if telemetry is not None and (completion is not None or error is not None):
+            record_telemetry(backend, job, telemetry, key, time.monotonic() - start_time, stats, completion, error)
+
+
+async def process_packed_texts(backend: ProviderBackend, job: Job, items: List[WorkItem], start: int, total: int,
+                               refresh: bool = False, report: Optional[PrefixCacheReport] = None,
+                               telemetry: Optional[TelemetryLog] = None) -> List[Optional[Dict[str, Any]]]:
+    """Classify several texts with one request.
+
+    Returns one result per item, None for items the answer has no usable
+    line for (or every item if the request failed); the caller re-runs
+    those one by one. Each packed row keeps the whole answer as its raw
+    output and its place in the pack in Pack_Position.
+    """
+    stats = {}
+    completion = None
+    error = None
+    start_time = time.monotonic()
+    messages = generate_packed_prompt([item.text for item in items], job.mode, job.language)
+    try:
+        if report is not None:
+            report.check_prefix(messages)
+        completion = await backend.complete(messages, refresh=refresh, stats=stats)
+        usage = completion.get("usage") or {}
+        if report is not None and not completion.get("cache_hit") and not usage.get("estimated"):
+            report.record(usage)
+        labels = parse_packed_output(completion["content"], len(items), job.language)
+    except BudgetExceeded:
+        raise
+    except Exception as e:
+        error = e
+        print(f"[{job.label}] Error processing texts {start + 1}-{start + len(items)}: {e}")
+        return [None] * len(items)
+    finally:
+        if telemetry is not None and (completion is not None or error is not None):
+            record_telemetry(backend, job, telemetry, items[0].key, time.monotonic() - start_time, stats,
+                             completion, error, packed=len(items))
+
+    missing = labels.count(None)
+    if missing:
+        print(f"  [{job.label}] {missing}/{len(items)} answers missing from texts {start + 1}-{start + len(items)}, "
+              f"re-running them one by one")
+    return [None if label is None else tag_served_by({
+        "Original_Input_Text": item.text,
+        "RL_Types": label,
+        "Raw_Model_Output": completion["content"],
+        "Pack_Position": f"{position + 1}/{len(items)}",
+    }, completion) for position, (item, label) in enumerate(zip(items, labels))]
+
+
+def tag_served_by(result: Dict[str, Any], completion: Dict[str, Any]) -> Dict[str, Any]:
+    """Add a Served_By column (model@host) when the provider has a failover endpoint"""
+    if completion.get("served_by"):
+        result["Served_By"] = completion["served_by"]
+    return result
+
+
+async def request_followup(backend: ProviderBackend, job: Job, messages: List[Dict[str, str]],
+                           completion: Dict[str, Any], result: Dict[str, Any], refresh: bool = False,
+                           telemetry: Optional[TelemetryLog] = None, key: Optional[str] = None) -> Dict[str, Any]:
+    """Recover the label of a truncated or marker-less answer with one short follow-up turn.
+
+    Instead of regenerating the whole chain of thought, the answer is kept
+    as an assistant turn and the model is asked for the final labels only.
+    The stored raw output is the original answer followed by the follow-up
+    answer. If the follow-up fails, the original result is kept.
+    """
+    stats = {}
+    followup_completion = None
+    error = None
+    start_time = time.monotonic()
+    try:
+        followup_completion = await backend.complete(
+            generate_followup(messages, completion["content"], job.language), refresh=refresh, stats=stats,
+            max_tokens=backend.config.followup_max_tokens, prefix_key=prefix_fingerprint(messages))
+        output = f"{completion['content']}\n\n{followup_completion['content']}"
+        return {
+            "Original_Input_Text": result["Original_Input_Text"],
+            "RL_Types": parse_output(followup_completion["content"], job.language),
+            "Raw_Model_Output": output,
+        }
+    except BudgetExceeded:
+        return result
+    except Exception as e:
+        error = e
+        print(f"[{job.label}] Follow-up for truncated answer failed: {e}")
+        return result
+    finally:
+        if telemetry is not None and (followup_completion is not None or error is not None):
+            record_telemetry(backend, job, telemetry, key, time.monotonic() - start_time, stats,
+                             followup_completion, error, followup=True)
+
+
+def record_telemetry(backend: ProviderBackend, job: Job, telemetry: TelemetryLog, key: Optional[str],
+                     latency: float, stats: Dict[str, Any], completion: Optional[Dict[str, Any]],
+                     error: Optional[Exception], followup: bool = False, packed: int = 1):
+    """Write one telemetry record and charge its tokens and cost to the budget.
+
+    A packed request is recorded once, under the key of its first item,
+    with the number of texts it carried in `packed`.
+    """
+    config = backend.config
+    cache_hit = bool(completion and completion.get("cache_hit"))
+    usage = completion.get("usage") if completion and not cache_hit else None
+    cost = request_cost(usage, config.input_price, config.cached_input_price, config.output_price)
+    attempts = stats.get("attempts", 0)
+    telemetry.append({
+        "key": key,
+        "provider": config.name,
+        "model": config.model,
+        "mode": job.mode,
+        "language": job.language,
+        "status": "ok" if error is None else "error",
+        "followup": followup,
+        "packed": packed,
+        "cache_hit": cache_hit,
+        "latency_seconds": round(latency, 4),
+        "queue_seconds": round(stats.get("queue_seconds", 0.0), 4),
+        "attempts": attempts,
+        "retries": max(attempts - 1, 0),
+        "backoff_seconds": round(stats.get("backoff_seconds", 0.0), 4),
+        "hedged": bool(stats.get("hedged")),
+        "hedge_won": bool(stats.get("hedge_won")),
+        "served_by": completion.get("served_by") if completion else None,
+        "failover": bool(completion and completion.get("failover")),
+        "finish_reason": completion.get("finish_reason") if completion else None,
+        "prompt_tokens": usage.get("prompt_tokens") if usage else None,
+        "completion_tokens": usage.get("completion_tokens") if usage else None,
+        "cached_tokens": cached_prompt_tokens(usage) if usage else None,
+        "usage_estimated": bool(usage and usage.get("estimated")),
+        "cost": round(cost, 8),
+        "error": str(error)[:200] if error is not None else None,
+    })
+    if backend.budget is not None and usage:
+        backend.budget.add(int(usage.get("total_tokens") or 0), cost)
+
+
+async def iterate(items: Union[Iterable[WorkItem], AsyncIterable[WorkItem]]) -> AsyncIterator[WorkItem]:
+    """Items of a plain or an async iterable (e.g. leases from a shared WorkQueue)"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def process_batch_async(backend: Union[ProviderBackend, Router], job: Job,
+                              items: Union[Iterable[WorkItem], AsyncIterable[WorkItem]],
+                              on_result: Optional[Callable[[WorkItem, Dict[str, Any]], Any]] = None,
+                              refresh_keys: Optional[Container[str]] = None,
+                              report: Optional[PrefixCacheReport] = None,
+                              telemetry: Optional[TelemetryLog] = None,
+                              followup: bool = True, total: Optional[int] = None,
+                              workers: Optional[int] = None) -> int:
+    """Process texts through a bounded producer/worker/writer pipeline; returns the number processed.
+
+    A producer feeds `items` (any iterable, e.g. a streamed dataset, or an
+    async iterable such as WorkQueue leases) into a bounded queue, a fixed
+    pool of `workers` (default: the provider's concurrency ceiling) takes
+    them off it, and a single writer task passes every finished result to
+    `on_result(item, result)` (a function or a coroutine function) as it
+    arrives. Memory for work in flight
+    therefore stays the same however many items there are; pacing is left
+    to the provider's shared rate limiter.
+
+    Items whose key is in `refresh_keys` bypass the response cache. Once
+    the budget runs out no new items are started and the rest stay pending.
+    With `job.pack_size > 1` consecutive items share one packed request and
+    only the ones it has no answer for get a request of their own.
+
+    With a Router as `backend`, every request goes to the backend it picks
+    and each row records that backend in Served_By.
+    """
+    refresh_keys = refresh_keys or set()
+    router = backend if isinstance(backend, Router) else None
+
+    @asynccontextmanager
+    async def dispatch(texts: List[str]) -> AsyncIterator[Dispatch]:
+        if router is None:
+            yield Dispatch(backend)
+        else:
+            async with router.dispatch(job, texts) as sent:
+                yield sent
+
+    def tag_route(result: Dict[str, Any], target: ProviderBackend) -> Dict[str, Any]:
+        if router is not None:
+            result.setdefault("Served_By", target.endpoint)
+        return result
+
+    if total is None:
+        total = len(items) if hasattr(items, '__len__') else 0
+    workers = workers or backend.keys.max_concurrency
+    work = asyncio.Queue(maxsize=workers * QUEUE_DEPTH_PER_WORKER)
+    finished = asyncio.Queue(maxsize=workers * QUEUE_DEPTH_PER_WORKER)
+    processed = 0
+    skipped = 0
+    budget_reached = asyncio.Event()
+
+    async def produce():
+        chunk = []
+        position = 0
+        async for item in iterate(items):
+            if budget_reached.is_set():
+                break
+            chunk.append((position, item))
+            position += 1
+            if len(chunk) >= job.pack_size:
+                await work.put(chunk)
+                chunk = []
+        if chunk and not budget_reached.is_set():
+            await work.put(chunk)
+        for _ in range(workers):
+            await work.put(None)
+
+    async def process_one(position: int, item: WorkItem, packed: Optional[Dict[str, Any]] = None):
+        result = packed
+        if result is not None:
+            print(f"  [{job.label}] Processed {position + 1}/{total}: {result['RL_Types']}")
+        else:
+            try:
+                # Fallbacks use the single-text prompt, so they stay out of the packed prefix check
+                async with dispatch([item.text]) as sent:
+                    result = await process_single_text(sent.backend, job, item.text, position, total,
+                                                       refresh=item.key in refresh_keys,
+                                                       report=report if job.pack_size == 1 else None,
+                                                       telemetry=telemetry, key=item.key, followup=followup)
+                    # Failures come back as ERROR rows; their time is not the backend's latency
+                    sent.ok = result["RL_Types"] != "ERROR"
+                tag_route(result, sent.backend)
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"[{job.label}] Error processing text {position + 1}: {e}")
+                result = {"Original_Input_Text": item.text, "RL_Types": "ERROR", "Raw_Model_Output": str(e)}
+        await finished.put((item, result))
+
+    async def work_loop():
+        nonlocal skipped
+        while True:
+            chunk = await work.get()
+            if chunk is None:
+                return
+            if budget_reached.is_set():
+                skipped += len(chunk)
+                continue
+            try:
+                packed = [None] * len(chunk)
+                if job.pack_size > 1:
+                    async with dispatch([item.text for _, item in chunk]) as sent:
+                        packed = await process_packed_texts(
+                            sent.backend, job, [item for _, item in chunk], chunk[0][0], total,
+                            refresh=any(item.key in refresh_keys for _, item in chunk),
+                            report=report, telemetry=telemetry)
+                        sent.ok = any(result is not None for result in packed)
+                    packed = [result if result is None else tag_route(result, sent.backend) for result in packed]
+            except BudgetExceeded:
+                budget_reached.set()
+                skipped += len(chunk)
+                continue
+            outcomes = await asyncio.gather(*(process_one(position, item, result)
+                                              for (position, item), result in zip(chunk, packed)),
+                                            return_exceptions=True)
+            for outcome in outcomes:
+                if isinstance(outcome, BudgetExceeded):
+                    budget_reached.set()
+                    skipped += 1
+                elif isinstance(outcome, BaseException):
+                    raise outcome
+
+    async def write_loop():
+        nonlocal processed
+        while True:
+            entry = await finished.get()
+            if entry is None:
+                return
+            if on_result is not None:
+                outcome = on_result(*entry)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            processed += 1
+
+    print(f"[{job.label}] Processing {total or 'streamed'} texts with {workers} workers "
+          f"({backend.keys.describe()})...")
+    writer = asyncio.ensure_future(write_loop())
+    tasks = [asyncio.ensure_future(produce())] + [asyncio.ensure_future(work_loop()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+        await finished.put(None)
+        await writer
+    finally:
+        # On cancellation (SIGINT/SIGTERM) stop every stage; results already written stay in the journal
+        for task in tasks + [writer]:
+            task.cancel()
+
+    if budget_reached.is_set():
+        print(f"[{job.label}] Budget reached, {skipped} queued texts and any not yet read were left pending; "
+              f"rerun with a higher budget to continue")
+    return processed
+
+
+def load_resume_state(job: Job, keys: Iterable[str],
+                      output_dir: str = OUTPUT_DIR) -> Tuple[ResumeIndex, ResultJournal, bool]:
+    """Build the resume index from the existing output CSV and any journal left by an interrupted run.
+
+    `keys` are the item keys of the dataset in order (see dataset_keys);
+    the CSV and the journal are read a chunk or a line at a time.
+    """
+    # Check if output file already exists for resume functionality
+    output_filename = job.output_filename(output_dir)
+    journal = ResultJournal(journal_path(output_filename))
+    index = ResumeIndex(keys)
+
+    if os.path.exists(output_filename):
+        print(f"[{job.label}] Found existing results file: {output_filename}")
+        try:
+            chunks = pd.read_csv(output_filename, chunksize=DATASET_CHUNK_ROWS)
+            loaded = index.load_csv_rows(row for chunk in chunks for row in chunk.to_dict('records'))
+            print(f"[{job.label}] Loaded {loaded} existing results")
+        except Exception as e:
+            print(f"[{job.label}] Error reading existing file: {e}")
+
+    # Results that finished before an interrupted run was stopped
+    recovered = index.load_journal(journal.iter_records())
+    if recovered:
+        print(f"[{job.label}] Recovered {recovered} results from {journal.path}")
+
+    if index.dropped:
+        print(f"[{job.label}] Dropped {index.dropped} stored results whose text is no longer in the dataset")
+
+    return index, journal, bool(recovered)
+
+
+def print_summary(job: Job, all_results: Iterable[Dict[str, Any]]):
+    """Print summary statistics"""
+    # One pass, so the results can be streamed
+    counts = Counter(r['RL_Types'] if r['RL_Types'] in FAILED_LABELS else 'ok' for r in all_results)
+    print(f"Summary for {job.label}:")
+    print(f"  Total processed: {sum(counts.values())}")
+    print(f"  Successfully parsed: {counts['ok']}")
+    print(f"  Errors: {counts['ERROR']}")
+    print(f"  Parse errors: {counts['PARSE_ERROR_NO_MARKER']}")
+
+
+def make_result(text: str, output: str, language: str, structured: bool = False) -> Dict[str, Any]:
+    """Output row for one completed request"""
+    return {
+        "Original_Input_Text": text,
+        "RL_Types": parse_structured_output(output, language) if structured else parse_output(output, language),
+        "Raw_Model_Output": output
+    }
+
+
+def make_voted_result(text: str, outputs: List[str], job: Job) -> Dict[str, Any]:
+    """Output row for several sampled answers: voted RL_Types plus per-label vote fractions"""
+    samples = [make_result(text, output, job.language, job.structured)["RL_Types"] for output in outputs]
+    voted = vote(samples, job.language, job.vote_threshold)
+    return {
+        "Original_Input_Text": text,
+        "RL_Types": voted["RL_Types"],
+        "Raw_Model_Output": "\n\n".join(f"=== Sample {i + 1} ===\n{output}" for i, output in enumerate(outputs)),
+        "Vote_Fractions": format_fractions(voted["fractions"]),
+        "Votes": voted["votes"],
+    }
+
+
+async def run_job(job: Job, dataset_path: str = DATASET_PATH, output_dir: str = OUTPUT_DIR, retry_failed: bool = True,
+                  telemetry: Optional[TelemetryLog] = None, repair: bool = False, max_attempts: Optional[int] = None,
+                  followup: bool = True, queue: Optional[WorkQueue] = None, order: str = "dataset",
+                  buckets: int = 8):
+    """Run one (provider, mode, language) job with resume support.
+
+    Finished results are appended to a JSONL journal next to the output CSV
+    as they arrive; the journal is compacted into the CSV (in dataset order)
+    once the job completes, and replayed on restart if the run was cut short.
+    Items are matched to earlier results by comment_id plus a hash of their
+    text, and rows that ended in ERROR/PARSE_ERROR_NO_MARKER are re-queued.
+    Per-request telemetry goes to `telemetry` (a .telemetry.jsonl file next
+    to the output CSV by default).
+
+    With `repair=True` only rows of the existing CSV that failed are re-run
+    (missing rows are left alone); fixes are merged back in place and every
+    replaced result is kept in .attempts.jsonl. Rows already re-run
+    `max_attempts` times are not tried again.
+
+    With a shared `queue`, the pending items are added to it and this
+    process works on the ones it leases, alongside any other runner using
+    the same queue file. Results are stored in the queue instead of the
+    journal, and every runner writes the CSV from all results stored so
+    far, so whichever finishes last leaves the complete file.
+
+    `order` is the send order of pending texts (see scheduling.SCHEDULES);
+    the CSV is always written in dataset order. In dataset order the
+    pending items are streamed from `dataset_path` straight into the
+    workers; any other order has to hold the pending texts to sort them.
+    """
+    backend = get_router() if job.provider == ROUTED else get_backend(job.provider)
+    print(f"\n{'='*50}")
+    print(f"Processing {backend.config.display_name} with mode: {job.mode} ({job.language})")
+    print(f"{'='*50}")
+
+    output_filename = job.output_filename(output_dir)
+    index, journal, recovered = load_resume_state(job, dataset_keys(dataset_path), output_dir)
+    if queue is not None:
+        # Results other runners have stored but not yet written to the CSV
+        recovered = index.load_journal(queue.results(job.label)) > 0 or recovered
+
+    history = AttemptHistory(attempts_path(output_filename))
+    failed = index.failed_count()
+    if repair:
+        if not os.path.exists(output_filename) and not recovered:
+            print(f"[{job.label}] No results file to repair: {output_filename}")
+            index.close()
+            return
+        selected = index.select_failed()
+    else:
+        selected = index.select_pending(retry_failed=retry_failed)
+    if max_attempts is not None:
+        exhausted = sum(index.deselect(key) for key, count in history.attempts.items() if count >= max_attempts)
+        if exhausted:
+            print(f"[{job.label}] Not retrying {exhausted} rows that already failed {max_attempts} re-runs")
+            selected -= exhausted
+    if not selected:
+        print(f"[{job.label}] {'No failed rows to repair' if repair else 'All texts already processed'}, skipping...")
+        if recovered or index.dropped:
+            write_csv_atomic(index.iter_rows(), output_filename, columns=index.columns())
+            journal.remove()
+        index.close()
+        return
+    if repair:
+        print(f"[{job.label}] Repairing {selected} failed rows...")
+    elif selected < len(index):
+        requeued = f" (including {failed} failed rows)" if retry_failed and failed else ""
+        print(f"[{job.label}] Resuming with {selected} remaining texts{requeued}...")
+
+    # The index's views stand in for key sets, so the keys are never copied out of its store
+    items_to_process = iter_pending(dataset_path, index.selected)
+    if order != "dataset":
+        items_to_process = schedule(list(items_to_process), job, order, output_dir, buckets)
+
+    # Scored runs use the per-label calibration saved by llm_runner.calibrate, unless --score-threshold is given
+    calibration = None
+    if job.scoring and job.score_threshold is None:
+        calibration = Calibration.load(calibration_path(output_filename))
+        if calibration is not None:
+            print(f"[{job.label}] Calibrated thresholds: {calibration.describe()}")
+
+    async def checkpoint(item: WorkItem, result: Dict[str, Any]):
+        if calibration is not None:
+            result = calibration.apply(result)
+        record = {"key": item.key, "comment_id": item.comment_id, **result}
+        previous = index.get(item.key)
+        if queue is not None:
+            # Off the event loop: another runner holding the queue's write lock must not stall this one
+            if not await asyncio.to_thread(queue.complete, job.label, item.key, record):
+                return  # Another runner took over the lease and finished first
+        else:
+            journal.append(record)
+        index.add(item.key, record)
+        if previous is not None:
+            history.record(item.key, previous, result)
+
+    source = items_to_process
+    heartbeat = None
+    if queue is not None:
+        await asyncio.to_thread(queue.enqueue, job.label, items_to_process)
+        source = queue.leased_items(job.label, index, batch=backend.keys.max_concurrency)
+        heartbeat = asyncio.ensure_future(queue.keep_alive(job.label))
+        print(f"[{job.label}] Sharing work as {queue.worker_id}: {queue.describe(job.label)}")
+
+    report = PrefixCacheReport(job.label)
+    if telemetry is None:
+        telemetry = TelemetryLog(telemetry_path(output_filename), run_id=time.strftime("%Y%m%d-%H%M%S"))
+
+    # Process all texts asynchronously; a failed row must not be answered from the cache with the same output
+    start_time = time.time()
+    try:
+        await process_batch_async(backend, job, source, on_result=checkpoint,
+                                  refresh_keys=index.stored, report=report, telemetry=telemetry,
+                                  followup=followup, total=selected)
+    finally:
+        if queue is not None:
+            heartbeat.cancel()
+            await asyncio.to_thread(queue.release, job.label)
+        journal.close()
+        history.close()
+        telemetry.close()
+    end_time = time.time()
+
+    if queue is not None:
+        index.load_journal(queue.results(job.label))
+        print(f"[{job.label}] Work queue: {queue.describe(job.label)}")
+    # Compact the journal into the final CSV, in dataset order, streaming the rows out in chunks
+    write_csv_atomic(index.iter_rows(), output_filename, columns=index.columns())
+    journal.remove()
+
+    print(f"[{job.label}] Results saved to {output_filename}")
+    print(f"[{job.label}] Processing time: {end_time - start_time:.2f} seconds")
+    print(f"[{job.label}] Rate limiter: {backend.keys.describe()}")
+    if backend.cache is not None:
+        print(f"[{job.label}] Response cache: {backend.cache.describe()}")
+    if backend.hedger is not None:
+        print(f"[{job.label}] Hedging: {backend.hedger.describe()}")
+    if backend.breaker is not None:
+        failover = f", failover to {backend.failover.endpoint}" if backend.failover is not None else ""
+        print(f"[{job.label}] Circuit breaker: {backend.breaker.describe()}{failover}")
+    if isinstance(backend, Router):
+        print(f"[{job.label}] Routing: {backend.describe()}")
+    else:
+        print(f"[{job.label}] Provider {report.summary(backend.config.input_price, backend.config.cached_input_price)}")
+    print(f"[{job.label}] Telemetry: {format_summary(telemetry.stats.summary())}")
+
+    print_summary(job, index.iter_rows())
+    index.close()
+
+
+async def main_async(jobs: List[Job], dataset_path: str = DATASET_PATH, output_dir: str = OUTPUT_DIR,
+                     max_concurrent: Optional[int] = None, rpm: Optional[int] = None, tpm: Optional[int] = None,
+                     retry_failed: bool = True, cache_path: Optional[str] = CACHE_PATH,
+                     cache_max_bytes: int = CACHE_MAX_BYTES, base_url: Optional[str] = None,
+                     max_tokens: Optional[int] = None, max_cost: Optional[float] = None, stream: bool = False,
+                     structured_output: Optional[str] = None, repair: bool = False,
+                     max_attempts: Optional[int] = None, followup: bool = True,
+                     queue_path: Optional[str] = None, worker_id: Optional[str] = None,
+                     lease_seconds: float = LEASE_SECONDS, transport: Optional[TransportConfig] = None,
+                     hedge_quantile: Optional[float] = None, hedge_budget: float = 0.05,
+                     order: str = "dataset", buckets: int = 8, breaker: bool = True,
+                     breaker_error_rate: float = 0.5, breaker_cooldown: float = 10.0,
+                     breaker_give_up: Optional[float] = 1800.0, failover_url: Optional[str] = None,
+                     failover_model: Optional[str] = None, failover_key_env: str = "FAILOVER_API_KEY",
+                     routes: Optional[Dict[str, Optional[str]]] = None, route_slo: Optional[float] = None,
+                     route_tier: Optional[int] = None):
+    """Run every job concurrently in one event loop; with `queue_path`, share the work with other runners.
+
+    `routes` maps the candidate providers of routed jobs (Job.provider
+    "routed") to their endpoint, or None for the default one.
+    """
+    routes = routes or {}
+    providers = sorted({job.provider for job in jobs if job.provider != ROUTED} | set(routes))
+
+    # One response cache shared by every provider; None disables it
+    cache = ResponseCache(cache_path, cache_max_bytes) if cache_path else None
+    # One budget for the whole run, across providers and jobs
+    budget = Budget(max_tokens, max_cost) if max_tokens is not None or max_cost is not None else None
+
+    # Check that every provider has an API key before spending anything
+    for provider in providers:
+        backend = get_backend(provider, max_concurrent=max_concurrent, rpm=rpm, tpm=tpm, cache=cache,
+                              base_url=routes.get(provider) or base_url, budget=budget, stream=stream,
+                              structured_output=structured_output, transport=transport,
+                              hedger=Hedger(hedge_quantile, hedge_budget) if hedge_quantile else None,
+                              # A failover endpoint is only used while the breaker is open
+                              breaker=CircuitBreaker(provider, breaker_error_rate, cooldown=breaker_cooldown,
+                                                     give_up=breaker_give_up) if breaker or failover_url else None,
+                              failover_url=failover_url, failover_model=failover_model,
+                              failover_key_env=failover_key_env)
+        for checked in (backend, backend.failover):
+            if checked is not None and not checked.api_key:
+                print(f"Error: {checked.config.display_name} API key not set. "
+                      f"Please set the {checked.config.api_key_env} environment variable.")
+                return
+    if any(job.provider == ROUTED for job in jobs):
+        try:
+            router = get_router([get_backend(provider) for provider in routes], slo=route_slo, max_tier=route_tier)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        print(f"Routing over {', '.join(route.backend.endpoint for route in router.routes)}")
+
+    if transport is not None and transport.http2 and not http2_available():
+        print("Warning: --http2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1")
+    if transport is not None and transport.prewarm:
+        # Open connections while the dataset loads, so the first requests skip the handshakes
+        opened = await asyncio.gather(*(get_backend(provider).keys.prewarm() for provider in providers))
+        for provider, count in zip(providers, opened):
+            print(f"Pre-warmed {count} connections to {get_backend(provider).config.display_name}")
+
+    # Label scoring needs logprobs; a --base-url stand-in is trusted to provide them
+    unscorable = [job for job in jobs if job.scoring and not base_url and job.provider != ROUTED
+                  and not get_backend(job.provider).config.supports_logprobs]
+    for job in unscorable:
+        print(f"Skipping {job.label}: {get_backend(job.provider).config.display_name} does not return logprobs")
+    jobs = [job for job in jobs if job not in unscorable]
+
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # SIGINT/SIGTERM cancel the run; every job closes its journal on the way out
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, main_task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Not supported on this platform/thread; KeyboardInterrupt still cancels the run
+
+    # Every runner given the same queue file works on the same jobs
+    queue = WorkQueue(queue_path, worker_id, lease_seconds) if queue_path else None
+
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    telemetry_logs = {job.label: TelemetryLog(telemetry_path(job.output_filename(output_dir)), run_id) for job in jobs}
+
+    print(f"Running {len(jobs)} jobs: {', '.join(job.label for job in jobs)}")
+    try:
+        await asyncio.gather(*(run_job(job, dataset_path, output_dir, retry_failed=retry_failed,
+                                       telemetry=telemetry_logs[job.label], repair=repair,
+                                       max_attempts=max_attempts, followup=followup, queue=queue,
+                                       order=order, buckets=buckets)
+                               for job in jobs))
+    except asyncio.CancelledError:
+        kept_in = queue.path if queue is not None else f"{output_dir}/*.journal.jsonl"
+        print(f"\nInterrupted. Finished results are kept in {kept_in}; rerun to resume.")
+    finally:
+        if queue is not None:
+            queue.close()
+        for log in telemetry_logs.values():
+            log.close()
+        print_run_summary(telemetry_logs)
+        if budget is not None:
+            print(f"Budget used: {budget.describe()}")
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.remove_signal_handler(sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await close_backends()
+        close_router()
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,93 @@
+"""
+Order pending texts by estimated cost, so the longest requests do not start last and stretch the makespan
+"""
+
+import os
+import glob
+from collections import defaultdict
+from typing import List, Dict
+
+import pandas as pd
+
+from .prompts import get_prompt_pack
+from .rate_limit import estimate_tokens
+from .resume import WorkItem, text_hash
+
+SCHEDULES = ["dataset", "longest", "buckets"]
+
+
+def text_tokens(text: str) -> int:
+    return estimate_tokens([{"content": str(text)}]) - 4
+
+
+def completion_history(output_dir: str, provider: str, mode: str, language: str) -> Dict[str, float]:
+    """Text hash -> estimated completion tokens, from the Raw_Model_Output of earlier runs of this mode and language.
+
+    The provider's own file wins; texts it does not have get the mean over
+    the other models' files (e.g. the notebook runs of Qwen3 and Gemma 3).
+    """
+    suffix = get_prompt_pack(language).output_suffix
+    own: Dict[str, float] = {}
+    others = defaultdict(list)
+    for path in sorted(glob.glob(os.path.join(output_dir, f"*_{mode}{suffix}.csv"))):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stem.endswith("en") != (suffix != ""):
+            continue
+        try:
+            df = pd.read_csv(path, usecols=["Original_Input_Text", "Raw_Model_Output"])
+        except (ValueError, OSError):
+            continue
+        lengths = {text_hash(text): text_tokens(raw)
+                   for text, raw in zip(df["Original_Input_Text"], df["Raw_Model_Output"]) if not pd.isna(raw)}
+        if stem == f"{provider}_{mode}{suffix}":
+            own = lengths
+        else:
+            for key, length in lengths.items():
+                others[key].append(length)
+    history = {key: sum(lengths) / len(lengths) for key, lengths in others.items()}
+    history.update(own)
+    return history
+
+
+def estimate_costs(items: List[WorkItem], history: Dict[str, float]) -> Dict[str, float]:
+    """Item key -> estimated tokens: the text itself plus its expected answer (the mean answer if it has no history)"""
+    default = sum(history.values()) / len(history) if history else 0.0
+    return {item.key: text_tokens(item.text) + history.get(text_hash(item.text), default) for item in items}
+
+
+def longest_first(items: List[WorkItem], costs: Dict[str, float]) -> List[WorkItem]:
+    """Most expensive first; ties keep dataset order"""
+    return sorted(items, key=lambda item: -costs[item.key])
+
+
+def length_buckets(items: List[WorkItem], costs: Dict[str, float], buckets: int) -> List[WorkItem]:
+    """Longest bucket first, dataset order inside each of `buckets` equal-sized cost buckets.
+
+    For local servers (vLLM and the like) that batch whatever is in flight:
+    requests sent together have similar lengths, so a batch is not held
+    up by one long sequence.
+    """
+    ranked = longest_first(items, costs)
+    size = max(1, -(-len(ranked) // max(buckets, 1)))
+    ordered = []
+    for start in range(0, len(ranked), size):
+        ordered.extend(sorted(ranked[start:start + size], key=lambda item: item.index))
+    return ordered
+
+
+def schedule(items: List[WorkItem], job, strategy: str, output_dir: str, buckets: int = 8) -> List[WorkItem]:
+    """Pending items of `job` (a runner Job) in the order they should be sent"""
+    if strategy == "dataset" or len(items) < 2:
+        return items
+    if strategy not in SCHEDULES:
+        raise ValueError(f"Unknown schedule '{strategy}', expected one of {SCHEDULES}")
+    history = completion_history(output_dir, job.provider, job.mode, job.language)
+    costs = estimate_costs(items, history)
+    known = sum(1 for item in items if text_hash(item.text) in history)
+    if strategy == "longest":
+        ordered, how = longest_first(items, costs), "longest first"
+    else:
+        ordered, how = length_buckets(items, costs, buckets), f"in {buckets} length buckets, longest first"
+    print(f"[{job.label}] Scheduling {len(items)} texts {how} by estimated tokens "
+          f"({known} with earlier answers, {max(costs.values()):.0f} down to {min(costs.values()):.0f})")
+    return ordered
@@ -0,0 +1,287 @@
+"""
+Label scoring from logprobs: one-token answers instead of generated reasoning, calibrated against the Golden labels
+"""
+
+import os
+import json
+import math
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple, Set
+
+from .prompts import generate_prompt, get_prompt_pack
+from .providers import ProviderBackend, merge_usage
+
+# "choice": one request, distribution of the first answer token over 0-7 (one forward pass); the scores
+#           are shares of a single best-label answer, so a second label only shows up where the model hesitates
+# "binary": one yes/no request per label sharing the same cached prefix, independent P(yes) per label
+SCORING_STRATEGIES = ["choice", "binary"]
+DEFAULT_THRESHOLDS = {"choice": 0.3, "binary": 0.5}
+# How many alternatives to request for the answer token
+TOP_LOGPROBS = 20
+
+
+def score_messages(text: str, language: str = "zh", strategy: str = "choice") -> List[List[Dict[str, str]]]:
+    """The message lists to send for one text: the no_cot prompt plus a one-token question"""
+    pack = get_prompt_pack(language)
+    messages = generate_prompt(text, "no_cot", language)
+    if strategy == "choice":
+        return [messages + [{"role": "user", "content": pack.score_choice_prompt}]]
+    if strategy == "binary":
+        return [messages + [{"role": "user", "content": pack.score_binary_prompt.format(label=label)}]
+                for label in pack.label_vocabulary]
+    raise ValueError(f"Unknown scoring strategy '{strategy}', expected one of {SCORING_STRATEGIES}")
+
+
+def token_probabilities(top_logprobs: Dict[str, float]) -> Dict[str, float]:
+    """Probability per answer token, merging variants that differ only in surrounding whitespace"""
+    probabilities = {}
+    for token, logprob in top_logprobs.items():
+        key = token.strip()
+        probabilities[key] = probabilities.get(key, 0.0) + math.exp(logprob)
+    return probabilities
+
+
+def choice_scores(top_logprobs: Dict[str, float], language: str = "zh") -> Optional[Dict[str, float]]:
+    """Per-label scores from the first-token distribution over the digits 0-7.
+
+    Probabilities are renormalised over the valid answers, so mass the model
+    put on other tokens does not shrink every score. None if no digit is
+    among the returned alternatives.
+    """
+    pack = get_prompt_pack(language)
+    probabilities = token_probabilities(top_logprobs)
+    answers = [str(i) for i in range(len(pack.label_vocabulary) + 1)]
+    total = sum(probabilities.get(answer, 0.0) for answer in answers)
+    if total == 0:
+        return None
+    return {label: round(probabilities.get(str(i + 1), 0.0) / total, 4)
+            for i, label in enumerate(pack.label_vocabulary)}
+
+
+def binary_score(top_logprobs: Dict[str, float], language: str = "zh") -> Optional[float]:
+    """P(yes) renormalised over yes/no; None if neither is among the returned alternatives"""
+    yes, no = get_prompt_pack(language).score_yes_no
+    probabilities = token_probabilities(top_logprobs)
+    p_yes = sum(p for token, p in probabilities.items() if token and yes.lower().startswith(token.lower()))
+    p_no = sum(p for token, p in probabilities.items() if token and no.lower().startswith(token.lower()))
+    if p_yes + p_no == 0:
+        return None
+    return round(p_yes / (p_yes + p_no), 4)
+
+
+def threshold_labels(scores: Dict[str, float], threshold: float) -> str:
+    """RL_Types for the labels scoring at or above the threshold, "N/A" if none do"""
+    chosen = [label for label, score in scores.items() if score >= threshold]
+    return ", ".join(chosen) if chosen else "N/A"
+
+
+@dataclass
+class LabelCalibration:
+    """Platt scaling of one label's raw score, and the calibrated probability it needs to be kept"""
+    slope: float
+    intercept: float
+    threshold: float
+
+    def probability(self, score: float) -> float:
+        return sigmoid(self.slope * logit(score) + self.intercept)
+
+
+def sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1 / (1 + math.exp(-z))
+    return math.exp(z) / (1 + math.exp(z))
+
+
+def logit(score: float) -> float:
+    score = min(max(score, 1e-4), 1 - 1e-4)
+    return math.log(score / (1 - score))
+
+
+def platt_scale(scores: List[float], targets: List[bool], iterations: int = 100) -> Tuple[float, float]:
+    """Slope and intercept of P(label) = sigmoid(slope * logit(score) + intercept), by damped Newton steps.
+
+    Targets are smoothed as in Platt (1999), so a label the scores separate
+    perfectly still gets finite parameters.
+    """
+    positives = sum(targets)
+    high, low = (positives + 1) / (positives + 2), 1 / (len(targets) - positives + 2)
+    points = [(logit(score), high if target else low) for score, target in zip(scores, targets)]
+
+    def loss(slope: float, intercept: float) -> float:
+        total = 0.0
+        for x, t in points:
+            p = min(max(sigmoid(slope * x + intercept), 1e-12), 1 - 1e-12)
+            total -= t * math.log(p) + (1 - t) * math.log(1 - p)
+        return total
+
+    slope, intercept = 1.0, 0.0
+    current = loss(slope, intercept)
+    for _ in range(iterations):
+        # Gradient and Hessian of the log loss, with a small ridge so the step is always defined
+        g_slope = g_intercept = 0.0
+        h_ss, h_si, h_ii = 1e-6, 0.0, 1e-6
+        for x, t in points:
+            p = sigmoid(slope * x + intercept)
+            w = p * (1 - p)
+            g_slope += (p - t) * x
+            g_intercept += p - t
+            h_ss += w * x * x
+            h_si += w * x
+            h_ii += w
+        determinant = h_ss * h_ii - h_si * h_si
+        step_slope = (h_ii * g_slope - h_si * g_intercept) / determinant
+        step_intercept = (h_ss * g_intercept - h_si * g_slope) / determinant
+        # Halve the step until the loss goes down (a full step can overshoot far out on the flat tails)
+        size = 1.0
+        while size > 1e-10:
+            candidate = loss(slope - size * step_slope, intercept - size * step_intercept)
+            if candidate < current:
+                break
+            size /= 2
+        else:
+            break
+        slope, intercept = slope - size * step_slope, intercept - size * step_intercept
+        if current - candidate < 1e-10:
+            break
+        current = candidate
+    return slope, intercept
+
+
+def best_f1_threshold(probabilities: List[float], targets: List[bool]) -> float:
+    """Probability cut with the best F1 over these rows, halfway to the next lower probability.
+
+    Ties go to the higher cut; a label with no positive rows gets 1.0, so it
+    is never predicted.
+    """
+    positives = sum(targets)
+    if not positives:
+        return 1.0
+    ranked = sorted(zip(probabilities, targets), key=lambda pair: -pair[0])
+    best_f1, best_index = -1.0, 0
+    tp = fp = 0
+    for i, (probability, target) in enumerate(ranked):
+        tp += target
+        fp += not target
+        if i + 1 < len(ranked) and ranked[i + 1][0] == probability:
+            continue  # Rows with the same probability are kept or dropped together
+        f1 = 2 * tp / (tp + fp + positives)
+        if f1 > best_f1:
+            best_f1, best_index = f1, i
+    lower = ranked[best_index + 1][0] if best_index + 1 < len(ranked) else 0.0
+    return (ranked[best_index][0] + lower) / 2
+
+
+class Calibration:
+    """Per-label calibrated scores and thresholds for one scored output, fitted on rows with Golden labels.
+
+    The raw scores are renormalised token probabilities: they rank texts,
+    but a 0.3 from `choice` and a 0.3 from `binary` (or from two labels) do
+    not mean the same thing. Each label gets its own Platt scaling into a
+    probability of being a golden label, and its own threshold on that
+    probability, chosen for the best F1 on the fitting rows. That F1 is an
+    optimistic estimate, since it is measured on the rows it was fitted on.
+    """
+
+    def __init__(self, labels: Dict[str, LabelCalibration], rows: int = 0):
+        self.labels = labels
+        self.rows = rows
+
+    @classmethod
+    def fit(cls, scores: List[Dict[str, float]], golden: List[Set[str]], vocabulary: List[str]) -> "Calibration":
+        labels = {}
+        for label in vocabulary:
+            raw = [row.get(label, 0.0) for row in scores]
+            targets = [label in gold for gold in golden]
+            slope, intercept = platt_scale(raw, targets)
+            calibration = LabelCalibration(slope, intercept, 1.0)
+            calibration.threshold = best_f1_threshold([calibration.probability(score) for score in raw], targets)
+            labels[label] = calibration
+        return cls(labels, len(scores))
+
+    def probabilities(self, scores: Dict[str, float]) -> Dict[str, float]:
+        return {label: round(calibration.probability(scores.get(label, 0.0)), 4)
+                for label, calibration in self.labels.items()}
+
+    def apply(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """A scored output row with Calibrated_Scores and RL_Types from the per-label thresholds"""
+        scores = json.loads(result.get("Label_Scores") or "{}")
+        if not scores:
+            return result  # Unscored (PARSE_ERROR_NO_MARKER or ERROR) rows stay as they are
+        chosen = [label for label, calibration in self.labels.items()
+                  if calibration.probability(scores.get(label, 0.0)) >= calibration.threshold]
+        return {**result, "RL_Types": ", ".join(chosen) if chosen else "N/A",
+                "Calibrated_Scores": json.dumps(self.probabilities(scores), ensure_ascii=False)}
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"rows": self.rows, "labels": {label: asdict(c) for label, c in self.labels.items()}},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Calibration"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls({label: LabelCalibration(**c) for label, c in data["labels"].items()}, data.get("rows", 0))
+
+    def describe(self) -> str:
+        return ", ".join(f"{label} >= {c.threshold:.2f}" for label, c in self.labels.items())
+
+
+def calibration_path(output_filename: str) -> str:
+    """llm_outputs/gpt41_no_cot_scored.csv -> llm_outputs/gpt41_no_cot_scored.calibration.json"""
+    root, _ = os.path.splitext(output_filename)
+    return f"{root}.calibration.json"
+
+
+async def score_text(backend: ProviderBackend, text: str, language: str = "zh", strategy: str = "choice",
+                     threshold: Optional[float] = None, refresh: bool = False,
+                     stats: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Score every label for one text; returns the output row and a combined completion record"""
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[strategy]
+    pack = get_prompt_pack(language)
+    message_sets = score_messages(text, language, strategy)
+    request_stats = [{} for _ in message_sets]
+    try:
+        completions = await asyncio.gather(*(
+            backend.complete(messages, refresh=refresh, stats=request_stats[i], max_tokens=1,
+                             top_logprobs=TOP_LOGPROBS)
+            for i, messages in enumerate(message_sets)
+        ))
+    finally:
+        if stats is not None:
+            for key in ("attempts", "queue_seconds", "backoff_seconds"):
+                stats[key] = sum(stat.get(key, 0) for stat in request_stats)
+
+    if strategy == "choice":
+        scores = choice_scores(completions[0]["top_logprobs"], language)
+        answers = completions[0]["content"]
+    else:
+        label_scores = [binary_score(c["top_logprobs"], language) for c in completions]
+        scores = None if None in label_scores else dict(zip(pack.label_vocabulary, label_scores))
+        answers = json.dumps(dict(zip(pack.label_vocabulary, (c["content"] for c in completions))),
+                             ensure_ascii=False)
+
+    result = {
+        "Original_Input_Text": text,
+        "RL_Types": threshold_labels(scores, threshold) if scores is not None else "PARSE_ERROR_NO_MARKER",
+        "Raw_Model_Output": answers,
+        "Label_Scores": json.dumps(scores or {}, ensure_ascii=False),
+    }
+    completion = {
+        "content": answers,
+        # max_tokens=1 always ends in "length"; that is not a truncated answer here
+        "finish_reason": "scored",
+        "usage": merge_usage([c["usage"] for c in completions if not c.get("cache_hit")]),
+        "cache_hit": all(c.get("cache_hit") for c in completions),
+    }
+    if completions[0].get("served_by"):
+        failed_over = [c for c in completions if c.get("failover")]
+        completion["served_by"] = (failed_over or completions)[0]["served_by"]
+        completion["failover"] = bool(failed_over)
+    return result, completion
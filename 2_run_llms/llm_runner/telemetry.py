@@ -0,0 +1,222 @@
+"""
+Per-request telemetry (latency, tokens, retries, cost), run summaries and an optional budget guard
+"""
+
+import os
+import json
+import math
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable
+
+from .prefix_cache import cached_prompt_tokens
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised instead of starting a request once the run's token or cost ceiling is reached"""
+
+
+def telemetry_path(output_filename: str) -> str:
+    """llm_outputs/gpt41_zero_shot.csv -> llm_outputs/gpt41_zero_shot.telemetry.jsonl"""
+    root, _ = os.path.splitext(output_filename)
+    return f"{root}.telemetry.jsonl"
+
+
+def request_cost(usage: Optional[Dict[str, Any]], input_price: float, cached_input_price: float,
+                 output_price: float) -> float:
+    """USD cost of one request from its usage block (prices are per 1M tokens)"""
+    if not usage:
+        return 0.0
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    cached_tokens = cached_prompt_tokens(usage)
+    completion_tokens = int(usage.get("completion_tokens") or 0)
+    return ((prompt_tokens - cached_tokens) * input_price
+            + cached_tokens * cached_input_price
+            + completion_tokens * output_price) / 1_000_000
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Budget:
+    """Run-wide token/cost ceiling shared by every provider backend.
+
+    Requests that already hold a slot finish normally; once the ceiling is
+    reached no new request is started and the remaining items stay pending
+    for the next run.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.tokens = 0
+        self.cost = 0.0
+        self.exceeded = False
+
+    def add(self, tokens: int, cost: float):
+        self.tokens += tokens
+        self.cost += cost
+        if self.exceeded:
+            return
+        if (self.max_tokens is not None and self.tokens >= self.max_tokens) or \
+                (self.max_cost is not None and self.cost >= self.max_cost):
+            self.exceeded = True
+            print(f"\nBudget reached: {self.describe()}. No new requests will be started.")
+
+    def check(self):
+        if self.exceeded:
+            raise BudgetExceeded(self.describe())
+
+    def describe(self) -> str:
+        tokens = f"{self.tokens}" + (f"/{self.max_tokens}" if self.max_tokens is not None else "")
+        cost = f"${self.cost:.4f}" + (f"/${self.max_cost:.2f}" if self.max_cost is not None else "")
+        return f"{tokens} tokens, {cost}"
+
+
+# Latency histogram buckets grow by 5% from 1 ms, so a reported percentile is at most 5% above the true one
+LATENCY_FLOOR = 0.001
+LATENCY_GROWTH = 1.05
+
+
+class TelemetryStats:
+    """Running totals of telemetry records, the same size however many requests are added.
+
+    Latency percentiles come from a histogram of geometric buckets
+    (LATENCY_GROWTH apart) and report the upper bound of the bucket the
+    rank falls in. Stats of several logs are combined with merge().
+    """
+
+    COUNTS = ("requests", "api_calls", "errors", "prompt_tokens", "completion_tokens", "retries",
+              "backoff_seconds", "truncated", "hedged", "hedge_wins", "failover", "cost")
+
+    def __init__(self):
+        self.totals = dict.fromkeys(self.COUNTS, 0)
+        self.latency_buckets: Dict[int, int] = defaultdict(int)
+        self.mode: Optional[str] = None
+
+    def add(self, record: Dict[str, Any]):
+        totals = self.totals
+        totals["requests"] += 1
+        totals["errors"] += record.get("status") != "ok"
+        self.mode = self.mode or record.get("mode")
+        if record.get("cache_hit"):
+            return
+        totals["api_calls"] += 1
+        for key, field in (("prompt_tokens", "prompt_tokens"), ("completion_tokens", "completion_tokens"),
+                           ("retries", "retries"), ("backoff_seconds", "backoff_seconds"), ("cost", "cost")):
+            totals[key] += record.get(field) or 0
+        totals["truncated"] += record.get("finish_reason") == "length"
+        totals["hedged"] += bool(record.get("hedged"))
+        totals["hedge_wins"] += bool(record.get("hedge_won"))
+        totals["failover"] += bool(record.get("failover"))
+        if record.get("latency_seconds") is not None:
+            self.latency_buckets[self._bucket(record["latency_seconds"])] += 1
+
+    def merge(self, other: "TelemetryStats") -> "TelemetryStats":
+        for key, value in other.totals.items():
+            self.totals[key] += value
+        for bucket, count in other.latency_buckets.items():
+            self.latency_buckets[bucket] += count
+        self.mode = self.mode or other.mode
+        return self
+
+    @staticmethod
+    def _bucket(seconds: float) -> int:
+        if seconds <= LATENCY_FLOOR:
+            return 0
+        return math.ceil(math.log(seconds / LATENCY_FLOOR) / math.log(LATENCY_GROWTH))
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the nearest-rank q-th percentile latency"""
+        count = sum(self.latency_buckets.values())
+        if not count:
+            return None
+        rank = max(1, math.ceil(q / 100 * count))
+        for bucket in sorted(self.latency_buckets):
+            rank -= self.latency_buckets[bucket]
+            if rank <= 0:
+                return LATENCY_FLOOR * LATENCY_GROWTH ** bucket
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        """The totals in the form format_summary() prints"""
+        return {**self.totals, "cache_hits": self.totals["requests"] - self.totals["api_calls"],
+                "p50": self.latency_percentile(50), "p95": self.latency_percentile(95),
+                "p99": self.latency_percentile(99)}
+
+
+class TelemetryLog:
+    """Append-only JSONL of per-request telemetry next to an output file, plus running stats for the summary.
+
+    Unlike the result journal it is never compacted away, so records from
+    every run (tagged with `run_id`) accumulate for later analysis.
+    """
+
+    def __init__(self, path: str, run_id: str):
+        self.path = path
+        self.run_id = run_id
+        self.stats = TelemetryStats()
+        self._file = None
+
+    def append(self, record: Dict[str, Any]):
+        record = {"run_id": self.run_id, "timestamp": time.time(), **record}
+        self.stats.add(record)
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Latency percentiles, token totals, retries and cost over telemetry records"""
+    stats = TelemetryStats()
+    for record in records:
+        stats.add(record)
+    return stats.summary()
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.2f}s" if value is not None else "-"
+
+
+def format_summary(stats: Dict[str, Any]) -> str:
+    extras = ""
+    if stats.get("hedged"):
+        extras = f", {stats['hedged']} hedged ({stats['hedge_wins'] / stats['hedged']:.0%} won by the duplicate)"
+    if stats.get("failover"):
+        extras += f", {stats['failover']} served by the failover endpoint"
+    return (f"{stats['requests']} requests ({stats['api_calls']} API, {stats['cache_hits']} cached, "
+            f"{stats['errors']} errors), latency p50 {_seconds(stats['p50'])} p95 {_seconds(stats['p95'])} "
+            f"p99 {_seconds(stats['p99'])}, tokens {stats['prompt_tokens']} prompt / "
+            f"{stats['completion_tokens']} completion, {stats['retries']} retries "
+            f"({stats['backoff_seconds']:.1f}s backoff), {stats['truncated']} truncated{extras}, ${stats['cost']:.4f}")
+
+
+def print_run_summary(logs: Dict[str, TelemetryLog]):
+    """Per-job lines, then totals grouped by prompting mode, for everything this run sent"""
+    sent = [(label, log.stats) for label, log in logs.items() if log.stats.totals["requests"]]
+    if not sent:
+        return
+    print(f"\n{'='*50}")
+    print("Telemetry summary")
+    print(f"{'='*50}")
+    by_mode = defaultdict(TelemetryStats)
+    total = TelemetryStats()
+    for label, stats in sent:
+        print(f"  {label}: {format_summary(stats.summary())}")
+        by_mode[stats.mode].merge(stats)
+        total.merge(stats)
+    for mode, stats in by_mode.items():
+        print(f"  [{mode}] {format_summary(stats.summary())}")
+    print(f"  Total: {format_summary(total.summary())}")
@@ -0,0 +1,68 @@
+"""
+HTTP transport settings for the provider clients: pool size, HTTP/2, timeouts and pre-warming
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+# The openai SDK's own read timeout, for clients built without a provider setting
+DEFAULT_READ_TIMEOUT = 600.0
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Connection pool and deadline settings shared by every client of a run"""
+    # Connections per client; None sizes the pool to the key's concurrency ceiling
+    max_connections: Optional[int] = None
+    keepalive_expiry: float = 30.0       # Seconds an idle connection is kept open
+    http2: bool = False                  # Multiplex requests over few connections (needs the h2 package)
+    connect_timeout: float = 10.0
+    # Longest silence while reading a response; None uses the provider's read_timeout
+    read_timeout: Optional[float] = None
+    write_timeout: float = 30.0
+    # Deadline for a whole request, including reading a stream; None means no deadline
+    request_timeout: Optional[float] = None
+    # Connections opened per key before the first request (0 = none)
+    prewarm: int = 0
+
+    def timeout(self) -> httpx.Timeout:
+        # The pool wait is bounded too, so a connection leak shows up as an error instead of a hang
+        return httpx.Timeout(connect=self.connect_timeout, read=self.read_timeout or DEFAULT_READ_TIMEOUT,
+                             write=self.write_timeout, pool=self.connect_timeout + self.write_timeout)
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_http_client(transport: TransportConfig, concurrency: int) -> httpx.AsyncClient:
+    """httpx client whose pool matches the concurrency limit, so requests never queue for a connection.
+
+    Every connection may stay alive, which keeps the TCP and TLS handshakes
+    off the request path.
+    """
+    connections = transport.max_connections or concurrency
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections,
+                            keepalive_expiry=transport.keepalive_expiry),
+        timeout=transport.timeout(),
+        http2=transport.http2 and http2_available(),
+    )
+
+
+async def prewarm(client: AsyncOpenAI, connections: int) -> int:
+    """Open up to `connections` connections with concurrent GET /models calls; returns how many succeeded.
+
+    These calls are free and not rate limited, and the connections they
+    leave in the pool save the first real requests a TCP and TLS handshake.
+    """
+    results = await asyncio.gather(*(client.models.list() for _ in range(connections)), return_exceptions=True)
+    return sum(1 for result in results if not isinstance(result, BaseException))
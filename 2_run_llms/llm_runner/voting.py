@@ -0,0 +1,40 @@
+"""
+Self-consistency: per-label vote fractions over several sampled answers
+"""
+
+import json
+from typing import List, Dict, Optional
+
+from .prompts import get_prompt_pack, find_labels
+from .resume import FAILED_LABELS
+
+
+def split_labels(rl_types: str, language: str = "zh") -> Optional[List[str]]:
+    """Vocabulary labels in one parsed RL_Types value, [] for N/A, None for a failed parse"""
+    if rl_types in FAILED_LABELS:
+        return None
+    return find_labels(rl_types, language)
+
+
+def vote(samples: List[str], language: str = "zh", threshold: float = 0.5) -> Dict[str, object]:
+    """Combine the parsed RL_Types of several samples.
+
+    Each label's fraction is the share of usable samples that contain it;
+    labels at or above `threshold` make up the voted RL_Types ("N/A" if
+    none do). Samples that failed to parse do not vote. Returns the voted
+    RL_Types, the fractions and the number of usable samples.
+    """
+    pack = get_prompt_pack(language)
+    parsed = [labels for labels in (split_labels(sample, language) for sample in samples) if labels is not None]
+    if not parsed:
+        failed = "ERROR" if all(sample == "ERROR" for sample in samples) else "PARSE_ERROR_NO_MARKER"
+        return {"RL_Types": failed, "fractions": {}, "votes": 0}
+    fractions = {label: sum(label in labels for labels in parsed) / len(parsed) for label in pack.label_vocabulary}
+    fractions = {label: round(fraction, 4) for label, fraction in fractions.items() if fraction > 0}
+    chosen = [label for label, fraction in fractions.items() if fraction >= threshold]
+    return {"RL_Types": ", ".join(chosen) if chosen else "N/A", "fractions": fractions, "votes": len(parsed)}
+
+
+def format_fractions(fractions: Dict[str, float]) -> str:
+    """Vote fractions as a compact JSON column value"""
+    return json.dumps(fractions, ensure_ascii=False)
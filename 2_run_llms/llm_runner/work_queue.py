@@ -0,0 +1,212 @@
+"""
+Shared SQLite work queue: several runner processes (or hosts on a shared disk) lease items of one job
+"""
+
+import os
+import json
+import time
+import socket
+import asyncio
+import sqlite3
+import threading
+from typing import List, Dict, Any, Container, Iterable, Iterator, Optional, AsyncIterator
+
+from .resume import WorkItem, is_failed
+
+QUEUE_PATH = 'llm_outputs/work_queue.sqlite'
+# A lease not renewed for this long is handed to another worker
+LEASE_SECONDS = 120.0
+# Seconds between checks for expired leases once nothing is pending
+POLL_SECONDS = 5.0
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """Work items of every job, with leases that expire unless the worker holding them heartbeats.
+
+    One row per (job label, item key); the label already holds the
+    provider, mode, variant and language. The row keeps the item itself,
+    so a worker needs no copy of the dataset in memory to run it. A row
+    is pending, leased to one worker until `lease_until`, or done with its
+    result stored as JSON. Claims run in IMMEDIATE transactions, so two
+    processes never lease the same pending row; a row whose lease has
+    lapsed (its worker crashed or hung) is leased again. The first result
+    stored for a row wins.
+
+    The methods block while another process holds the write lock, for up
+    to a minute, so the runner calls them through asyncio.to_thread; the
+    connection is shared by those threads under a lock.
+
+    SQLite locking over NFS is unreliable, so hosts sharing a queue should
+    use a file system with working POSIX locks.
+    """
+
+    def __init__(self, path: str = QUEUE_PATH, worker_id: Optional[str] = None,
+                 lease_seconds: float = LEASE_SECONDS):
+        self.path = path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit, so transactions are opened explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS work ("
+            " job TEXT NOT NULL, key TEXT NOT NULL, position INTEGER NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, result TEXT, updated REAL, item TEXT,"
+            " PRIMARY KEY (job, key))"
+        )
+        # Queue files from before items were stored in them
+        if "item" not in {row[1] for row in self._db.execute("PRAGMA table_info(work)")}:
+            self._db.execute("ALTER TABLE work ADD COLUMN item TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS work_claim ON work (job, state, position)")
+
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, job: str, items: Iterable[WorkItem]) -> int:
+        """Add items that are not queued yet and re-open those whose stored result failed; returns how many.
+
+        Items are leased in the order given (dataset order, or the runner's
+        --schedule order).
+        """
+        now = time.time()
+        added = 0
+        with self._lock:
+            self._transaction()
+            try:
+                for position, item in enumerate(items):
+                    stored = json.dumps([item.index, item.comment_id, item.text], ensure_ascii=False)
+                    row = self._db.execute("SELECT state, result, item FROM work WHERE job = ? AND key = ?",
+                                           (job, item.key)).fetchone()
+                    if row is None:
+                        self._db.execute("INSERT INTO work (job, key, position, updated, item) VALUES (?, ?, ?, ?, ?)",
+                                         (job, item.key, position, now, stored))
+                        added += 1
+                    elif row[0] == "done" and is_failed(json.loads(row[1])):
+                        self._db.execute("UPDATE work SET state = 'pending', worker = NULL, lease_until = NULL,"
+                                         " updated = ?, item = ? WHERE job = ? AND key = ?",
+                                         (now, stored, job, item.key))
+                        added += 1
+                    elif row[2] is None:
+                        self._db.execute("UPDATE work SET item = ? WHERE job = ? AND key = ?",
+                                         (stored, job, item.key))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+    def lease(self, job: str, count: int) -> List[Optional[WorkItem]]:
+        """Lease up to `count` pending or expired rows, in queue order; returns their items (None if not stored)"""
+        now = time.time()
+        with self._lock:
+            self._transaction()
+            try:
+                rows = self._db.execute(
+                    "SELECT key, item FROM work"
+                    " WHERE job = ? AND (state = 'pending' OR (state = 'leased' AND lease_until < ?))"
+                    " ORDER BY position LIMIT ?", (job, now, count)).fetchall()
+                for key, _ in rows:
+                    self._db.execute("UPDATE work SET state = 'leased', worker = ?, lease_until = ?,"
+                                     " attempts = attempts + 1, updated = ? WHERE job = ? AND key = ?",
+                                     (self.worker_id, now + self.lease_seconds, now, job, key))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [WorkItem(*json.loads(item)) if item else None for _, item in rows]
+
+    def _write(self, sql: str, parameters: tuple) -> int:
+        """One autocommitted statement; returns the rows it changed"""
+        with self._lock:
+            return self._db.execute(sql, parameters).rowcount
+
+    def heartbeat(self, job: str) -> int:
+        """Extend every lease this worker holds on `job`; returns how many are held"""
+        return self._write("UPDATE work SET lease_until = ? WHERE job = ? AND state = 'leased' AND worker = ?",
+                           (time.time() + self.lease_seconds, job, self.worker_id))
+
+    def complete(self, job: str, key: str, record: Dict[str, Any]) -> bool:
+        """Store the result of a row; False if another worker already finished it"""
+        return self._write("UPDATE work SET state = 'done', worker = ?, lease_until = NULL, result = ?, updated = ?"
+                           " WHERE job = ? AND key = ? AND state != 'done'",
+                           (self.worker_id, json.dumps(record, ensure_ascii=False), time.time(), job, key)) > 0
+
+    def release(self, job: str) -> int:
+        """Hand this worker's unfinished leases back right away (on a clean stop), instead of letting them expire"""
+        return self._write("UPDATE work SET state = 'pending', worker = NULL, lease_until = NULL, updated = ?"
+                           " WHERE job = ? AND state = 'leased' AND worker = ?",
+                           (time.time(), job, self.worker_id))
+
+    def counts(self, job: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM work WHERE job = ? GROUP BY state", (job,)))
+
+    def leased_elsewhere(self, job: str) -> int:
+        """Rows whose lease is held by another worker and has not expired"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM work WHERE job = ? AND state = 'leased' AND worker != ?"
+                                    " AND lease_until >= ?", (job, self.worker_id, time.time())).fetchone()[0]
+
+    def results(self, job: str) -> Iterator[Dict[str, Any]]:
+        """Stored results of `job` as journal records (with "key"), in queue order.
+
+        Read over a connection of its own, so the shared one is not held
+        while the caller works through the rows.
+        """
+        reader = sqlite3.connect(self.path, timeout=60)
+        try:
+            for (result,) in reader.execute("SELECT result FROM work WHERE job = ? AND state = 'done'"
+                                            " ORDER BY position", (job,)):
+                yield json.loads(result)
+        finally:
+            reader.close()
+
+    async def leased_items(self, job: str, keys: Container[str], batch: int,
+                           poll_seconds: float = POLL_SECONDS) -> AsyncIterator[WorkItem]:
+        """Lease and yield items until none are pending and no other worker holds a live lease.
+
+        `keys` are the item keys of this worker's dataset; the items come
+        from the queue. While other workers still hold leases, keeps polling
+        so that the rows of a worker that died are picked up once their
+        lease expires.
+        """
+        while True:
+            items = await asyncio.to_thread(self.lease, job, batch)
+            if items:
+                for item in items:
+                    if item is None or item.key not in keys:
+                        await asyncio.to_thread(self.release, job)
+                        raise RuntimeError(f"Queue {self.path} has items for {job} that are not in this dataset; "
+                                           f"every worker must use the same --dataset")
+                    yield item
+            elif await asyncio.to_thread(self.leased_elsewhere, job):
+                await asyncio.sleep(poll_seconds)
+            else:
+                return
+
+    async def keep_alive(self, job: str):
+        """Heartbeat this worker's leases on `job` until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.heartbeat, job)
+            except sqlite3.OperationalError as e:
+                # Still locked after the busy timeout; retried on the next beat
+                print(f"[{job}] Work queue heartbeat failed: {e}")
+
+    def describe(self, job: str) -> str:
+        counts = self.counts(job)
+        return (f"{counts.get('done', 0)} done, {counts.get('leased', 0)} leased, "
+                f"{counts.get('pending', 0)} pending in {self.path}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Run from anywhere: the package lives next to this directory, as with `python -m llm_runner` from 2_run_llms
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from llm_runner.cli import main  # noqa: E402
+from llm_runner.mock_server import MockServer, MockConfig, AnswerBook  # noqa: E402
+
+DATASET_PATH = os.path.join(ROOT, "..", "0_data_collection", "dataset.csv")
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """The first 40 annotated texts"""
+    path = str(tmp_path / "dataset.csv")
+    pd.read_csv(DATASET_PATH).head(40).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def mock_server(dataset):
+    """Starts in-process mock servers that answer with the dataset's Golden labels; stopped after the test"""
+    book = AnswerBook()
+    book.load_dataset(dataset)
+    servers = []
+
+    def start(**config):
+        server = MockServer(MockConfig(**{"latency_ms": 20, "latency_sigma": 0, **config}), book).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def run_cli(dataset, tmp_path, monkeypatch):
+    """Runs `python -m llm_runner` over the dataset into a temporary output directory and returns that directory"""
+    for env in ("OPENAI_API_KEY", "DEEPSEEK_API_KEY", "VLLM_API_KEY"):
+        monkeypatch.setenv(env, "sk-mock")
+    output_dir = str(tmp_path / "llm_outputs")
+
+    def run(*args):
+        main(["--no-cache", "--dataset", dataset, "--output-dir", output_dir, *args])
+        return output_dir
+
+    return run
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pandas as pd
+
+from llm_runner.batch_api import build_batch_request, load_manifest
+from llm_runner.providers import ProviderBackend, PROVIDERS
+from llm_runner.resume import WorkItem
+from llm_runner.runner import Job
+
+
+def manifest(output_dir, job=Job("gpt41", "zero_shot")):
+    return load_manifest(job, output_dir)
+
+
+def test_batch_request_matches_online_request():
+    backend = ProviderBackend(PROVIDERS["Qwen3-32B"], api_key="sk-mock")
+    line = build_batch_request(backend, Job("Qwen3-32B", "no_cot"), WorkItem(0, "c1", "text"))
+    assert line["custom_id"] == WorkItem(0, "c1", "text").key
+    assert line["body"]["chat_template_kwargs"] == {"enable_thinking": False}
+    assert line["body"]["messages"][-1] == {"role": "user", "content": "text"}
+
+
+def test_submit_and_ingest(mock_server, run_cli):
+    server = mock_server()
+    args = ("--base-url", server.base_url, "--modes", "zero_shot")
+    output_dir = run_cli("--batch", "submit", *args)
+    parts = manifest(output_dir)["parts"]
+    assert [part["count"] for part in parts] == [40] and parts[0]["batch_id"]
+
+    # Submitting again while the batch is in flight must neither resubmit nor replace the manifest
+    run_cli("--batch", "submit", *args)
+    run_cli("--batch", "prepare", *args)
+    assert manifest(output_dir)["parts"] == parts
+    assert server.llm.stats["batches"] == 1
+
+    run_cli("--batch", "ingest", *args)
+    df = pd.read_csv(os.path.join(output_dir, "gpt41_zero_shot.csv"), keep_default_na=False)
+    assert len(df) == 40 and not df["RL_Types"].isin(["ERROR", "PARSE_ERROR_NO_MARKER"]).any()
+    assert server.llm.stats["batch_requests"] == 40
+    assert server.llm.stats["requests"] == 0
+
+
+def test_resubmit_only_failed_lines(mock_server, run_cli):
+    server = mock_server(rate_5xx=0.25, seed=3)
+    args = ("--base-url", server.base_url, "--modes", "zero_shot")
+    output_dir = run_cli("--batch", "submit", *args)
+    run_cli("--batch", "ingest", *args)
+    df = pd.read_csv(os.path.join(output_dir, "gpt41_zero_shot.csv"), keep_default_na=False)
+    failed = int((df["RL_Types"] == "ERROR").sum())
+    assert 0 < failed < 40
+
+    # Once ingested, the next submit prepares a new batch of just the failed texts
+    run_cli("--batch", "submit", *args)
+    parts = manifest(output_dir)["parts"]
+    assert [part["count"] for part in parts] == [failed]
+    with open(parts[0]["path"], encoding="utf-8") as f:
+        keys = {json.loads(line)["custom_id"] for line in f}
+    assert len(keys) == failed
+    assert server.llm.stats["batches"] == 2
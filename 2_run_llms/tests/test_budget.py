@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+
+from llm_runner.checkpoint import journal_path
+from llm_runner.runner import Job
+
+
+def test_budget_stops_early_and_the_rerun_resumes(mock_server, run_cli, dataset, capsys):
+    server = mock_server()
+    args = ("--base-url", server.base_url, "--modes", "no_cot", "--max-concurrent", "2")
+    # Each request uses about 2,900 tokens, so the budget runs out after about 9
+    output_dir = run_cli(*args, "--max-tokens", "25000")
+    assert "Budget reached" in capsys.readouterr().out
+    sent = server.llm.stats["requests"]
+    assert 8 <= sent < 20
+
+    # The results that came in are compacted into the CSV, and no row is marked as failed
+    output_filename = Job("gpt41", "no_cot").output_filename(output_dir)
+    partial = pd.read_csv(output_filename, keep_default_na=False)
+    assert len(partial) == sent and not partial["RL_Types"].isin(["ERROR"]).any()
+    assert not os.path.exists(journal_path(output_filename))
+
+    run_cli(*args)
+    assert server.llm.stats["requests"] == 40
+    df = pd.read_csv(output_filename, keep_default_na=False)
+    assert df["Original_Input_Text"].tolist() == pd.read_csv(dataset)["text"].astype(str).tolist()
+    assert not df["RL_Types"].isin(["ERROR"]).any()
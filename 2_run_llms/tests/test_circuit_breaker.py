@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from llm_runner.circuit_breaker import CircuitBreaker, CircuitOpen, CLOSED, OPEN
+
+
+def read_output(output_dir):
+    return pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+
+
+def test_trips_probes_and_closes():
+    async def outage():
+        breaker = CircuitBreaker(min_calls=4, window=4, cooldown=0.05)
+        for ok in (False, True, True):
+            await breaker.record(ok)
+        assert breaker.state == CLOSED
+        await breaker.record(False)
+        assert breaker.state == OPEN and breaker.poll() is None
+
+        # One probe after the cooldown; a failed probe doubles it
+        await asyncio.sleep(0.06)
+        assert breaker.poll() is True and breaker.poll() is None
+        await breaker.record(False, probe=True)
+        assert breaker.state == OPEN and breaker.cooldown == 0.1
+        start = time.monotonic()
+        assert await breaker.admit() is True
+        assert time.monotonic() - start >= 0.09
+        await breaker.record(True, probe=True)
+        assert breaker.state == CLOSED and breaker.cooldown == 0.05 and breaker.poll() is False
+
+    asyncio.run(outage())
+
+
+def test_waiting_callers_give_up():
+    async def long_outage():
+        breaker = CircuitBreaker(min_calls=1, cooldown=10, give_up=0.05)
+        await breaker.record(False)
+        await asyncio.sleep(0.06)
+        with pytest.raises(CircuitOpen):
+            await breaker.admit()
+
+    asyncio.run(long_outage())
+
+
+def test_breaker_spares_the_provider_during_an_outage(mock_server, run_cli, tmp_path):
+    outage = {"latency_ms": 200, "outage_after": 0.5, "outage_seconds": 3}
+    args = ("--modes", "no_cot", "--max-concurrent", "32")
+    failed = {}
+    for breaker in ("on", "off"):
+        server = mock_server(**outage)
+        output_dir = str(tmp_path / breaker)
+        flags = ("--breaker-cooldown", "0.5") if breaker == "on" else ("--no-breaker",)
+        run_cli("--base-url", server.base_url, *args, *flags, "--output-dir", output_dir)
+        assert not read_output(output_dir)["RL_Types"].isin(["ERROR"]).any()
+        assert server.llm.stats["ok"] == 40
+        failed[breaker] = server.llm.stats["outage"]
+
+    # Retrying on their own, 32 workers keep hitting the dead provider; behind the breaker only the probes do
+    assert failed["on"] < failed["off"] * 0.75, failed
+
+
+def test_open_breaker_fails_over(mock_server, run_cli, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAILOVER_API_KEY", "sk-mock")
+    primary = mock_server(outage_after=0.3, outage_seconds=60)
+    secondary = mock_server()
+    start = time.monotonic()
+    output_dir = run_cli("--base-url", primary.base_url, "--modes", "no_cot", "--max-concurrent", "4",
+                         "--failover-url", secondary.base_url)
+    assert time.monotonic() - start < 20
+
+    df = read_output(output_dir)
+    assert not df["RL_Types"].isin(["ERROR"]).any()
+    served_by = df["Served_By"].value_counts()
+    assert len(served_by) == 2 and served_by.sum() == 40
+    assert primary.llm.stats["ok"] + secondary.llm.stats["ok"] == 40 and secondary.llm.stats["ok"] > 0
+    # The primary only sees the calls that tripped the breaker, and no probe within its 10 s cooldown
+    assert primary.llm.stats["outage"] <= 10 + 3
@@ -0,0 +1,37 @@
+import json
+import os
+
+import pandas as pd
+
+from llm_runner.prompts import find_labels
+from llm_runner.runner import Job
+from llm_runner.telemetry import telemetry_path
+
+
+def test_followup_recovers_truncated_answers(mock_server, run_cli, tmp_path):
+    args = ("--modes", "no_cot")
+    results = {}
+    for name, flags in (("clean", ()), ("no_followup", ("--no-followup",)), ("followup", ())):
+        server = mock_server() if name == "clean" else mock_server(rate_truncate=0.3, seed=1)
+        output_dir = str(tmp_path / name)
+        run_cli("--base-url", server.base_url, *args, "--output-dir", output_dir, *flags)
+        df = pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+        results[name] = (server.llm.stats, df, output_dir)
+
+    # Cut off before the output line, a truncated answer has no label
+    stats, df, _ = results["no_followup"]
+    lost = df["RL_Types"] == "PARSE_ERROR_NO_MARKER"
+    assert lost.sum() == stats["truncated"] > 5
+
+    # The same answers, each followed by one short request for just the labels
+    stats, df, output_dir = results["followup"]
+    assert stats["requests"] == 40 + lost.sum()
+    with open(telemetry_path(Job("gpt41", "no_cot").output_filename(output_dir)), encoding="utf-8") as f:
+        assert sum(json.loads(line)["followup"] for line in f) == lost.sum()
+    # Only a follow-up that is itself cut off can leave the row without a label
+    truncated_followups = stats["truncated"] - lost.sum()
+    assert (df["RL_Types"] == "PARSE_ERROR_NO_MARKER").sum() <= truncated_followups < 5
+    clean = results["clean"][1]
+    recovered = [find_labels(df.loc[i, "RL_Types"], "zh") == find_labels(clean.loc[i, "RL_Types"], "zh")
+                 for i in df.index[lost]]
+    assert sum(recovered) >= len(recovered) - truncated_followups
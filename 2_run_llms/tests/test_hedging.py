@@ -0,0 +1,120 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm_runner.hedging import Hedger
+from llm_runner.providers import PROVIDERS, ProviderBackend
+from llm_runner.rate_limit import estimate_tokens
+from llm_runner.runner import Job
+from llm_runner.telemetry import telemetry_path
+
+
+async def answer(value, seconds):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def fail(message, seconds):
+    await asyncio.sleep(seconds)
+    raise RuntimeError(message)
+
+
+def warmed_up(budget=1.0):
+    hedger = Hedger(quantile=95, budget=budget, min_samples=5)
+    hedger.latencies.extend([0.01] * 5)
+    hedger.calls = 5
+    return hedger
+
+
+def test_slow_call_is_raced_by_a_duplicate():
+    hedger = warmed_up()
+
+    async def slow_primary():
+        primary = asyncio.ensure_future(answer("primary", 5))
+        result = await hedger.run(primary, lambda: answer("backup", 0.01))
+        return result, primary
+
+    (result, won), primary = asyncio.run(slow_primary())
+    assert (result, won) == ("backup", True) and primary.cancelled()
+    assert (hedger.hedged, hedger.won) == (1, 1)
+    assert max(hedger.latencies) < 1
+
+
+def test_no_duplicate_while_warming_up_or_over_budget():
+    cold = Hedger(min_samples=5)
+    assert asyncio.run(cold.run(answer("primary", 0.05), lambda: answer("backup", 0))) == ("primary", False)
+    assert cold.hedged == 0
+
+    hedger = warmed_up(budget=0.1)
+    assert asyncio.run(hedger.run(answer("primary", 0.05), lambda: answer("backup", 0))) == ("primary", False)
+    assert (hedger.hedged, hedger.over_budget) == (0, 1)
+
+
+def test_failed_primary_ends_the_race():
+    hedger = warmed_up()
+
+    async def fail_while_the_duplicate_waits():
+        # The duplicate waits for a slot that the primary's caller holds until the race is over
+        backup = asyncio.ensure_future(answer("backup", 30))
+        with pytest.raises(RuntimeError, match="primary"):
+            await asyncio.wait_for(hedger.run(fail("primary", 0.05), lambda: backup), timeout=5)
+        await asyncio.sleep(0)
+        return backup
+
+    assert asyncio.run(fail_while_the_duplicate_waits()).cancelled()
+    assert len(hedger.latencies) == 5
+
+    # A duplicate that fails leaves the primary to answer
+    assert asyncio.run(hedger.run(answer("primary", 0.05), lambda: fail("backup", 0))) == ("primary", False)
+
+
+def test_each_key_is_reconciled_against_its_own_reservation(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEYS", "sk-slow,sk-fast")
+    # A tiny TPM quota hardly refills during the test, so the buckets show what was reserved and reconciled
+    backend = ProviderBackend(PROVIDERS["gpt41"], tpm=60, stream=True, hedger=warmed_up())
+    slow, fast = backend.keys.keys
+    fast.limiter.expected_completion_tokens = 50
+
+    async def send(key, *args):
+        await asyncio.sleep(5 if key is slow else 0.01)
+        return SimpleNamespace(headers={}), {"content": "RL1", "finish_reason": "stop",
+                                             "usage": {"total_tokens": 1000, "completion_tokens": 100}}
+
+    monkeypatch.setattr(backend, "_send", send)
+    stats = {}
+    messages = [{"role": "user", "content": "text"}]
+    assert asyncio.run(backend.complete(messages, stats=stats))["content"] == "RL1"
+    assert stats["hedged"] and stats["hedge_won"]
+
+    # The duplicate answered: its key is charged the 1000 tokens used, not the primary's reservation
+    assert fast.limiter.tokens.tokens == pytest.approx(60 - 1000, abs=1)
+    # The cancelled primary keeps its reservation
+    assert slow.limiter.tokens.tokens == pytest.approx(60 - (estimate_tokens(messages) + 1000), abs=1)
+
+
+def slow_calls(output_dir, seconds):
+    with open(telemetry_path(Job("gpt41", "no_cot").output_filename(output_dir)), encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 40 and all(record["status"] == "ok" for record in records)
+    return records, [record for record in records if record["latency_seconds"] >= seconds]
+
+
+def test_hedging_cuts_hung_requests(mock_server, run_cli, tmp_path):
+    config = {"rate_hang": 0.15, "hang_seconds": 2, "seed": 1}
+    args = ("--modes", "no_cot", "--max-concurrent", "2")
+    server = mock_server(**config)
+    _, slow_unhedged = slow_calls(run_cli("--base-url", server.base_url, *args), 2)
+
+    server = mock_server(**config)
+    output_dir = str(tmp_path / "hedged")
+    run_cli("--base-url", server.base_url, *args, "--hedge", "--hedge-budget", "0.5", "--output-dir", output_dir)
+    records, slow = slow_calls(output_dir, 2)
+    hedged = [record for record in records if record["hedged"]]
+    # A duplicate may wait for a slot, but it is not stuck behind the hang
+    assert hedged and max(record["latency_seconds"] for record in hedged) < 2
+    # Only calls sent before the hedger had 20 latencies can still hang
+    assert len(slow) < len(slow_unhedged) and not any(record["hedged"] for record in slow)
+    assert server.llm.stats["requests"] <= 40 + len(hedged) + server.llm.stats["hung"]
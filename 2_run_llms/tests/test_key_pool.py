@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+
+from llm_runner.key_pool import keys_from_env
+
+
+def test_keys_from_env(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEYS", "sk-a, sk-b:org-x,,sk-a:org-y")
+    assert keys_from_env("OPENAI_API_KEY") == [("sk-a", None), ("sk-b", "org-x")]
+
+    # The single key comes first, and is not repeated by the list
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-b")
+    assert keys_from_env("OPENAI_API_KEY") == [("sk-b", None), ("sk-a", None)]
+
+
+def test_revoked_key_is_drained(mock_server, run_cli, monkeypatch, capsys):
+    monkeypatch.setenv("OPENAI_API_KEYS", "sk-bad,sk-good2")
+    server = mock_server(latency_ms=100, revoked_keys=("sk-bad",))
+    output_dir = run_cli("--base-url", server.base_url, "--modes", "no_cot", "--max-concurrent", "4")
+
+    df = pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+    assert len(df) == 40 and not df["RL_Types"].isin(["ERROR"]).any()
+    assert "Removing API key ...-bad from the pool: HTTP 401 (2 keys left)" in capsys.readouterr().out
+    # Only the first requests sent to the bad key fail, and are sent again on the others
+    stats = server.llm.stats
+    assert 0 < stats["401"] <= 4 and stats["ok"] == 40
+    # The two healthy keys share the load
+    assert stats["key ...mock"] + stats["key ...ood2"] == 40
+    assert min(stats["key ...mock"], stats["key ...ood2"]) >= 10, stats
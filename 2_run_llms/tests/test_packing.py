@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+from llm_runner.mock_server import AnswerBook, answer_labels
+from llm_runner.packing import parse_packed_output
+from llm_runner.prompts import get_prompt_pack
+
+
+def test_parse_english_results():
+    output = ("Text 1: ... Step 4: Output results\nOutput: Recognition Logic 2\n\n"
+              "Results:\n[1] Recognition Logic 2\n[2] Recognition Logic 5, Recognition Logic 6\n[3] None\n[4] maybe")
+    assert parse_packed_output(output, 5, "en") == ["RL2", "RL5, RL6", "N/A", None, None]
+
+
+def test_parse_chinese_results():
+    output = "分析……\n\n汇总结果：\n[2] 认同逻辑3, 认同逻辑4\n[1] 无\n[2] 认同逻辑1"
+    assert parse_packed_output(output, 2, "zh") == ["N/A", "认同逻辑3, 认同逻辑4"]
+
+
+def test_mock_answers_like_the_models():
+    pack = get_prompt_pack("en")
+    assert answer_labels(["RL5", "RL6"], pack) == "Recognition Logic 5, Recognition Logic 6"
+    assert answer_labels([], pack) == "None"
+
+
+def test_packed_english_run(mock_server, run_cli, dataset):
+    server = mock_server()
+    output_dir = run_cli("--base-url", server.base_url, "--modes", "zero_shot", "--languages", "en",
+                         "--pack-size", "4")
+    df = pd.read_csv(os.path.join(output_dir, "gpt41_zero_shot_pack4_en.csv"), keep_default_na=False)
+    assert len(df) == 40
+    # Every text was answered inside its pack: 10 requests, none re-run on its own
+    assert server.llm.stats["requests"] == 10
+    book = AnswerBook()
+    book.load_dataset(dataset)
+    pack = get_prompt_pack("en")
+    expected = [", ".join(book.labels(text, pack)) or "N/A" for text in df["Original_Input_Text"]]
+    assert df["RL_Types"].tolist() == expected
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from llm_runner import key_pool
+from llm_runner.rate_limit import RateLimiter, parse_duration, retry_after_seconds
+
+
+def test_parse_duration():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("") is None and parse_duration("soon") is None
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds({"retry-after-ms": "250", "retry-after": "3"}) == 0.25
+    assert retry_after_seconds({"retry-after": "3"}) == 3
+    message = "Rate limit reached for gpt-4.1 on requests per min. Please try again in 120ms."
+    assert retry_after_seconds({}, message) == pytest.approx(0.12)
+    assert retry_after_seconds(None, "try again in 2s") == 2
+    assert retry_after_seconds({"retry-after": "later"}, "no hint") is None
+
+
+def test_aimd_halves_once_per_burst_and_grows_slowly():
+    limiter = RateLimiter(initial_concurrency=8, max_concurrency=16)
+    # 429s that arrive together are one congestion signal
+    for _ in range(3):
+        limiter.on_rate_limited(0.01)
+    assert (limiter.concurrency, limiter.rate_limited_count) == (4, 3)
+    assert limiter.wait_time() > 0
+
+    limiter.on_success()
+    assert limiter.concurrency == pytest.approx(4.25)
+    # About one slot per window of successful calls
+    for _ in range(3):
+        limiter.on_success()
+    assert limiter.limit == 4 and limiter.concurrency == pytest.approx(4.9, abs=0.05)
+    limiter.on_success()
+    assert limiter.limit == 5
+
+    # A burst more than a second later halves it again
+    limiter._last_decrease -= 2
+    limiter.on_rate_limited(0.01)
+    assert limiter.limit == 2
+
+
+class FixedLimiter(RateLimiter):
+    """A client without adaptation: fixed concurrency, quota headers ignored, only waiting as long as a 429 asks"""
+
+    def on_success(self, *args, **kwargs):
+        pass
+
+    def update_from_headers(self, headers):
+        pass
+
+    def on_rate_limited(self, retry_after=None, headers=None):
+        self.rate_limited_count += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + (retry_after or 1.0))
+
+
+def test_limiter_keeps_under_the_quota(mock_server, run_cli, tmp_path, monkeypatch):
+    # 8 requests a second, reported as 480 rpm, plus a few 429s out of the blue
+    quota = {"rpm": 8, "quota_window": 1, "rate_429": 0.05, "retry_after_ms": 200}
+    rate_limited = {}
+    for limiter in ("adaptive", "fixed"):
+        if limiter == "fixed":
+            monkeypatch.setattr(key_pool, "RateLimiter", FixedLimiter)
+        server = mock_server(**quota)
+        output_dir = str(tmp_path / limiter)
+        run_cli("--base-url", server.base_url, "--modes", "no_cot", "--max-concurrent", "8",
+                "--output-dir", output_dir)
+        df = pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+        assert len(df) == 40 and not df["RL_Types"].isin(["ERROR"]).any()
+        assert server.llm.stats["ok"] == 40
+        rate_limited[limiter] = server.llm.stats["429"]
+
+    # Pacing by the learned quota avoids most of the 429s that a fixed window of 5 keeps running into
+    assert rate_limited["adaptive"] < rate_limited["fixed"] * 0.5, rate_limited
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pandas as pd
+
+from llm_runner.checkpoint import attempts_path
+from llm_runner.runner import Job, iter_dataset
+
+
+def read_output(output_dir):
+    return pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+
+
+def test_repair_without_results_file(mock_server, run_cli, capsys):
+    server = mock_server()
+    output_dir = run_cli("--base-url", server.base_url, "--modes", "no_cot", "--repair")
+    assert "No results file to repair" in capsys.readouterr().out
+    assert server.llm.stats["requests"] == 0 and not os.path.exists(os.path.join(output_dir, "gpt41_no_cot.csv"))
+
+
+def test_repair_resends_only_failed_rows(mock_server, run_cli):
+    server = mock_server()
+    args = ("--base-url", server.base_url, "--modes", "no_cot")
+    output_dir = run_cli(*args)
+    first = read_output(output_dir)
+
+    broken = first.copy()
+    broken.loc[[3, 17], "RL_Types"] = "ERROR"
+    broken.loc[29, "RL_Types"] = "PARSE_ERROR_NO_MARKER"
+    # A missing row is not a failed one: --repair leaves it alone
+    broken.drop(index=5).to_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), index=False)
+    run_cli(*args, "--repair")
+    assert server.llm.stats["requests"] == 43
+    pd.testing.assert_frame_equal(read_output(output_dir), first.drop(index=5).reset_index(drop=True))
+
+    with open(attempts_path(Job("gpt41", "no_cot").output_filename(output_dir)), encoding="utf-8") as f:
+        attempts = [json.loads(line) for line in f]
+    assert sorted(record["previous_RL_Types"] for record in attempts) == ["ERROR", "ERROR", "PARSE_ERROR_NO_MARKER"]
+    assert all(record["attempt"] == 1 for record in attempts)
+
+
+def test_rows_out_of_attempts_are_skipped(mock_server, run_cli, dataset, capsys):
+    server = mock_server()
+    args = ("--base-url", server.base_url, "--modes", "no_cot")
+    output_dir = run_cli(*args)
+    broken = read_output(output_dir)
+    broken.loc[[3, 17], "RL_Types"] = "ERROR"
+    output_filename = Job("gpt41", "no_cot").output_filename(output_dir)
+    broken.to_csv(output_filename, index=False)
+
+    # Row 3 has already been re-run twice
+    key = list(iter_dataset(dataset))[3].key
+    with open(attempts_path(output_filename), "w", encoding="utf-8") as f:
+        for attempt in (1, 2):
+            f.write(json.dumps({"key": key, "attempt": attempt, "RL_Types": "ERROR"}) + "\n")
+    run_cli(*args, "--repair", "--max-attempts", "2")
+    assert "Not retrying 1 rows that already failed 2 re-runs" in capsys.readouterr().out
+    assert server.llm.stats["requests"] == 41
+    df = read_output(output_dir)
+    assert df.loc[3, "RL_Types"] == "ERROR" and df.loc[17, "RL_Types"] != "ERROR"
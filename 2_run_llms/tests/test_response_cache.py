@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from llm_runner.response_cache import ResponseCache
+
+VALUE = {"content": "x" * 100, "finish_reason": "stop"}
+SIZE = len(json.dumps(VALUE))
+
+
+def test_hits_do_not_write_until_the_next_put(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=2 * SIZE)
+    cache.put("a", VALUE)
+    cache.put("b", VALUE)
+    changes = cache._db.total_changes
+    for _ in range(50):
+        assert cache.get("a") == VALUE
+    assert cache._db.total_changes == changes and not cache._db.in_transaction
+
+    # "a" was read after "b" was written, so "b" is the least recently used
+    cache.put("c", VALUE)
+    assert cache.get("a") == VALUE and cache.get("b") is None
+    cache.close()
+
+
+def test_hits_are_kept_on_close(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("a", VALUE)
+    cache.put("b", VALUE)
+    cache.get("a")
+    cache.close()
+
+    reopened = ResponseCache(path, max_bytes=SIZE)
+    reopened.put("b", VALUE)
+    assert reopened.get("a") is None and reopened.get("b") == VALUE
+    reopened.close()
+
+
+def test_identical_requests_in_flight_are_fetched_once(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return VALUE
+
+    async def ask_five():
+        return await asyncio.gather(*(cache.get_or_fetch("k", fetch) for _ in range(5)))
+
+    results = asyncio.run(ask_five())
+    assert calls == 1 and cache.coalesced == 4
+    assert sum(not result.get("cache_hit") for result in results) == 1
+    assert asyncio.run(cache.get_or_fetch("k", fetch))["cache_hit"] and calls == 1
+    cache.close()
+
+
+def test_waiters_fetch_again_when_the_shared_call_is_cancelled(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return VALUE
+
+    async def cancel_the_leader():
+        leader = asyncio.ensure_future(cache.get_or_fetch("k", fetch))
+        await asyncio.sleep(0)
+        waiters = asyncio.gather(*(cache.get_or_fetch("k", fetch) for _ in range(3)))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiters
+
+    results = asyncio.run(cancel_the_leader())
+    # One waiter takes over the call, the other two share it
+    assert calls == 2 and cache.coalesced == 2
+    assert sum(not result.get("cache_hit") for result in results) == 1
+    assert all(result["content"] == VALUE["content"] for result in results)
+    cache.close()
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pandas as pd
+
+from llm_runner.checkpoint import journal_path
+from llm_runner.resume import ResumeIndex, WorkItem
+from llm_runner.runner import Job, iter_dataset
+
+
+def read_output(output_dir, name="gpt41_no_cot.csv"):
+    return pd.read_csv(os.path.join(output_dir, name), keep_default_na=False)
+
+
+def test_index_keeps_keys_and_matches_duplicates_in_order():
+    items = [WorkItem(0, "a", "same"), WorkItem(1, "b", "other"), WorkItem(2, "c", "same")]
+    index = ResumeIndex(item.key for item in items)
+    assert index.load_csv_rows([
+        {"Original_Input_Text": "same", "RL_Types": "RL1"},
+        {"Original_Input_Text": "same", "RL_Types": "ERROR"},
+        {"Original_Input_Text": "gone", "RL_Types": "RL2"},
+    ]) == 3
+    assert index.dropped == 1
+    assert len(index) == 3 and items[1].key in index and "z:0" not in index
+    assert index.select_pending() == 2 and list(index.iter_selected()) == [items[1].key, items[2].key]
+    assert index.select_pending(retry_failed=False) == 1 and items[1].key in index.selected
+    assert index.select_failed() == 1 and list(index.iter_selected()) == [items[2].key]
+    assert (index.deselect(items[2].key), len(index.selected)) == (1, 0)
+
+    # A journal record supersedes the CSV row it repaired; one whose row left the dataset is dropped
+    assert index.load_journal([
+        {"key": items[2].key, "comment_id": "c", "Original_Input_Text": "same", "RL_Types": "RL3"},
+        {"key": WorkItem(3, "d", "gone").key, "comment_id": "d", "Original_Input_Text": "gone", "RL_Types": "RL4"},
+    ]) == 2
+    assert index.dropped == 2 and index.get(WorkItem(3, "d", "gone").key) is None
+    assert index.failed_count() == 0
+    assert [row["RL_Types"] for row in index.iter_rows()] == ["RL1", "RL3"]
+    assert index.columns() == ["Original_Input_Text", "RL_Types"]
+    index.close()
+
+
+def test_rerun_sends_only_failed_rows(mock_server, run_cli):
+    server = mock_server()
+    args = ("--base-url", server.base_url, "--modes", "no_cot")
+    output_dir = run_cli(*args)
+    first = read_output(output_dir)
+    assert server.llm.stats["requests"] == 40
+
+    failed = first.copy()
+    failed.loc[[3, 17, 29], "RL_Types"] = "ERROR"
+    failed.to_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), index=False)
+    run_cli(*args, "--schedule", "longest")
+    assert server.llm.stats["requests"] == 43
+    pd.testing.assert_frame_equal(read_output(output_dir), first)
+
+
+def test_interrupted_run_resumes_from_journal(mock_server, run_cli, dataset):
+    server = mock_server()
+    args = ("--base-url", server.base_url, "--modes", "no_cot")
+    output_dir = run_cli(*args)
+    first = read_output(output_dir)
+
+    # As if the run had been killed after 10 results: no CSV yet, only the journal
+    output_filename = Job("gpt41", "no_cot").output_filename(output_dir)
+    os.remove(output_filename)
+    with open(journal_path(output_filename), "w", encoding="utf-8") as f:
+        for item, row in zip(list(iter_dataset(dataset))[:10], first.to_dict("records")):
+            f.write(json.dumps({"key": item.key, "comment_id": item.comment_id, **row}, ensure_ascii=False) + "\n")
+    run_cli(*args)
+    assert server.llm.stats["requests"] == 70
+    assert not os.path.exists(journal_path(output_filename))
+    pd.testing.assert_frame_equal(read_output(output_dir), first)
@@ -0,0 +1,69 @@
+import asyncio
+import os
+from dataclasses import replace
+
+import pandas as pd
+
+from llm_runner import routing
+from llm_runner.providers import PROVIDERS, ProviderBackend
+from llm_runner.routing import Router
+from llm_runner.runner import Job
+
+
+def make_router(slo=1.0):
+    local = ProviderBackend(replace(PROVIDERS["Qwen3-32B"], base_url="http://127.0.0.1:9/v1"), api_key="sk-mock")
+    api = ProviderBackend(PROVIDERS["gpt41"], api_key="sk-mock")
+    return Router([local, api], slo=slo), local, api
+
+
+def test_failed_dispatches_are_not_latency_samples():
+    router, local, api = make_router()
+    job = Job("routed", "no_cot")
+
+    async def dispatch_failures():
+        # The free local backend is tried first, and fails at once
+        for _ in range(router.min_samples):
+            async with router.dispatch(job, ["text"]) as sent:
+                assert sent.backend is local
+                sent.ok = False
+        async with router.dispatch(job, ["text"]) as sent:
+            return sent.backend
+
+    assert asyncio.run(dispatch_failures()) is api
+    local_route, api_route = router.routes
+    assert not local_route.recent() and local_route.failed == router.min_samples
+    assert len(api_route.recent()) == 1
+    assert "Qwen3-32B 5 requests, 5 failed" in router.describe()
+
+
+def test_abandoned_dispatch_counts_neither_way():
+    router, local, _ = make_router()
+
+    async def cancelled():
+        try:
+            async with router.dispatch(Job("routed", "no_cot"), ["text"]):
+                raise asyncio.CancelledError
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancelled())
+    route = router.routes[0]
+    assert (route.recent(), route.failed, route.outstanding) == ([], 0, 0)
+
+
+def test_routing_avoids_a_failing_backend(mock_server, run_cli, capsys):
+    broken = mock_server(rate_5xx=1.0)
+    healthy = mock_server()
+    # A short breaker give-up, so the requests sent to the broken server fail in seconds rather than minutes
+    output_dir = run_cli("--route", f"Qwen3-32B={broken.base_url}", f"gpt41={healthy.base_url}",
+                         "--route-slo", "1", "--modes", "no_cot", "--max-concurrent", "4",
+                         "--breaker-cooldown", "0.2", "--breaker-give-up", "0.5")
+    assert routing._router is None
+
+    df = pd.read_csv(os.path.join(output_dir, "routed_no_cot.csv"), keep_default_na=False)
+    errors = df["RL_Types"] == "ERROR"
+    # Only the requests sent while the broken backend was being learned fail
+    assert 0 < errors.sum() <= 5 and healthy.llm.stats["ok"] == 40 - errors.sum()
+    assert (df.loc[~errors, "Served_By"] == f"gpt-4.1@{healthy.base_url.split('/')[2]}").all()
+    routing_line = next(line for line in capsys.readouterr().out.splitlines() if "Routing: " in line)
+    assert f"Qwen3-32B {errors.sum()} requests, {errors.sum()} failed" in routing_line
@@ -0,0 +1,44 @@
+import os
+import time
+
+import pandas as pd
+
+from llm_runner.mock_server import synthesize_answer
+from llm_runner.prompts import get_prompt_pack
+from llm_runner.resume import WorkItem
+from llm_runner.scheduling import longest_first, length_buckets
+
+
+def test_orders():
+    items = [WorkItem(i, f"c{i}", f"text {i}") for i in range(6)]
+    costs = {item.key: cost for item, cost in zip(items, [5, 1, 9, 5, 2, 8])}
+    assert [item.index for item in longest_first(items, costs)] == [2, 5, 0, 3, 4, 1]
+    # Buckets of two, longest bucket first, dataset order inside a bucket
+    assert [item.index for item in length_buckets(items, costs, 3)] == [2, 5, 0, 3, 1, 4]
+
+
+def test_longest_first_shortens_the_run(mock_server, run_cli, dataset, tmp_path):
+    # Earlier answers of another model: short ones, and a very long one for the last text
+    pack = get_prompt_pack("zh")
+    texts = pd.read_csv(dataset)["text"].astype(str).tolist()
+    server = mock_server(ms_per_token=0.5)
+    answers = [synthesize_answer(server.llm.book.labels(text, pack), pack) for text in texts]
+    answers[-1] = "分析" * 2000 + "\n" + answers[-1]
+    history = str(tmp_path / "qwen3_no_cot.csv")
+    pd.DataFrame({"Original_Input_Text": texts, "Raw_Model_Output": answers}).to_csv(history, index=False)
+    server.llm.book.load_outputs(history)
+
+    makespans = {}
+    for order in ("dataset", "longest"):
+        output_dir = str(tmp_path / order)
+        os.makedirs(output_dir)
+        pd.read_csv(history).to_csv(os.path.join(output_dir, "qwen3_no_cot.csv"), index=False)
+        start = time.monotonic()
+        run_cli("--base-url", server.base_url, "--modes", "no_cot", "--max-concurrent", "4", "--schedule", order,
+                "--output-dir", output_dir)
+        makespans[order] = time.monotonic() - start
+        df = pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+        assert df["Original_Input_Text"].tolist() == texts and not df["RL_Types"].isin(["ERROR"]).any()
+
+    # In dataset order the 2 s answer starts after all the others; sent first, it overlaps them
+    assert makespans["longest"] < 0.8 * makespans["dataset"], makespans
@@ -0,0 +1,60 @@
+import json
+import os
+import random
+
+import pandas as pd
+
+from llm_runner.calibrate import calibrate_job
+from llm_runner.pack_report import golden_labels, predicted_labels, label_f1
+from llm_runner.runner import Job
+from llm_runner.scoring import Calibration, calibration_path
+
+
+def test_thresholds_are_fitted_per_label():
+    rng = random.Random(0)
+    scores, golden = [], []
+    for _ in range(200):
+        rl1, rl2 = rng.random() < 0.3, rng.random() < 0.3
+        # RL1 is never scored above 0.5, RL2 scores high whether or not it applies
+        scores.append({"RL1": (0.35 if rl1 else 0.1) + rng.uniform(-0.05, 0.05),
+                       "RL2": (0.95 if rl2 else 0.7) + rng.uniform(-0.05, 0.04)})
+        golden.append({label for label, hit in (("RL1", rl1), ("RL2", rl2)) if hit})
+
+    calibration = Calibration.fit(scores, golden, ["RL1", "RL2"])
+    predicted = [set(calibration.apply({"Label_Scores": json.dumps(row)})["RL_Types"].split(", ")) - {"N/A"}
+                 for row in scores]
+    assert predicted == golden
+    probabilities = calibration.probabilities({"RL1": 0.38, "RL2": 0.72})
+    assert probabilities["RL1"] > 0.9 and probabilities["RL2"] < 0.1
+
+
+def test_calibrate_scored_run(mock_server, run_cli, dataset):
+    server = mock_server(logprob_noise=2.0, seed=5)
+    args = ("--base-url", server.base_url, "--modes", "no_cot", "--score")
+    output_dir = run_cli(*args)
+    job = Job("gpt41", "no_cot", scoring="binary")
+    output_filename = job.output_filename(output_dir)
+    raw = pd.read_csv(output_filename, keep_default_na=False)
+    assert server.llm.stats["requests"] == 40 * 7
+
+    calibration = calibrate_job(job, dataset, output_dir)
+    assert os.path.exists(calibration_path(output_filename))
+    assert len({c.threshold for c in calibration.labels.values()}) > 1
+    calibrated = pd.read_csv(output_filename, keep_default_na=False)
+    assert all(0 <= p <= 1 for row in calibrated["Calibrated_Scores"] for p in json.loads(row).values())
+
+    gold = [golden_labels(value) for value in pd.read_csv(dataset)["Golden"]]
+    before = label_f1(gold, [predicted_labels(value, "zh") for value in raw["RL_Types"]])
+    after = label_f1(gold, [predicted_labels(value, "zh") for value in calibrated["RL_Types"]])
+    # Each label's threshold is the best cut on these rows, so no label can lose F1 here
+    assert [after[f"RL{n}"] >= before[f"RL{n}"] for n in range(1, 8)] == [True] * 7, (before, after)
+    assert after["macro"] > before["macro"]
+
+    # Rows scored later use the saved calibration
+    calibrated.loc[[0, 1], "RL_Types"] = "ERROR"
+    calibrated.loc[[0, 1], "Calibrated_Scores"] = ""
+    calibrated.to_csv(output_filename, index=False)
+    run_cli(*args)
+    rerun = pd.read_csv(output_filename, keep_default_na=False)
+    assert server.llm.stats["requests"] == 42 * 7
+    assert all(rerun["Calibrated_Scores"][:2])
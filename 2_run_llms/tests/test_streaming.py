@@ -0,0 +1,51 @@
+import json
+import os
+
+import pandas as pd
+
+from llm_runner.mock_server import synthesize_answer
+from llm_runner.prompts import find_label_end, get_prompt_pack, parse_output
+from llm_runner.runner import Job
+from llm_runner.telemetry import telemetry_path
+
+
+def test_find_label_end():
+    zh = "第三步：分析\n**输出:** 认同逻辑1, 认同逻辑2\n以上是我的分析。"
+    end = find_label_end(zh, "zh")
+    assert zh[:end].endswith("认同逻辑2") and parse_output(zh[:end], "zh") == "认同逻辑1, 认同逻辑2"
+    # The label line is not complete until its newline arrives
+    assert find_label_end(zh[:zh.index("\n以上")], "zh") is None
+
+    en = "Step 3: ...\nStep 4: Output results\n```\nRL2, RL5\n```\nThat is all."
+    end = find_label_end(en, "en")
+    assert en[:end].endswith("```") and parse_output(en[:end], "en") == "RL2, RL5"
+    # An open code block waits for its closing fence
+    assert find_label_end(en[:en.index("RL5") + 4], "en") is None
+
+    # The plain marker can appear in the reasoning, so it does not end the answer
+    assert find_label_end("Output: RL1 looks likely\nStep 3: ...", "en") is None
+    assert find_label_end(zh, "en") is None
+
+
+def test_stream_stops_after_the_label_line(mock_server, run_cli, dataset, tmp_path):
+    # Recorded answers that ramble on after their label line
+    pack = get_prompt_pack("zh")
+    texts = pd.read_csv(dataset)["text"].astype(str).tolist()
+    server = mock_server(chunk_delay_ms=5)
+    answers = [synthesize_answer(server.llm.book.labels(text, pack), pack) for text in texts]
+    history = str(tmp_path / "qwen3_no_cot.csv")
+    rambling = [answer + "\n\n补充说明：" + "这条评论还可以从多个角度理解。" * 20 for answer in answers]
+    pd.DataFrame({"Original_Input_Text": texts, "Raw_Model_Output": rambling}).to_csv(history, index=False)
+    server.llm.book.load_outputs(history)
+
+    output_dir = run_cli("--base-url", server.base_url, "--modes", "no_cot", "--stream")
+    df = pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+    # Cut right after the label line, and parsed as if the model had stopped there
+    assert df["Raw_Model_Output"].tolist() == answers
+    assert df["RL_Types"].tolist() == [parse_output(answer, "zh") for answer in answers]
+    assert not df["RL_Types"].isin(["ERROR", "PARSE_ERROR_NO_MARKER"]).any()
+
+    with open(telemetry_path(Job("gpt41", "no_cot").output_filename(output_dir)), encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert all(record["finish_reason"] == "early_stop" and record["usage_estimated"] for record in records)
+    assert server.llm.stats["stream_closed_early"] > 0
@@ -0,0 +1,39 @@
+import random
+
+from llm_runner.telemetry import TelemetryStats, percentile
+
+
+def record(latency, **fields):
+    return {"mode": "no_cot", "status": "ok", "latency_seconds": latency, "prompt_tokens": 100,
+            "completion_tokens": 10, "cost": 0.001, **fields}
+
+
+def test_stats_stay_bounded_and_match_the_records():
+    rng = random.Random(0)
+    latencies = [rng.lognormvariate(0, 1) for _ in range(20000)]
+    stats = TelemetryStats()
+    for latency in latencies:
+        stats.add(record(latency))
+    buckets = len(stats.latency_buckets)
+    for latency in latencies:
+        stats.add(record(latency))
+    # Twice the records, the same buckets
+    assert len(stats.latency_buckets) == buckets < 400
+    summary = stats.summary()
+    assert summary["requests"] == summary["api_calls"] == 40000 and summary["prompt_tokens"] == 4_000_000
+    for q in (50, 95, 99):
+        exact = percentile(latencies, q)
+        assert exact <= summary[f"p{q}"] <= exact * 1.05
+
+
+def test_merged_stats_equal_stats_of_all_records():
+    first, second, both = TelemetryStats(), TelemetryStats(), TelemetryStats()
+    records = [record(0.2), record(1.5, cache_hit=True), record(3.0, status="error", finish_reason="length"),
+               record(0.4, hedged=True, hedge_won=True), record(0.8, failover=True)]
+    for n, item in enumerate(records):
+        (first if n % 2 else second).add(item)
+        both.add(item)
+    merged = TelemetryStats().merge(first).merge(second).summary()
+    assert merged == both.summary()
+    assert (merged["cache_hits"], merged["errors"], merged["truncated"], merged["hedged"], merged["failover"]) == \
+        (1, 1, 1, 1, 1)
@@ -0,0 +1,40 @@
+from llm_runner.prompts import get_prompt_pack, parse_output
+from llm_runner.voting import split_labels, vote
+
+
+def example_answer(language: str, labels: str) -> str:
+    """The few-shot example answer ending in `labels`"""
+    pack = get_prompt_pack(language)
+    return next(m["content"] for m in pack.few_shot_examples
+                if m["role"] == "assistant" and m["content"].endswith(labels))
+
+
+def test_english_answer_labels():
+    parsed = parse_output(example_answer("en", "Recognition Logic 5, Recognition Logic 6"), "en")
+    assert parsed.endswith("Recognition Logic 5, Recognition Logic 6")
+    assert split_labels(parsed, "en") == ["RL5", "RL6"]
+    assert split_labels("RL7, RL1", "en") == ["RL1", "RL7"]
+    assert split_labels("N/A", "en") == []
+    assert split_labels("PARSE_ERROR_NO_MARKER", "en") is None
+
+
+def test_vote_english():
+    a = parse_output(example_answer("en", "Recognition Logic 5, Recognition Logic 6"), "en")
+    b = parse_output(example_answer("en", "Output: Recognition Logic 5"), "en")
+    result = vote([a, a, b], "en")
+    assert result["RL_Types"] == "RL5, RL6"
+    assert result["fractions"] == {"RL5": 1.0, "RL6": 0.6667}
+    assert result["votes"] == 3
+
+
+def test_vote_chinese():
+    a = parse_output(example_answer("zh", "认同逻辑3, 认同逻辑4"), "zh")
+    result = vote([a, "认同逻辑4", "PARSE_ERROR_NO_MARKER"], "zh")
+    assert result["RL_Types"] == "认同逻辑3, 认同逻辑4"
+    assert result["votes"] == 2
+
+
+def test_vote_failures():
+    assert vote(["ERROR", "ERROR"], "en")["RL_Types"] == "ERROR"
+    assert vote(["ERROR", "PARSE_ERROR_NO_MARKER"], "en")["RL_Types"] == "PARSE_ERROR_NO_MARKER"
+    assert vote(["N/A", "N/A", "RL2"], "en")["RL_Types"] == "N/A"
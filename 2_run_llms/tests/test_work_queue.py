@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from llm_runner.resume import WorkItem
+from llm_runner.work_queue import WorkQueue
+
+from conftest import ROOT
+
+ITEMS = [WorkItem(i, f"c{i}", f"text {i}") for i in range(3)]
+KEYS = {item.key for item in ITEMS}
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    first = WorkQueue(path, "first", lease_seconds=0.05)
+    second = WorkQueue(path, "second", lease_seconds=30)
+    assert first.enqueue("job", ITEMS) == 3
+    assert first.lease("job", 2) == ITEMS[:2]
+    assert second.lease("job", 5) == ITEMS[2:]
+
+    # The first worker stops heartbeating, so its rows go to the second one
+    time.sleep(0.1)
+    assert second.lease("job", 5) == ITEMS[:2]
+    assert second.complete("job", ITEMS[0].key, {"key": ITEMS[0].key, "RL_Types": "RL1"})
+    assert not first.complete("job", ITEMS[0].key, {"key": ITEMS[0].key, "RL_Types": "RL2"})
+    assert [record["RL_Types"] for record in first.results("job")] == ["RL1"]
+
+    # A failed result is re-opened when the job is queued again
+    second.complete("job", ITEMS[1].key, {"key": ITEMS[1].key, "RL_Types": "ERROR"})
+    assert second.enqueue("job", ITEMS) == 1
+    assert second.counts("job") == {"done": 1, "leased": 1, "pending": 1}
+    first.close()
+    second.close()
+
+
+def test_locked_queue_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = WorkQueue(path, "worker")
+    queue.enqueue("job", ITEMS)
+    # Another runner holds the write lock for half a second
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def lease_all():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        asyncio.get_running_loop().call_later(0.5, other.execute, "COMMIT")
+        leased = [item async for item in queue.leased_items("job", KEYS, batch=10)]
+        ticker.cancel()
+        return leased, ticks
+
+    leased, ticks = asyncio.run(lease_all())
+    assert leased == ITEMS
+    assert ticks >= 20
+    other.close()
+    queue.close()
+
+
+def test_two_runners_share_one_queue(mock_server, dataset, tmp_path):
+    server = mock_server()
+    queue_path = str(tmp_path / "queue.sqlite")
+    output_dir = str(tmp_path / "llm_outputs")
+    # Small leases, so neither runner takes every item at once
+    args = ["--no-cache", "--dataset", dataset, "--output-dir", output_dir, "--base-url", server.base_url,
+            "--modes", "no_cot", "--queue", queue_path, "--max-concurrent", "4"]
+    env = {**os.environ, "OPENAI_API_KEY": "sk-mock"}
+    runners = [subprocess.Popen([sys.executable, "-m", "llm_runner", *args, "--worker-id", worker], cwd=ROOT, env=env,
+                                stdout=subprocess.DEVNULL) for worker in ("a", "b")]
+    assert [runner.wait(timeout=120) for runner in runners] == [0, 0]
+
+    df = pd.read_csv(os.path.join(output_dir, "gpt41_no_cot.csv"), keep_default_na=False)
+    assert len(df) == 40 and not df["RL_Types"].isin(["ERROR", "PARSE_ERROR_NO_MARKER"]).any()
+    assert server.llm.stats["requests"] == 40
+    workers = {row[0] for row in sqlite3.connect(queue_path).execute("SELECT worker FROM work")}
+    assert workers == {"a", "b"}
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Wall time and peak memory of the parsing, evaluation and error-analysis paths on scaled data
+
+    python benchmarks/run_benchmarks.py --rows 10000 100000
+    python benchmarks/run_benchmarks.py --compare
+
+The evaluation functions (clean_zh_output, parse_RL_category,
+evaluate_predictions, ...) are loaded from the definition cells of
+3_evaluation_results/evaluate_{zh,en}.ipynb, and the error-analysis
+functions (analyze_model_errors, find_consensus_errors, ...) from the
+scripts in 4_error_analysis/errors_data, so the notebooks and scripts
+stay the single source of that code. Every run appends one record per case to
+benchmarks/results.jsonl, tagged with the git commit, and --compare
+prints the latest results of this commit next to the previous commit's.
+"""
+
+import io
+import os
+import ast
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout, chdir
+from typing import List, Dict, Any, Callable, Optional
+
+import pandas as pd
+
+from scale_dataset import ROOT, DATA_DIR, SIZES, scale, scaled_dir
+
+sys.path.insert(0, os.path.join(ROOT, '2_run_llms'))
+from llm_runner.prompts import parse_output  # noqa: E402
+
+NOTEBOOKS = {
+    "zh": os.path.join(ROOT, '3_evaluation_results', 'evaluate_zh.ipynb'),
+    "en": os.path.join(ROOT, '3_evaluation_results', 'evaluate_en.ipynb'),
+}
+ERROR_ANALYSIS_DIR = os.path.join(ROOT, '4_error_analysis', 'errors_data')
+RESULTS_PATH = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+# Rows per model of the error-analysis scripts' merge on text above which their cases are skipped
+MAX_MERGE_ROWS = 100_000
+# Slowdown versus the previous commit that --compare flags
+REGRESSION_RATIO = 1.2
+
+
+def run_definitions(nodes: List[ast.stmt], path: str, namespace: Dict[str, Any]):
+    """Exec statements one by one; an import that is not installed (e.g. sklearn) is noted and skipped"""
+    for node in nodes:
+        try:
+            exec(compile(ast.Module(body=[node], type_ignores=[]), path, "exec"), namespace)
+        except ImportError as e:
+            namespace.setdefault("_missing", []).append(str(e))
+
+
+def load_notebook_functions(path: str) -> Dict[str, Any]:
+    """Run the import/definition-only cells of a notebook and return the resulting namespace.
+
+    The cases that need a missing import are reported as skipped instead
+    of failing the run.
+    """
+    namespace = {"pd": pd, "re": __import__("re")}
+    with open(path, encoding='utf-8') as f:
+        cells = json.load(f)["cells"]
+    for cell in cells:
+        if cell["cell_type"] != "code":
+            continue
+        source = "".join(cell["source"])
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        if not tree.body or not all(isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef))
+                                    for node in tree.body):
+            continue
+        run_definitions(tree.body, path, namespace)
+    return namespace
+
+
+def is_literal_assignment(node: ast.stmt) -> bool:
+    """`models = {...}` and the like: constants the script functions read, without module-level work"""
+    if not isinstance(node, ast.Assign):
+        return False
+    try:
+        ast.literal_eval(node.value)
+    except ValueError:
+        return False
+    return True
+
+
+def load_script_functions(name: str, **script_globals) -> Dict[str, Any]:
+    """Imports, functions and constant assignments of one 4_error_analysis/errors_data script.
+
+    The module-level work (reading ../0_data_collection/dataset.csv, the
+    analysis loops and prints) is skipped; globals the functions use, such
+    as `dataset`, are passed in instead.
+    """
+    path = os.path.join(ERROR_ANALYSIS_DIR, name)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    namespace = dict(script_globals)
+    run_definitions([node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef))
+                     or is_literal_assignment(node)], path, namespace)
+    return namespace
+
+
+def script_workdir(directory: str) -> str:
+    """{rows}/4_error_analysis, from where the scripts' ../2_run_llms/llm_outputs paths reach the scaled outputs"""
+    workdir = os.path.join(directory, '4_error_analysis')
+    link = os.path.join(directory, '2_run_llms', 'llm_outputs')
+    os.makedirs(workdir, exist_ok=True)
+    os.makedirs(os.path.dirname(link), exist_ok=True)
+    if not os.path.lexists(link):
+        os.symlink(os.path.join('..', 'llm_outputs'), link)
+    return workdir
+
+
+def merge_rows(dataset: pd.DataFrame, output_path: str) -> Optional[int]:
+    """Rows of the scripts' pd.merge(dataset, output, on text): every copy of a text pairs with every other.
+
+    None if the output file has no Original_Input_Text (scaled before the
+    scripts were benchmarked).
+    """
+    try:
+        output = pd.read_csv(output_path, usecols=['Original_Input_Text'])['Original_Input_Text']
+    except (ValueError, OSError):
+        return None
+    counts = dataset['text'].value_counts()
+    return int((counts * output.value_counts().reindex(counts.index, fill_value=0)).sum())
+
+
+def model_columns(directory: str, language: str) -> Dict[str, pd.Series]:
+    """RL_Types of every scaled output file of one prompt language, as the notebooks merge them"""
+    columns = {}
+    outputs_dir = os.path.join(directory, 'llm_outputs')
+    for name in sorted(os.listdir(outputs_dir)):
+        stem = os.path.splitext(name)[0]
+        if name.endswith('.csv') and stem.endswith('en') == (language == "en"):
+            columns[stem] = pd.read_csv(os.path.join(outputs_dir, name), usecols=['RL_Types'])['RL_Types']
+    return columns
+
+
+def error_analysis_cases(directory: str, dataset: pd.DataFrame,
+                         max_merge_rows: int = MAX_MERGE_ROWS) -> Dict[str, Optional[Callable[[], Any]]]:
+    """The 4_error_analysis scripts' own functions, run from a work directory inside the scaled data"""
+    names = ["error_analysis_all_models", "load_model_predictions", "rl_category_errors", "consensus_errors",
+             "rl7_missed_samples"]
+    all_models = load_script_functions('error_analysis_all_models.py', dataset=dataset)
+    category = load_script_functions('rl_category_analysis.py', dataset=dataset)
+    rl7 = load_script_functions('rl7_missed_analysis.py', dataset=dataset)
+
+    files = sorted({model_file for model_file, _ in all_models["models_to_analyze"]} | set(category["models"].values()))
+    rows = [merge_rows(dataset, os.path.join(directory, 'llm_outputs', name)) for name in files]
+    if None in rows:
+        print(f"error-analysis cases will be skipped: the scaled outputs have no Original_Input_Text; "
+              f"rescale with scale_dataset.py")
+        return dict.fromkeys(names)
+    # Resampled rows repeat each text, and the merge pairs every copy in the dataset with every copy in the output
+    print(f"error-analysis merge on text: {len(dataset)} dataset rows -> up to {max(rows):,} merged rows per model "
+          f"({max(rows) / len(dataset):.0f}x)")
+    if max(rows) > max_merge_rows:
+        print(f"error-analysis cases will be skipped: more than {max_merge_rows:,} merged rows per model "
+              f"(--max-merge-rows)")
+        return dict.fromkeys(names)
+
+    workdir = script_workdir(directory)
+
+    def in_workdir(function: Callable[[], Any]) -> Callable[[], Any]:
+        def call():
+            with chdir(workdir), redirect_stdout(io.StringIO()):
+                return function()
+        return call
+
+    def analyze_all_models():
+        # The script's main loop, without the summary prints
+        return [all_models["analyze_model_errors"](model_file, model_name)
+                for model_file, model_name in all_models["models_to_analyze"]]
+
+    def load_predictions():
+        return {name: category["load_model_predictions"](model_file) for name, model_file in category["models"].items()}
+
+    def share_predictions():
+        # Both scripts load the same models; the merges themselves are timed by load_model_predictions
+        if not category.get("all_predictions"):
+            category["all_predictions"] = rl7["all_predictions"] = load_predictions()
+
+    def after_merge(function: Callable[[], Any]) -> Callable[[], Any]:
+        case = in_workdir(function)
+        case.setup = in_workdir(share_predictions)
+        return case
+
+    return {
+        "error_analysis_all_models": in_workdir(analyze_all_models),
+        "load_model_predictions": in_workdir(load_predictions),
+        "rl_category_errors": after_merge(lambda: category["analyze_rl_category_errors"]()),
+        "consensus_errors": after_merge(lambda: category["find_consensus_errors"]()),
+        "rl7_missed_samples": after_merge(lambda: rl7["find_rl7_missed_samples"]()),
+    }
+
+
+def build_cases(directory: str, max_merge_rows: int = MAX_MERGE_ROWS) -> Dict[str, Callable[[], Any]]:
+    """Benchmark name -> zero-argument callable over the scaled data in `directory`"""
+    zh = load_notebook_functions(NOTEBOOKS["zh"])
+    en = load_notebook_functions(NOTEBOOKS["en"])
+    dataset = pd.read_csv(os.path.join(directory, 'dataset.csv'))
+    raw = {language: pd.read_csv(os.path.join(directory, 'llm_outputs', f'gpt41_zero_shot{suffix}.csv'),
+                                 usecols=['Raw_Model_Output'])['Raw_Model_Output'].astype(str)
+           for language, suffix in (("zh", ""), ("en", "_en"))}
+    columns = {language: model_columns(directory, language) for language in ("zh", "en")}
+    cleaned_zh = {name: column.apply(zh["clean_zh_output"]) for name, column in columns["zh"].items()}
+    golden = dataset['Golden'].apply(zh["parse_annotator"]).tolist()
+    parsed_zh = {name: column.apply(zh["parse_RL_category"]).tolist() for name, column in cleaned_zh.items()}
+
+    def merge_outputs():
+        # Notebook cell 5: read every output file into one frame
+        sample = dataset.copy()
+        for name, column in model_columns(directory, "zh").items():
+            sample[name] = column
+        return sample
+
+    def evaluate():
+        with redirect_stdout(io.StringIO()):
+            for name, predictions in parsed_zh.items():
+                zh["evaluate_predictions"](golden, predictions, "Golden", name)
+
+    cases = {
+        "parse_output_zh": lambda: [parse_output(text, "zh") for text in raw["zh"]],
+        "parse_output_en": lambda: [parse_output(text, "en") for text in raw["en"]],
+        "merge_outputs_zh": merge_outputs,
+        "clean_zh_output": lambda: [column.apply(zh["clean_zh_output"]) for column in columns["zh"].values()],
+        "clean_RL_output": lambda: [column.apply(en["clean_RL_output"]) for column in columns["en"].values()],
+        "parse_annotator": lambda: dataset['Golden'].apply(zh["parse_annotator"]),
+        "parse_RL_category": lambda: [column.apply(zh["parse_RL_category"]) for column in cleaned_zh.values()],
+        "evaluate_predictions": evaluate if "f1_score" in zh else None,
+        **error_analysis_cases(directory, dataset, max_merge_rows),
+    }
+    if cases["evaluate_predictions"] is None:
+        print(f"evaluate_predictions will be skipped: {'; '.join(sorted(set(zh.get('_missing', []))))}")
+    return cases
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Best wall time over `repeat` runs, then peak traced memory from one extra run.
+
+    A `setup` attribute of the case (e.g. loading its input) runs first and is not measured.
+    """
+    if hasattr(function, "setup"):
+        function.setup()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    # Traced separately, since tracemalloc slows the code down
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(times), 4), "peak_mb": round(peak / (1024 * 1024), 2)}
+
+
+def git_state() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def load_results(path: str = RESULTS_PATH) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(path: str = RESULTS_PATH):
+    """Latest result per (case, rows) for the current commit against the most recent other commit"""
+    records = load_results(path)
+    current = git_state()["commit"]
+    latest, previous = {}, {}
+    for record in records:
+        key = (record["case"], record["rows"])
+        if record["commit"] == current:
+            latest[key] = record
+        else:
+            previous[key] = record
+    if not latest:
+        print(f"No results for {current}; run the benchmarks first")
+        return
+    print(f"{'case':<22}{'rows':>10}{'seconds':>22}{'peak MB':>22}")
+    for key, record in sorted(latest.items()):
+        before = previous.get(key)
+        line = f"{key[0]:<22}{key[1]:>10}"
+        for metric in ("seconds", "peak_mb"):
+            if before and before[metric]:
+                ratio = record[metric] / before[metric]
+                flag = " !" if ratio > REGRESSION_RATIO else "  "
+                line += f"{before[metric]:>9.2f} -> {record[metric]:>7.2f}{flag}"
+            else:
+                line += f"{record[metric]:>20.2f}  "
+        print(line)
+    if previous:
+        print(f"(previous: {sorted({r['commit'] for r in previous.values()})}; ! = more than "
+              f"{REGRESSION_RATIO:.1f}x slower or larger)")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the parsing, evaluation and error-analysis paths.")
+    parser.add_argument("--rows", nargs="+", type=int, default=SIZES[:1],
+                        help=f"Scaled dataset sizes (default: {SIZES[0]}; the full suite is {SIZES})")
+    parser.add_argument("--cases", nargs="+", default=None, help="Only run these cases")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (the best is kept)")
+    parser.add_argument("--max-merge-rows", type=int, default=MAX_MERGE_ROWS,
+                        help="Skip the error-analysis cases when their merge on text would produce more rows "
+                             "per model than this")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--results", default=RESULTS_PATH)
+    parser.add_argument("--compare", action="store_true", help="Only compare stored results across commits")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(args.results)
+        return
+
+    state = git_state()
+    for rows in args.rows:
+        directory = scaled_dir(rows, args.data_dir)
+        if not os.path.exists(os.path.join(directory, 'dataset.csv')):
+            scale(rows, args.data_dir)
+        print(f"\n== {rows} rows ({directory})")
+        cases = build_cases(directory, args.max_merge_rows)
+        for name, function in cases.items():
+            if args.cases and name not in args.cases:
+                continue
+            if function is None:
+                print(f"  {name:<22} skipped")
+                continue
+            result = measure(function, args.repeat)
+            print(f"  {name:<22} {result['seconds']:>9.3f}s  {result['peak_mb']:>9.1f} MB peak")
+            record = {**state, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                      "case": name, "rows": rows, **result}
+            with open(args.results, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+    print(f"\nResults appended to {args.results}; compare commits with --compare")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Transport settings of the provider clients, measured against the local mock server
+
+    python benchmarks/run_transport_benchmark.py --requests 400 --concurrency 32
+    python benchmarks/run_transport_benchmark.py --cases sdk_default hang_deadline --rate-hang 0.02
+
+Each case sends the same requests through a fresh ProviderBackend and a
+fresh in-process MockServer, and reports wall time, latency of the first
+wave of requests (cold connections) and of the rest, and how many TCP
+connections the server saw. The mock adds --handshake-ms to the first
+request of every connection, standing in for the TCP and TLS handshakes
+to a remote API that loopback does not have.
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from dataclasses import replace
+from contextlib import redirect_stdout
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+from openai import AsyncOpenAI
+
+from scale_dataset import ROOT, DATASET_PATH
+
+sys.path.insert(0, os.path.join(ROOT, '2_run_llms'))
+from llm_runner.prompts import generate_prompt  # noqa: E402
+from llm_runner.providers import PROVIDERS, ProviderBackend  # noqa: E402
+from llm_runner.transport import TransportConfig  # noqa: E402
+from llm_runner.mock_server import MockServer, MockConfig, AnswerBook  # noqa: E402
+
+# name -> transport; None is the client the runner used before the transport layer (SDK defaults)
+CASES = {
+    "sdk_default": None,
+    "pool_small": TransportConfig(max_connections=4),
+    "pool_matched": TransportConfig(),
+    "pool_prewarm": TransportConfig(prewarm=-1),  # -1: as many connections as the concurrency
+    # Only meaningful with --rate-hang: a hung socket holds its slot until the read timeout
+    "hang_sdk_default": None,
+    "hang_deadline": TransportConfig(request_timeout=-1),  # -1: ten times the median latency
+}
+HANG_CASES = {"hang_sdk_default", "hang_deadline"}
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(int(share * len(values)), len(values) - 1)] if values else 0.0
+
+
+async def run_case(name: str, transport: Optional[TransportConfig], server: MockServer, messages: List[List[Dict]],
+                   concurrency: int, latency_ms: float, stream: bool) -> Dict[str, Any]:
+    if transport is not None:
+        if transport.prewarm < 0:
+            transport = replace(transport, prewarm=concurrency)
+        if transport.request_timeout is not None and transport.request_timeout < 0:
+            transport = replace(transport, request_timeout=10 * latency_ms / 1000)
+    # A fixed concurrency, so every case sees the same load without the AIMD ramp-up
+    config = replace(PROVIDERS["gpt41"], base_url=server.base_url, max_concurrent=concurrency)
+    backend = ProviderBackend(config, api_key="sk-benchmark", max_concurrent=concurrency, stream=stream,
+                              transport=transport)
+    if transport is None:
+        for key in backend.keys.keys:
+            key._client = AsyncOpenAI(api_key=key.api_key, base_url=key.base_url, max_retries=0)
+    elif transport.prewarm:
+        await backend.keys.prewarm()
+    connections_before = server.llm.stats["connections"]
+
+    latencies = [0.0] * len(messages)
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        stats = {}
+        start = time.perf_counter()
+        try:
+            await backend.complete(messages[i], max_retries=3, stats=stats)
+        except Exception:
+            failures += 1
+        # Time spent waiting for a concurrency slot is the same in every case, so it is left out
+        latencies[i] = time.perf_counter() - start - stats.get("queue_seconds", 0.0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(len(messages))))
+    seconds = time.perf_counter() - start
+    await backend.close()
+    cold, warm = latencies[:concurrency], latencies[concurrency:]
+    return {
+        "case": name, "requests": len(messages), "seconds": round(seconds, 3),
+        "cold_p50": round(statistics.median(cold), 3) if cold else 0.0,
+        "warm_p50": round(statistics.median(warm), 3) if warm else 0.0,
+        "p95": round(percentile(latencies, 0.95), 3), "max": round(max(latencies), 3),
+        "connections": server.llm.stats["connections"] - connections_before, "failed": failures,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark client transport settings against the mock server.")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--handshake-ms", type=float, default=150.0,
+                        help="Delay on each new connection's first request (TCP+TLS to a remote API)")
+    parser.add_argument("--rate-hang", type=float, default=0.01, help="Share of requests that hang (hang_* cases)")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    args = parser.parse_args(argv)
+
+    texts = pd.read_csv(DATASET_PATH)['text'].astype(str).tolist()
+    messages = [generate_prompt(texts[i % len(texts)] + f" #{i}") for i in range(args.requests)]
+    book = AnswerBook()
+    book.load_dataset(DATASET_PATH)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, latency {args.latency_ms:.0f}ms, "
+          f"handshake {args.handshake_ms:.0f}ms")
+    print(f"{'case':<18}{'seconds':>9}{'cold p50':>10}{'warm p50':>10}{'p95':>8}{'max':>8}"
+          f"{'conns':>7}{'failed':>8}")
+    for name in args.cases:
+        # A fresh server per case, so hung requests of one case do not hold threads in the next
+        config = MockConfig(latency_ms=args.latency_ms, latency_sigma=0.3, handshake_ms=args.handshake_ms,
+                            rate_hang=args.rate_hang if name in HANG_CASES else 0.0,
+                            hang_seconds=args.hang_seconds, seed=0)
+        server = MockServer(config, book).start()
+        try:
+            # The backend logs every retry; only the table is wanted here
+            with redirect_stdout(io.StringIO()):
+                result = asyncio.run(run_case(name, CASES[name], server, messages, args.concurrency,
+                                              args.latency_ms, args.stream))
+        finally:
+            server.stop()
+        print(f"{result['case']:<18}{result['seconds']:>9.2f}{result['cold_p50']:>10.3f}{result['warm_p50']:>10.3f}"
+              f"{result['p95']:>8.3f}{result['max']:>8.2f}{result['connections']:>7}{result['failed']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Synthetically scale dataset.csv and the llm_outputs CSVs for the benchmarks
+
+Rows are resampled with replacement (seeded), and the same row order is
+used for the dataset and every output file, so they stay aligned the way
+the evaluation notebooks expect. Writes benchmarks/data/{rows}/dataset.csv
+and benchmarks/data/{rows}/llm_outputs/*.csv.
+
+Raw_Model_Output makes up almost all of the output files' size (~19 MB
+for 483 rows), so only the files given with --raw-outputs keep it and
+the other files keep just RL_Types, which is all the notebooks read.
+The files the 4_error_analysis scripts read also keep
+Original_Input_Text, their merge key. Resampling repeats every text
+about rows/483 times, so those merges grow with the square of that.
+"""
+
+import os
+import glob
+import argparse
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(ROOT, '0_data_collection', 'dataset.csv')
+OUTPUTS_DIR = os.path.join(ROOT, '2_run_llms', 'llm_outputs')
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+RAW_OUTPUTS = ['gpt41_zero_shot.csv', 'gpt41_zero_shot_en.csv']
+# Read by the 4_error_analysis scripts, which merge them with the dataset on the text
+TEXT_OUTPUTS = [f'{model}_{mode}.csv' for model in ('Qwen3-32B', 'Qwen3-235B-A22B', 'gemma-3-27b-it')
+                for mode in ('few_shot', 'zero_shot', 'no_cot')]
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def scaled_dir(rows: int, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, str(rows))
+
+
+def scale(rows: int, data_dir: str = DATA_DIR, dataset_path: str = DATASET_PATH, outputs_dir: str = OUTPUTS_DIR,
+          raw_outputs: Optional[List[str]] = None, seed: int = 0) -> str:
+    """Write a `rows`-row copy of the dataset and its outputs; returns the directory"""
+    raw_outputs = RAW_OUTPUTS if raw_outputs is None else raw_outputs
+    directory = scaled_dir(rows, data_dir)
+    os.makedirs(os.path.join(directory, 'llm_outputs'), exist_ok=True)
+
+    dataset = pd.read_csv(dataset_path)
+    picks = np.random.default_rng(seed).integers(0, len(dataset), size=rows)
+    scaled = dataset.iloc[picks].reset_index(drop=True)
+    # Keep comment_id unique, so the runner's resume index treats every row as its own item
+    scaled['comment_id'] = scaled['comment_id'].astype(str) + '_s' + pd.Series(range(rows)).astype(str)
+    scaled.to_csv(os.path.join(directory, 'dataset.csv'), index=False)
+
+    for path in sorted(glob.glob(os.path.join(outputs_dir, '*.csv'))):
+        name = os.path.basename(path)
+        df = pd.read_csv(path)
+        if len(df) != len(dataset):
+            print(f"Skipping {name}: {len(df)} rows, dataset has {len(dataset)}")
+            continue
+        if name in raw_outputs:
+            columns = list(df.columns)
+        else:
+            columns = ['Original_Input_Text', 'RL_Types'] if name in TEXT_OUTPUTS else ['RL_Types']
+        df.iloc[picks][columns].to_csv(os.path.join(directory, 'llm_outputs', name), index=False)
+    print(f"Wrote {rows} rows to {directory}")
+    return directory
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Scale dataset.csv and llm_outputs for the benchmarks.")
+    parser.add_argument("--rows", nargs="+", type=int, default=SIZES, help="Target row counts")
+    parser.add_argument("--raw-outputs", nargs="*", default=RAW_OUTPUTS,
+                        help="Output files that keep Raw_Model_Output (the rest keep only RL_Types)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for rows in args.rows:
+        scale(rows, args.data_dir, raw_outputs=args.raw_outputs, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()